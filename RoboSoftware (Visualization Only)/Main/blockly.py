@@ -1,684 +1,514 @@
 import json
 import os
-
-from PyQt5.QtCore import QObject, QEventLoop, QTimer, QUrl, pyqtSignal, pyqtSlot
+import shutil
+import sys
+import tempfile
+import threading
+from abc import ABCMeta
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from PyQt5.QtCore import QObject, QProcess, QProcessEnvironment, QThread, QTimer, QUrl, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWebChannel import QWebChannel
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtWidgets import QFileDialog, QVBoxLayout
 
 import functions
+from blockly_host import BlocklyHost, prepare_program, run_program
+from blockly_runtime import EVENT_FLUSH_INTERVAL, BlockProfile, RunControl, RunEvents
+from motion import STOP_CHECK, ProgramStopped
+from robot_io import lock_and_disconnect
+from robot_session import RobotSession
+
+# BLOCKLY_OPTIMIZER_VERBOSE=1 prints every rewrite the optimizer makes
+OPTIMIZER_VERBOSE = os.environ.get("BLOCKLY_OPTIMIZER_VERBOSE", "") not in ("", "0")
+
+# Dry runs take over functions' backend, so they run in run_blockly.py --dry-run
+RUN_BLOCKLY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_blockly.py")
 
 
 class BlocklyBridge(QObject):
     """Bridge object exposed to the embedded Blockly web view."""
 
     programRequested = pyqtSignal(str)
+    dryRunRequested = pyqtSignal(str)
     saveRequested = pyqtSignal(str)
+    exportProgramRequested = pyqtSignal(str)
+    exportProfileRequested = pyqtSignal()
+    stopRequested = pyqtSignal()
+    pauseRequested = pyqtSignal()
+    resumeRequested = pyqtSignal()
+
+    # To the web view
+    runStateChanged = pyqtSignal(str)      # "running", "paused", "stopping", "stopped", "finished", "failed"
+    runEvents = pyqtSignal(str)            # RunEvents.flush() batch, as JSON, at most every EVENT_FLUSH_INTERVAL
+    profileReady = pyqtSignal(str)         # BlockProfile.summary() of the last run, as JSON
+    dryRunReady = pyqtSignal(str)          # blockly_dryrun report without its timeline, as JSON
 
     @pyqtSlot(str)
     def runProgram(self, program_json: str):
         self.programRequested.emit(program_json)
 
+    @pyqtSlot(str)
+    def dryRunProgram(self, program_json: str):
+        self.dryRunRequested.emit(program_json)
+
     @pyqtSlot(str)
     def saveProgram(self, program_state_json: str):
         self.saveRequested.emit(program_state_json)
 
+    @pyqtSlot(str)
+    def exportProgram(self, program_json: str):
+        self.exportProgramRequested.emit(program_json)
 
-class BlocklyManager(QObject):
-    """Encapsulates Blockly UI embedding and robot command execution."""
+    @pyqtSlot()
+    def exportProfile(self):
+        self.exportProfileRequested.emit()
 
-    def __init__(self, app):
-        super().__init__(app)
-        self.app = app
-        self.blockly_view = None
-        self.blockly_channel = None
-        self.blockly_bridge = BlocklyBridge()
-        self.blockly_bridge.programRequested.connect(self.handle_blockly_program)
-        self.blockly_bridge.saveRequested.connect(self.handle_blockly_save)
+    @pyqtSlot()
+    def stopProgram(self):
+        self.stopRequested.emit()
 
-    def setup(self):
-        container = self.app.ui.blocklyContainer
-        layout = container.layout()
-        if layout is None:
-            layout = QVBoxLayout(container)
-            layout.setContentsMargins(0, 0, 0, 0)
+    @pyqtSlot()
+    def pauseProgram(self):
+        self.pauseRequested.emit()
 
-        self.blockly_view = QWebEngineView(container)
-        layout.addWidget(self.blockly_view)
+    @pyqtSlot()
+    def resumeProgram(self):
+        self.resumeRequested.emit()
 
-        self.blockly_channel = QWebChannel(self.blockly_view.page())
-        self.blockly_channel.registerObject("blocklyBridge", self.blockly_bridge)
-        self.blockly_view.page().setWebChannel(self.blockly_channel)
 
-        blockly_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blockly", "index.html")
-        if not os.path.exists(blockly_file):
-            print(f"Warning: Blockly UI not found at {blockly_file}")
-            return
+class _QObjectABCMeta(type(QObject), ABCMeta):
+    """QObject's metaclass with ABCMeta's abstract-method check, for QObject RobotSessions."""
 
-        self.blockly_view.load(QUrl.fromLocalFile(blockly_file))
 
-    def handle_blockly_program(self, program_json: str):
-        try:
-            steps = json.loads(program_json)
-        except json.JSONDecodeError as exc:
-            print(f"Failed to parse Blockly program: {exc}")
-            return
+class GuiRobotSession(QObject, RobotSession, metaclass=_QObjectABCMeta):
+    """
+    RobotSession backed by MainApp: the editor's runs share the GUI's
+    connection, speed slider, I/O worker and telemetry.
 
-        if not steps:
-            print("Blockly program is empty.")
-            return
+    Robot commands go through the I/O worker (robot_io.call from a plain thread
+    just waits on the Future).  Anything that touches widgets is sent to the
+    GUI thread with gui_call; the GUI thread itself never waits on the robot.
+    """
 
-        runtime = {"variables": {}}
-        self.run_blockly_steps(steps, runtime=runtime)
+    # (func, args, kwargs, Future) to run on the GUI thread; see gui_call
+    guiCallRequested = pyqtSignal(object)
 
-    def handle_blockly_save(self, program_state_json: str):
-        path, _ = QFileDialog.getSaveFileName(
-            self.app,
-            "Save Blockly Script",
-            "",
-            "Blockly JSON (*.json);;All Files (*)",
-        )
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.control = None   # RunControl of the current run, for gui_call
+        self.guiCallRequested.connect(self._run_gui_call)
 
-        if not path:
-            print("[Blockly] Save canceled.")
-            return
+    @property
+    def connected(self) -> bool:
+        return self.app.connected
 
-        final_path = path if path.lower().endswith(".json") else f"{path}.json"
+    @property
+    def servo_locked(self) -> bool:
+        return self.app.servo_locked
 
-        try:
-            with open(final_path, "w", encoding="utf-8") as handle:
-                handle.write(program_state_json)
-            print(f"[Blockly] ✅ Script saved to {final_path}")
-        except Exception as exc:
-            print(f"[Blockly] ❌ Failed to save script: {exc}")
+    def get_robot_config(self):
+        return self.app.get_robot_config()
 
-    def run_blockly_steps(self, steps, runtime, context_label="[Blockly]"):
-        for index, step in enumerate(steps, start=1):
-            default_ip, default_port, default_name = self.app.get_robot_config()
-            action = step.get("type")
-            prefix = f"{context_label} Step {index}"
-
-            if action == "connect_robot":
-                ip = (step.get("ip") or "").strip() or default_ip
-                port = (step.get("port") or "").strip() or default_port
-                name = (step.get("name") or "").strip() or default_name
-                print(f"{prefix}: connect {name} at {ip}:{port}")
-                self.apply_blockly_connect(ip, port, name)
-            elif action == "disconnect_robot":
-                print(f"{prefix}: disconnect robot")
-                self.apply_blockly_disconnect()
-            elif action == "set_servo_state":
-                state = step.get("state", "lock")
-                print(f"{prefix}: set servo {state}")
-                self.apply_blockly_servo(state)
-            elif action == "set_speed":
-                value = self.resolve_value(step.get("value"), runtime, expected_type="number")
-                if value is None:
-                    value = self.app.get_current_speed()
-                print(f"{prefix}: set speed to {value}")
-                self.apply_blockly_speed(value)
-            elif action == "set_variable":
-                name = (step.get("name") or "").strip()
-                value = self.resolve_value(step.get("value"), runtime)
-                self.apply_blockly_set_variable(name, value, runtime, prefix)
-            elif action == "print":
-                message = self.resolve_value(step.get("message"), runtime)
-                self.apply_blockly_print(message, prefix)
-            elif action == "jog_joint":
-                joint = step.get("joint")
-                delta = self.resolve_value(step.get("delta"), runtime, expected_type="number")
-                if delta is None:
-                    print(f"{prefix}: ⚠️ Joint delta is undefined.")
-                    continue
-                print(f"{prefix}: jog joint {joint} by {delta}")
-                self.apply_blockly_jog_joint(joint, delta)
-            elif action == "jog_linear":
-                axis = step.get("axis")
-                delta = self.resolve_value(step.get("delta"), runtime, expected_type="number")
-                if delta is None:
-                    print(f"{prefix}: ⚠️ Linear delta is undefined.")
-                    continue
-                print(f"{prefix}: jog axis {axis} by {delta}")
-                self.apply_blockly_jog_linear(axis, delta)
-            elif action == "move_joint_absolute":
-                joint = step.get("joint")
-                angle = self.resolve_value(step.get("angle"), runtime, expected_type="number")
-                if angle is None:
-                    print(f"{prefix}: ⚠️ Target angle is undefined.")
-                    continue
-                print(f"{prefix}: move joint {joint} to {angle}")
-                self.apply_blockly_move_joint_absolute(joint, angle)
-            elif action == "move_linear_absolute":
-                mode = step.get("mode", "tool")
-                coords = {
-                    "x": self.resolve_value(step.get("x"), runtime, expected_type="number"),
-                    "y": self.resolve_value(step.get("y"), runtime, expected_type="number"),
-                    "z": self.resolve_value(step.get("z"), runtime, expected_type="number"),
-                    "rx": self.resolve_value(step.get("rx"), runtime, expected_type="number"),
-                    "ry": self.resolve_value(step.get("ry"), runtime, expected_type="number"),
-                    "rz": self.resolve_value(step.get("rz"), runtime, expected_type="number"),
-                }
-                print(f"{prefix}: move linearly in {mode} frame to {coords}")
-                self.apply_blockly_move_linear_absolute(mode, coords)
-            elif action == "go_home":
-                mode = step.get("mode", "manual")
-                use_library = mode == "library"
-                print(f"{prefix}: move home ({mode})")
-                self.apply_blockly_home(use_library)
-            elif action == "delay":
-                duration = self.resolve_value(step.get("duration"), runtime, expected_type="number")
-                if duration is None:
-                    print(f"{prefix}: ⚠️ Delay duration is undefined.")
-                    continue
-                print(f"{prefix}: delay {duration} sec")
-                self.apply_blockly_delay(duration)
-            elif action == "repeat_loop":
-                count = self.resolve_value(step.get("count"), runtime, expected_type="number")
-                body = step.get("body") or []
-                self.apply_blockly_repeat(count, body, runtime, prefix)
-            elif action == "if_condition":
-                condition = step.get("condition", {})
-                print(f"{prefix}: if condition {condition}")
-                self.apply_blockly_if(condition, runtime, context_label=prefix)
-            elif action == "if_variable_compare":
-                name = (step.get("name") or "").strip()
-                operator = step.get("operator", "EQ")
-                value_expr = step.get("value")
-                true_branch = step.get("true_branch") or []
-                false_branch = step.get("false_branch") or []
-                print(f"{prefix}: if variable {name or '<unnamed>'} {operator} ...")
-                self.apply_blockly_if_variable(
-                    name,
-                    operator,
-                    value_expr,
-                    runtime,
-                    prefix,
-                    true_branch,
-                    false_branch,
-                )
-            elif action == "get_coordinates":
-                mode = step.get("mode", "joint")
-                store = (step.get("store") or "").strip()
-                self.apply_blockly_get_coordinates(mode, store, runtime, prefix)
-            else:
-                print(f"{prefix}: unsupported action '{action}'")
-
-    def resolve_value(self, expr, runtime, expected_type=None):
-        if expr is None:
-            return None
-
-        kind = expr.get("kind")
-        if kind == "literal":
-            value_type = expr.get("valueType")
-            value = expr.get("value")
-            if value_type == "number":
-                try:
-                    number = float(value)
-                    if expected_type == "int":
-                        return int(number)
-                    if expected_type == "number" or expected_type is None:
-                        return number
-                    if expected_type == "string":
-                        return str(number)
-                    if expected_type == "boolean":
-                        return bool(number)
-                    return number
-                except (TypeError, ValueError):
-                    return None
-            if value_type == "boolean":
-                boolean_value = bool(value)
-                if expected_type == "string":
-                    return "True" if boolean_value else "False"
-                if expected_type == "number":
-                    return 1.0 if boolean_value else 0.0
-                return boolean_value
-            if value_type == "string" or value_type is None:
-                string_value = "" if value is None else str(value)
-                if expected_type == "number":
-                    try:
-                        return float(string_value)
-                    except ValueError:
-                        return None
-                if expected_type == "boolean":
-                    return string_value.lower() in {"true", "1", "yes"}
-                return string_value
-            return value
-
-        if kind == "variable":
-            name = (expr.get("name") or "").strip()
-            if not name:
-                print("⚠️ Variable reference missing name.")
-                return None
-            value = runtime["variables"].get(name)
-            if value is None:
-                print(f"⚠️ Variable '{name}' is undefined.")
-                return None
-            if expected_type == "number":
-                try:
-                    return float(value)
-                except (TypeError, ValueError):
-                    return None
-            if expected_type == "int":
-                try:
-                    return int(float(value))
-                except (TypeError, ValueError):
-                    return None
-            if expected_type == "string":
-                return str(value)
-            if expected_type == "boolean":
-                return bool(value)
-            return value
-
-        print(f"⚠️ Unsupported value expression {expr}")
-        return None
-
-    def apply_blockly_connect(self, ip: str, port: str, name: str):
-        self.app.update_robot_config(ip, port, name)
+    def update_robot_config(self, ip: str, port: str, name: str):
+        self.gui_call(self.app.update_robot_config, ip, port, name)
 
+    def connect(self) -> bool:
         if self.app.connected:
-            print("Robot is already connected; skipping new connect request.")
-            return
-
-        self.app.toggle_connection()
-
-    def apply_blockly_servo(self, state: str):
-        if not self.app.connected:
-            print("❌ Cannot change servo state: robot not connected.")
-            return
-
-        desired_lock = state != "unlock"
-        if self.app._apply_servo_state(desired_lock):
-            label = "LOCKED" if desired_lock else "UNLOCKED"
-            emoji = "🔒" if desired_lock else "🔓"
-            print(f"{emoji} Servo {label}")
-
-    def apply_blockly_disconnect(self):
-        if not self.app.connected:
-            print("Robot already disconnected.")
-            return
-        self.app.toggle_connection()
-
-    def apply_blockly_move_joint_absolute(self, joint, angle):
-        if not self.app.ensure_robot_ready(auto_unlock=True, source="blockly joint move"):
-            return
-
-        try:
-            joint_index = int(joint)
-        except (TypeError, ValueError):
-            print(f"⚠️ Invalid joint index '{joint}'")
-            return
-
-        if not 0 <= joint_index <= 5:
-            print(f"⚠️ Joint index {joint_index} out of range (0-5)")
-            return
-
+            return True
+        ip, port, name = self.get_robot_config()
+        print("Connecting...")
         try:
-            target_angle = float(angle)
-        except (TypeError, ValueError):
-            print(f"⚠️ Invalid joint angle '{angle}'")
-            return
-
-        _, _, robot_name = self.app.get_robot_config()
-
-        try:
-            joints = functions.get_current_position(robot_name, coord=0)
-            joints[joint_index] = target_angle
-            status = functions.robot_movej(
-                joints,
-                vel=self.app.get_current_speed(),
-                coord=0,
-                acc=30,
-                dec=30,
-                robot_name=robot_name,
-            )
-            if status == 0:
-                self.app.update_robot_labels()
-                print(f"✅ Joint {joint_index + 1} moved to {target_angle}")
-            else:
-                print(f"❌ robot_movej returned code {status}")
+            status, error = self.call(functions.connect_robot, ip, port, name), None
         except Exception as exc:
-            print(f"❌ Absolute joint move failed: {exc}")
-
-    def apply_blockly_move_linear_absolute(self, mode: str, coords: dict):
-        if not self.app.ensure_robot_ready(auto_unlock=True, source="blockly linear move"):
-            return
+            status, error = None, exc
+        self.gui_call(self.app._connect_finished, status, error)
+        if self.app.connected:
+            # Same safe state as the Connect button: locked (power OFF) until something unlocks
+            self.set_servo_locked(True)
+        return self.app.connected
 
-        mode_key = (mode or "tool").lower()
-        coord_map = {"tool": 0, "origin": 1, "base": 2}
-        coord_val = coord_map.get(mode_key)
-        if coord_val is None:
-            print(f"⚠️ Unsupported coordinate mode '{mode}'")
+    def disconnect(self):
+        if not self.app.connected:
             return
-
-        _, _, robot_name = self.app.get_robot_config()
-
+        _, _, name = self.get_robot_config()
+        self.gui_call(self.app._disconnect_started)
         try:
-            functions.set_current_coord(coord_val, robot_name)
+            power_off_error, error = self.call(lock_and_disconnect, name), None
         except Exception as exc:
-            print(f"⚠️ Failed to set coordinate mode '{mode}': {exc}")
+            power_off_error, error = None, exc
+        self.gui_call(self.app._disconnect_finished, power_off_error, error)
 
+    def set_servo_locked(self, locked: bool) -> bool:
+        _, _, name = self.get_robot_config()
         try:
-            current = functions.get_current_position(robot_name, coord=coord_val)
+            self.call(functions.set_servo_locked, locked, name)
         except Exception as exc:
-            print(f"❌ Failed to read current position: {exc}")
-            return
+            return self.gui_call(self.app._servo_state_applied, locked, exc)
+        return self.gui_call(self.app._servo_state_applied, locked)
 
-        axis_map = {
-            "x": 2,
-            "y": 1,
-            "z": 0,
-            "rx": 3,
-            "ry": 4,
-            "rz": 5,
-        }
-
-        for key, idx in axis_map.items():
-            value = coords.get(key)
-            if value is None:
-                continue
-            try:
-                current[idx] = float(value)
-            except (TypeError, ValueError):
-                print(f"⚠️ Invalid value for {key.upper()}: '{value}'")
-                return
+    def get_speed(self) -> int:
+        return self.app.get_current_speed()
 
-        # Ensure we have 7 elements for API expectations
-        while len(current) < 7:
-            current.append(0.0)
+    def set_speed(self, speed_value: int):
+        self.gui_call(self.app.set_speed_value, speed_value)
 
-        speed = max(1, int(self.app.get_current_speed()))
+    def call(self, func, *args, **kwargs):
+        return self.app.robot_io.call(func, *args, **kwargs)
 
-        try:
-            status = functions.robot_movel(
-                current,
-                vel=speed * 5,
-                coord=1,
-                acc=30,
-                dec=30,
-                robot_name=robot_name,
-            )
-            if status == 0:
-                self.app.update_robot_labels()
-                print("✅ Linear absolute move executed")
-            else:
-                print(f"❌ robot_movel returned code {status}")
-        except Exception as exc:
-            print(f"❌ Linear absolute move failed: {exc}")
+    def stop_motion(self):
+        if self.app.connected:
+            _, _, robot_name = self.app.get_robot_config()
+            self.app.robot_io.submit(functions.job_stop, robot_name)
+
+    def latest_state(self):
+        telemetry = self.app.telemetry
+        return telemetry.latest if telemetry.is_fresh() else None
+
+    def coord_changed(self):
+        self.app.telemetry.mark_coord_dirty()
+
+    def show_position(self):
+        self.gui_call(self.app.update_robot_labels)
+
+    def gui_call(self, func, *args, **kwargs):
+        """
+        Run func on the GUI thread and return its result; called directly when
+        already there.  The program thread waits for the answer, giving up if
+        its run is stopped meanwhile (e.g. the GUI is waiting on that thread).
+        """
+        if threading.current_thread() is threading.main_thread():
+            return func(*args, **kwargs)
+        future = Future()
+        self.guiCallRequested.emit((func, args, kwargs, future))
+        control = self.control
+        while True:
+            try:
+                return future.result(timeout=STOP_CHECK)
+            except FutureTimeout:
+                if control is not None and control.stopped:
+                    future.cancel()
+                    raise ProgramStopped()
 
-    def apply_blockly_speed(self, speed_value):
-        if speed_value is None:
-            print("⚠️ Speed value is undefined; skipping.")
+    def _run_gui_call(self, item):
+        func, args, kwargs, future = item
+        if not future.set_running_or_notify_cancel():
             return
-
         try:
-            speed_int = int(float(speed_value))
-        except (TypeError, ValueError):
-            print(f"⚠️ Invalid speed value '{speed_value}', skipping.")
-            return
+            future.set_result(func(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
 
-        clamped = max(0, min(100, speed_int))
-        self.app.set_speed_value(clamped)
-        print(f"Speed set to {clamped}")
 
-    def apply_blockly_jog_joint(self, joint, delta):
-        if not self.app.connected:
-            print("❌ Cannot jog joint: robot not connected.")
-            return
+class BlocklyRunner(QThread):
+    """
+    Runs one compiled Blockly program on its own thread, so a long program
+    (delays, loops of moves) never blocks the Qt event loop.
 
-        if delta is None:
-            print("⚠️ Joint jog delta is undefined.")
-            return
+    The blocks run on a BlocklyHost over the GUI's RobotSession.  Stop and
+    pause go through a RunControl that the executor checks before every
+    block.  Progress for the editor is collected in RunEvents, which
+    BlocklyManager flushes from a GUI timer.  Every run is also profiled
+    (BlockProfile): it shares the RunEvents counters and samples the running
+    block from its own thread, so it adds no per-block cost.  The summary is
+    emitted just before the final state.
+    """
 
-        try:
-            joint_index = int(joint)
-            delta_val = float(delta)
-        except (TypeError, ValueError):
-            print(f"⚠️ Invalid joint jog parameters joint={joint}, delta={delta}")
-            return
+    stateChanged = pyqtSignal(str)
+    profileReady = pyqtSignal(object)   # BlockProfile.summary()
 
-        if not 0 <= joint_index <= 5:
-            print(f"⚠️ Joint index {joint_index} is out of range (0-5).")
-            return
+    def __init__(self, program, session: RobotSession, parent=None):
+        super().__init__(parent)
+        self.program = program
+        self.control = RunControl()
+        self.profile = BlockProfile(program)
+        self.events = RunEvents(program)
+        self.host = BlocklyHost(session, self.control, self.profile, events=self.events)
 
-        if delta_val == 0:
-            print("⚠️ Jog delta is zero; skipping joint move.")
-            return
+    def run(self):
+        self.stateChanged.emit("running")
+        state, _ = run_program(self.program, self.host)
+        self.profileReady.emit(self.profile.summary())
+        self.stateChanged.emit(state)
 
-        _, _, robot_name = self.app.get_robot_config()
-        speed = self.app.get_current_speed()
+    def stop(self):
+        self.control.stop()
 
-        try:
-            functions.move_joint_relative(
-                joint_index=joint_index,
-                delta=delta_val,
-                vel=speed,
-                acc=30,
-                dec=30,
-                robot_name=robot_name,
-            )
-            self.app.update_robot_labels()
-            print(f"✅ Joint {joint_index + 1} moved by {delta_val}")
-        except Exception as exc:
-            print(f"❌ Joint jog failed: {exc}")
+    def pause(self):
+        self.control.pause()
 
-    def apply_blockly_jog_linear(self, axis, delta):
-        if not self.app.connected:
-            print("❌ Cannot jog axis: robot not connected.")
-            return
+    def resume(self):
+        self.control.resume()
 
-        if delta is None:
-            print("⚠️ Linear jog delta is undefined.")
-            return
 
-        axis_map = {"0": 0, "1": 1, "2": 2, "x": 0, "y": 1, "z": 2}
-        axis_index = axis_map.get(str(axis).lower())
-        if axis_index is None:
-            print(f"⚠️ Invalid axis '{axis}'")
-            return
+class BlocklyManager(QObject):
+    """Encapsulates Blockly UI embedding and program runs; the blocks themselves are in BlocklyHost."""
 
-        try:
-            delta_val = float(delta)
-        except (TypeError, ValueError):
-            print(f"⚠️ Invalid linear jog delta '{delta}'")
-            return
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.session = GuiRobotSession(app)
+        self.blockly_view = None
+        self.blockly_channel = None
+        self.runner = None
+        self.last_profile = None
+        self.dry_run_process = None
+        self.dry_run_dir = None
+        # Batches the running program's events to the web view at a capped rate
+        self.event_timer = QTimer(self)
+        self.event_timer.setInterval(int(EVENT_FLUSH_INTERVAL * 1000))
+        self.event_timer.timeout.connect(self.flush_run_events)
+        self.blockly_bridge = BlocklyBridge()
+        self.blockly_bridge.programRequested.connect(self.handle_blockly_program)
+        self.blockly_bridge.dryRunRequested.connect(self.dry_run_program)
+        self.blockly_bridge.saveRequested.connect(self.handle_blockly_save)
+        self.blockly_bridge.exportProgramRequested.connect(self.handle_blockly_export)
+        self.blockly_bridge.exportProfileRequested.connect(self.export_profile)
+        self.blockly_bridge.stopRequested.connect(self.stop_program)
+        self.blockly_bridge.pauseRequested.connect(self.pause_program)
+        self.blockly_bridge.resumeRequested.connect(self.resume_program)
 
-        if delta_val == 0:
-            print("⚠️ Jog delta is zero; skipping linear move.")
-            return
+    def setup(self):
+        container = self.app.ui.blocklyContainer
+        layout = container.layout()
+        if layout is None:
+            layout = QVBoxLayout(container)
+            layout.setContentsMargins(0, 0, 0, 0)
 
-        _, _, robot_name = self.app.get_robot_config()
-        speed = self.app.get_current_speed()
+        self.blockly_view = QWebEngineView(container)
+        layout.addWidget(self.blockly_view)
 
-        try:
-            functions.linear_jog(
-                axis_index=axis_index,
-                delta=delta_val,
-                vel=speed * 5,
-                acc=30,
-                dec=30,
-                robot_name=robot_name,
-            )
-            self.app.update_robot_labels()
-            axis_name = "XYZ"[axis_index]
-            print(f"✅ Axis {axis_name} moved by {delta_val}")
-        except Exception as exc:
-            print(f"❌ Linear jog failed: {exc}")
+        self.blockly_channel = QWebChannel(self.blockly_view.page())
+        self.blockly_channel.registerObject("blocklyBridge", self.blockly_bridge)
+        self.blockly_view.page().setWebChannel(self.blockly_channel)
 
-    def apply_blockly_home(self, use_library_home: bool):
-        if not self.app.connected:
-            print("❌ Cannot move home: robot not connected.")
+        blockly_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blockly", "index.html")
+        if not os.path.exists(blockly_file):
+            print(f"Warning: Blockly UI not found at {blockly_file}")
             return
 
-        self.app.go_home(use_library_home=use_library_home)
-
-    def apply_blockly_delay(self, duration):
-        if duration is None:
-            print("⚠️ Delay duration is undefined.")
-            return
+        self.blockly_view.load(QUrl.fromLocalFile(blockly_file))
 
+    def handle_blockly_program(self, program_json: str):
         try:
-            seconds = max(0.0, float(duration))
-        except (TypeError, ValueError):
-            print(f"⚠️ Invalid delay duration '{duration}'")
-            return
-
-        print(f"⏳ Waiting for {seconds} seconds...")
-        loop = QEventLoop()
-        QTimer.singleShot(int(seconds * 1000), loop.quit)
-        loop.exec_()
-
-    def apply_blockly_if(self, condition, runtime, context_label="[Blockly]"):
-        condition_type = condition.get("type")
-
-        if condition_type == "is_connected":
-            expected = bool(condition.get("value", True))
-            result = (self.app.connected is True) == expected
-        elif condition_type == "servo_locked":
-            expected = bool(condition.get("value", True))
-            result = (self.app.servo_locked is True) == expected
-        else:
-            print(f"⚠️ Unsupported condition type '{condition_type}'.")
+            steps = json.loads(program_json)
+        except json.JSONDecodeError as exc:
+            print(f"Failed to parse Blockly program: {exc}")
             return
 
-        branch = condition.get("true_branch") if result else condition.get("false_branch")
-        if branch is None:
-            branch = []
-
-        if not branch:
-            print("ℹ️ Condition branch is empty.")
+        if not steps:
+            print("Blockly program is empty.")
             return
 
-        branch_label = f"{context_label} {'TRUE' if result else 'FALSE'}"
-        print(f"➡️ {branch_label}: executing {len(branch)} step(s)")
-        self.run_blockly_steps(branch, runtime, context_label=branch_label)
-
-    def apply_blockly_set_variable(self, name, value, runtime, context_label):
-        if not name:
-            print(f"{context_label}: ⚠️ Variable name is empty; skipping assignment.")
+        if self.is_running():
+            print("[Blockly] ⚠️ A program is already running; stop it first.")
+            return
+
+        program = prepare_program(steps, verbose=OPTIMIZER_VERBOSE)
+        self.runner = BlocklyRunner(program, self.session, self)
+        self.session.control = self.runner.control
+        self.runner.stateChanged.connect(self.on_run_state_changed)
+        self.runner.profileReady.connect(self.on_profile_ready)
+        self.runner.start()
+        self.event_timer.start()
+
+    # -------------------------
+    # Run control
+    # -------------------------
+    def is_running(self) -> bool:
+        return self.runner is not None and self.runner.isRunning()
+
+    def stop_program(self):
+        """Stop the run at the next block and halt the robot right away with job_stop."""
+        if not self.is_running() or self.runner.control.stopped:
+            return
+        self.runner.stop()
+        self.blockly_bridge.runStateChanged.emit("stopping")
+        # Queued now, not when the program thread notices: the current move stops at once
+        self.session.stop_motion()
+
+    def pause_program(self):
+        """Hold the run before its next block; a move already sent finishes."""
+        if self.is_running() and not self.runner.control.stopped:
+            self.runner.pause()
+            self.blockly_bridge.runStateChanged.emit("paused")
+
+    def resume_program(self):
+        if self.is_running() and self.runner.control.paused:
+            self.runner.resume()
+            self.blockly_bridge.runStateChanged.emit("running")
+
+    def shutdown(self):
+        """Stop any run and wait for its thread (window closing)."""
+        if self.is_running():
+            self.stop_program()
+            self.runner.wait()
+        process = self.dry_run_process
+        if process is not None:
+            process.kill()
+            process.waitForFinished()
+
+    def flush_run_events(self):
+        batch = self.runner.events.flush() if self.runner is not None else None
+        if batch is not None:
+            self.blockly_bridge.runEvents.emit(json.dumps(batch, default=str))
+
+    def on_run_state_changed(self, state: str):
+        if state in ("stopped", "finished", "failed"):
+            # The last batch goes out before the final state
+            self.event_timer.stop()
+            self.flush_run_events()
+        if state == "stopped":
+            print("[Blockly] ⏹️ Program stopped.")
+        elif state == "finished":
+            print("[Blockly] ✅ Program finished.")
+        self.blockly_bridge.runStateChanged.emit(state)
+
+    # -------------------------
+    # Dry run
+    # -------------------------
+    def dry_run_program(self, program_json: str):
+        """
+        Predict the program's cycle time without moving the robot: run_blockly.py
+        --dry-run plays it on the simulator in virtual time (blockly_dryrun.py),
+        from the current speed and, when telemetry has it, the current pose.
+        """
+        try:
+            steps = json.loads(program_json)
+        except json.JSONDecodeError as exc:
+            print(f"Failed to parse Blockly program: {exc}")
             return
 
-        runtime["variables"][name] = value
-        print(f"{context_label}: 📝 {name} = {value}")
-
-    def apply_blockly_print(self, message, context_label):
-        if message is None:
-            message = ""
-        print(f"{context_label}: 🗒️ {message}")
-
-    def apply_blockly_repeat(self, count, body, runtime, context_label):
-        if count is None:
-            print(f"{context_label}: ⚠️ Loop count is undefined; skipping.")
+        if not steps:
+            print("Blockly program is empty.")
             return
 
+        if self.dry_run_process is not None:
+            print("[Blockly] ⚠️ A dry run is already in progress.")
+            return
+
+        self.dry_run_dir = tempfile.mkdtemp(prefix="blockly_dry_run_")
+        program_path = os.path.join(self.dry_run_dir, "program.json")
+        with open(program_path, "w", encoding="utf-8") as handle:
+            json.dump(steps, handle)
+
+        _, _, robot_name = self.session.get_robot_config()
+        args = [RUN_BLOCKLY, program_path, "--dry-run", "--quiet",
+                "--speed", str(self.session.get_speed()), "--name", robot_name,
+                "--report", os.path.join(self.dry_run_dir, "report.json")]
+        state = self.session.latest_state()
+        if state is not None:
+            args += ["--start-joints", ",".join(map(str, state.joints)),
+                     "--start-cart", ",".join(map(str, state.cart))]
+
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("PYTHONIOENCODING", "utf-8")   # the report prints emojis; Windows consoles default to cp1252
+        process.setProcessEnvironment(env)
+        process.finished.connect(self.on_dry_run_finished)
+        self.dry_run_process = process
+        print("[Blockly] 🧪 Dry run started...")
+        self.blockly_bridge.runStateChanged.emit("simulating")
+        process.start(sys.executable, args)
+
+    def on_dry_run_finished(self, exit_code: int, _exit_status):
+        process, self.dry_run_process = self.dry_run_process, None
+        output = bytes(process.readAllStandardOutput()).decode("utf-8", errors="replace").rstrip()
+        if output:
+            print(output)
+        report_path = os.path.join(self.dry_run_dir, "report.json")
         try:
-            iterations = max(0, int(float(count)))
-        except (TypeError, ValueError):
-            print(f"{context_label}: ⚠️ Invalid loop count '{count}'.")
+            with open(report_path, encoding="utf-8") as handle:
+                report = json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"[Blockly] ❌ Dry run failed (exit code {exit_code}): {exc}")
+            self.blockly_bridge.runStateChanged.emit("failed")
+            return
+        finally:
+            shutil.rmtree(self.dry_run_dir, ignore_errors=True)
+            self.dry_run_dir = None
+            process.deleteLater()
+
+        # Export Profile saves the whole report; the editor only needs the totals
+        self.last_profile = report
+        summary = {key: value for key, value in report.items() if key != "timeline"}
+        self.blockly_bridge.dryRunReady.emit(json.dumps(summary))
+
+    # -------------------------
+    # Profiling
+    # -------------------------
+    def on_profile_ready(self, summary: dict):
+        self.last_profile = summary
+        slowest = ", ".join(f"{row['label']} {row['wall']:.2f} s" for row in summary["blocks"][:3])
+        print(f"[Blockly] ⏱️ Run took {summary['total']:.2f} s "
+              f"({summary['controller_wait']:.2f} s waiting on the controller). Slowest: {slowest}")
+        self.blockly_bridge.profileReady.emit(json.dumps(summary))
+
+    def export_profile(self):
+        if self.last_profile is None:
+            print("[Blockly] ⚠️ No profile yet; run a program first.")
             return
 
-        if iterations <= 0:
-            print(f"{context_label}: ℹ️ Loop count is {iterations}; nothing to execute.")
+        path, _ = QFileDialog.getSaveFileName(
+            self.app,
+            "Export Blockly Profile",
+            "",
+            "Profile JSON (*.json);;All Files (*)",
+        )
+        if not path:
+            print("[Blockly] Export canceled.")
             return
 
-        if not body:
-            print(f"{context_label}: ℹ️ Loop body is empty.")
-            return
+        final_path = path if path.lower().endswith(".json") else f"{path}.json"
+        try:
+            with open(final_path, "w", encoding="utf-8") as handle:
+                json.dump(self.last_profile, handle, indent=2)
+            print(f"[Blockly] ✅ Profile exported to {final_path}")
+        except Exception as exc:
+            print(f"[Blockly] ❌ Failed to export profile: {exc}")
 
-        for loop_index in range(iterations):
-            loop_label = f"{context_label} ▶ iteration {loop_index + 1}/{iterations}"
-            print(f"🔁 {loop_label}")
-            self.run_blockly_steps(body, runtime, context_label=loop_label)
+    def handle_blockly_save(self, program_state_json: str):
+        path, _ = QFileDialog.getSaveFileName(
+            self.app,
+            "Save Blockly Script",
+            "",
+            "Blockly JSON (*.json);;All Files (*)",
+        )
 
-    def apply_blockly_if_variable(self, name, operator, value_expr, runtime, context_label, true_branch, false_branch):
-        if not name:
-            print(f"{context_label}: ⚠️ Variable name is empty in compare block.")
+        if not path:
+            print("[Blockly] Save canceled.")
             return
 
-        true_branch = true_branch or []
-        false_branch = false_branch or []
-
-        variable_defined = name in runtime["variables"]
-        current_value = runtime["variables"].get(name)
-        expected_value = self.resolve_value(value_expr, runtime)
-
-        if not variable_defined:
-            print(f"{context_label}: ⚠️ Variable '{name}' is undefined.")
-
-        if expected_value is None and operator not in {"NEQ"}:
-            print(f"{context_label}: ⚠️ Comparison value is undefined.")
-            return
+        final_path = path if path.lower().endswith(".json") else f"{path}.json"
 
-        result = self.compare_values(current_value, expected_value, operator)
-        branch = true_branch if result else false_branch
+        try:
+            with open(final_path, "w", encoding="utf-8") as handle:
+                handle.write(program_state_json)
+            print(f"[Blockly] ✅ Script saved to {final_path}")
+        except Exception as exc:
+            print(f"[Blockly] ❌ Failed to save script: {exc}")
 
-        symbol_map = {"EQ": "=", "NEQ": "≠", "LT": "<", "LTE": "≤", "GT": ">", "GTE": "≥"}
-        branch_label = f"{context_label} {'TRUE' if result else 'FALSE'}"
-        print(
-            f"{context_label}: compare {current_value} {symbol_map.get(operator, operator)} {expected_value} -> {result}"
+    def handle_blockly_export(self, program_json: str):
+        """Save the steps the Run button would send, for run_blockly.py."""
+        path, _ = QFileDialog.getSaveFileName(
+            self.app,
+            "Export Blockly Program",
+            "",
+            "Program JSON (*.json);;All Files (*)",
         )
-        if not branch:
-            print(f"{branch_label}: ℹ️ Branch is empty.")
-            return
 
-        print(f"➡️ {branch_label}: executing {len(branch)} step(s)")
-        self.run_blockly_steps(branch, runtime, context_label=branch_label)
-
-    def apply_blockly_get_coordinates(self, mode, store, runtime, context_label):
-        if not self.app.connected:
-            print(f"{context_label}: ❌ Cannot read coordinates; robot not connected.")
+        if not path:
+            print("[Blockly] Export canceled.")
             return
 
-        mode_lower = (mode or "joint").lower()
-        _, _, robot_name = self.app.get_robot_config()
+        final_path = path if path.lower().endswith(".json") else f"{path}.json"
 
         try:
-            if mode_lower == "joint":
-                coords = functions.get_current_position(robot_name, coord=0)
-            else:
-                coord_map = {"tool": 0, "origin": 1, "base": 2}
-                coord_val = coord_map.get(mode_lower, 0)
-                functions.set_current_coord(coord_val, robot_name)
-                coords = functions.get_current_position(robot_name, coord=coord_val)
+            with open(final_path, "w", encoding="utf-8") as handle:
+                json.dump(json.loads(program_json), handle, indent=2)
+            print(f"[Blockly] ✅ Program exported to {final_path} (run it with run_blockly.py)")
         except Exception as exc:
-            print(f"{context_label}: ⚠️ Failed to read coordinates: {exc}")
-            return
-
-        coords_list = list(coords)
-        if store:
-            runtime["variables"][store] = coords_list
-            print(f"{context_label}: 📥 stored {mode_lower} coordinates in '{store}' => {coords_list}")
-        else:
-            print(f"{context_label}: 📍 {mode_lower} coordinates => {coords_list}")
-
-    @staticmethod
-    def compare_values(left, right, operator):
-        def try_float(value):
-            try:
-                return True, float(value)
-            except (TypeError, ValueError):
-                return False, None
-
-        numeric_left, left_num = try_float(left)
-        numeric_right, right_num = try_float(right)
-
-        if numeric_left and numeric_right:
-            a, b = left_num, right_num
-        else:
-            a = "" if left is None else str(left)
-            b = "" if right is None else str(right)
-
-        if operator == "EQ":
-            return a == b
-        if operator == "NEQ":
-            return a != b
-        if operator == "LT":
-            return a < b
-        if operator == "LTE":
-            return a <= b
-        if operator == "GT":
-            return a > b
-        if operator == "GTE":
-            return a >= b
-        print(f"⚠️ Unsupported operator '{operator}'")
-        return False
+            print(f"[Blockly] ❌ Failed to export program: {exc}")
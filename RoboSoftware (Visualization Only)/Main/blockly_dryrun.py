@@ -0,0 +1,231 @@
+"""
+Dry run: predict a Blockly program's cycle time without touching the robot.
+
+The program runs through the usual BlocklyHost, against the simulator
+(sim_backend) on a clock.VirtualClock(rate=None).  Moves get the simulator's
+trapezoidal timing at the vel the blocks send (the speed from set_speed),
+delay blocks jump the clock forward instead of sleeping, and nothing waits
+on the wall clock, so hours of repeat loops take seconds.
+
+The modelled controller has no motion buffer by default, like libnrc_host
+(nrc_lib.h defines none): a move is sent only once the previous one has
+ended, so background moves overlap the blocks after them but not each
+other.  motion_buffer=1 (--motion-buffer 1) predicts the cycle for a
+controller that holds one move behind the running one; that model is the
+simulator's, not a measured controller's.  Anything the controller
+refuses, and every other ❌/⚠️ message, is listed in the report's problems.
+
+functions has one backend per process and dry_run() takes it over, so it
+belongs in a process of its own: run_blockly.py --dry-run, which is what the
+editor's Dry Run button starts.
+
+    report = dry_run(prepare_program(steps), speed=30)
+    report["total"], report["blocks"], report["timeline"]
+"""
+import contextlib
+import math
+import time
+
+import functions
+import sim_backend
+from blockly_host import BlocklyHost, run_program
+from blockly_runtime import CALL, STORE, RunControl
+from clock import VirtualClock
+from robot_session import DirectRobotSession
+
+TIMELINE_LIMIT = 20000   # timeline entries kept; the per-block totals always cover the whole run
+PROBLEM_LIMIT = 20       # ❌/⚠️ lines kept in the report
+
+
+class DryRunRecorder:
+    """
+    Virtual-time bookkeeping for one dry run.
+
+    step(pc) is the Executor's progress callback, called before every
+    instruction: the virtual time since the previous call is charged to the
+    previous instruction.  motion_added(start, end) notes a move the running
+    instruction added to the simulator's schedule.
+    """
+
+    def __init__(self, program, clock):
+        count = len(program.instructions)
+        self.program = program
+        self.clock = clock
+        self.start = clock.now()
+        self.time = [0.0] * count
+        self.runs = [0] * count
+        self.motion = [0.0] * count
+        self.timeline = []
+        self.truncated = False
+        self.pc = 0
+        self.entry = None     # timeline entry of the running instruction, if it has one
+        self.last = self.start
+
+    def step(self, pc: int):
+        now = self.clock.now()
+        self._close(now)
+        self.pc = pc
+        self.last = now
+        if pc >= len(self.program.instructions):
+            return
+        self.runs[pc] += 1
+        ins = self.program.instructions[pc]
+        if ins.op not in (CALL, STORE):
+            return
+        if len(self.timeline) >= TIMELINE_LIMIT:
+            self.truncated = True
+            return
+        self.entry = {"id": ins.block, "label": ins.label, "start": now - self.start, "end": now - self.start}
+        self.timeline.append(self.entry)
+
+    def motion_added(self, start: float, end: float):
+        self.motion[self.pc] += end - start
+        if self.entry is not None:
+            self.entry["motion"] = [start - self.start, end - self.start]
+
+    def finish(self):
+        self._close(self.clock.now())
+
+    def _close(self, now: float):
+        if self.pc < len(self.time):
+            self.time[self.pc] += now - self.last
+        if self.entry is not None:
+            self.entry["end"] = now - self.start
+            self.entry = None
+
+    def blocks(self) -> list:
+        """Per-block totals, most expensive first (program time plus motion time)."""
+        rows = {}
+        for pc, ins in enumerate(self.program.instructions):
+            key = ins.block or ins.label
+            row = rows.get(key)
+            if row is None:
+                # A block's first instruction (LOOP for a repeat) counts how often the block ran
+                row = rows[key] = {"id": ins.block, "label": ins.label, "wall": 0.0,
+                                   "calls": self.runs[pc], "motion": 0.0}
+            row["wall"] += self.time[pc]
+            row["motion"] += self.motion[pc]
+        return sorted((row for row in rows.values() if row["calls"]),
+                      key=lambda row: row["wall"] + row["motion"], reverse=True)
+
+
+class DryRunSession(DirectRobotSession):
+    """DirectRobotSession on the simulator that tells the recorder about every move a call schedules."""
+
+    def __init__(self, name: str, speed: int, recorder: DryRunRecorder):
+        super().__init__("sim", "0", name, speed)
+        self.recorder = recorder
+
+    def call(self, func, *args, **kwargs):
+        robot = sim_backend.robot
+        before = robot.idle_at()
+        try:
+            return super().call(func, *args, **kwargs)
+        finally:
+            after = robot.idle_at()
+            if before < after < math.inf:
+                self.recorder.motion_added(max(before, robot.clock.now()), after)
+
+
+class _ProblemLog:
+    """stdout during a dry run: keeps the first ❌/⚠️ lines with virtual time and block, drops the chatter."""
+
+    def __init__(self, recorder: DryRunRecorder):
+        self.recorder = recorder
+        self.lines = []
+        self.count = 0
+        self._partial = ""
+
+    def write(self, text: str) -> int:
+        self._partial += text
+        *lines, self._partial = self._partial.split("\n")
+        for line in lines:
+            if "❌" in line or "⚠️" in line:
+                self.count += 1
+                if len(self.lines) < PROBLEM_LIMIT:
+                    self.lines.append(self._where() + line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def _where(self) -> str:
+        recorder = self.recorder
+        code = recorder.program.instructions
+        label = code[recorder.pc].label if recorder.pc < len(code) else ""
+        return f"{recorder.clock.now() - recorder.start:8.2f} s  {label}  "
+
+
+def dry_run(program, speed: int = 30, name: str = "MyRobot", connect: bool = True,
+            joints=None, cart=None, motion_buffer: int = 0) -> dict:
+    """
+    Run program on a fresh simulated robot in virtual time and return the report:
+    total (cycle time: until the last move has finished), program_time, motion_time,
+    blocks (per-block totals, BlockProfile.summary()-like, plus motion seconds),
+    timeline (one entry per executed action block), problems and state.
+    connect=True starts connected with the servo unlocked, as a run from a ready
+    robot would; joints/cart set the starting pose (default: the simulator's).
+    motion_buffer: motion commands the modelled controller holds behind the
+    running move (0: none, as libnrc_host).
+    """
+    clock = VirtualClock(rate=None)
+    robot = functions.use_simulator(clock, motion_buffer=motion_buffer)
+    if joints is not None:
+        robot.joints[:len(joints)] = [float(value) for value in joints]
+    if cart is not None:
+        robot.cart[:len(cart)] = [float(value) for value in cart]
+
+    recorder = DryRunRecorder(program, clock)
+    session = DryRunSession(name, speed, recorder)
+    control = RunControl()
+
+    def virtual_sleep(seconds: float):
+        clock.sleep(seconds)
+        control.checkpoint()
+
+    host = BlocklyHost(session, control, sleep=virtual_sleep)
+    log = _ProblemLog(recorder)
+    began = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        if connect and session.connect():
+            session.set_servo_locked(False)
+        recorder.start = recorder.last = clock.now()
+        state, _ = run_program(program, host, progress=recorder.step, trace=False, progress_interval=0.0)
+        recorder.finish()
+        program_time = clock.now() - recorder.start
+        idle = robot.idle_at()
+    end = max(clock.now(), idle if idle < math.inf else clock.now())
+
+    return {
+        "dry_run": True,
+        "state": state,
+        "total": end - recorder.start,
+        "program_time": program_time,
+        "motion_time": sum(recorder.motion),
+        "speed": speed,
+        "motion_buffer": motion_buffer,
+        "blocks": recorder.blocks(),
+        "timeline": recorder.timeline,
+        "timeline_truncated": recorder.truncated,
+        "problems": log.lines,
+        "problem_count": log.count,
+        "instructions": sum(recorder.runs),
+        "elapsed": time.perf_counter() - began,
+    }
+
+
+def format_report(report: dict) -> str:
+    """A few lines for the console."""
+    lines = [f"[Blockly] 🧪 Dry run {report['state']}: cycle time {report['total']:.2f} s "
+             f"({report['motion_time']:.2f} s of motion, {report['instructions']} blocks run, "
+             f"simulated in {report['elapsed']:.2f} s)"]
+    slowest = ", ".join(f"{row['label']} {row['wall'] + row['motion']:.2f} s" for row in report["blocks"][:3])
+    if slowest:
+        lines.append(f"[Blockly] Slowest: {slowest}")
+    if report["problem_count"]:
+        lines.append(f"[Blockly] ⚠️ {report['problem_count']} problem(s) in the dry run:")
+        lines.extend(report["problems"])
+        hidden = report["problem_count"] - len(report["problems"])
+        if hidden > 0:
+            lines.append(f"... and {hidden} more")
+    return "\n".join(lines)
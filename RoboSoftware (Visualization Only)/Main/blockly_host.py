@@ -0,0 +1,513 @@
+"""
+The Blockly blocks' robot actions, independent of the GUI.
+
+The Executor (blockly_runtime) calls one apply_blockly_* method per action
+block; BlocklyHost implements them against a RobotSession (robot_session.py),
+so the same code runs behind the editor and in run_blockly.py.  One host is
+made per run and carries that run's RunControl (for the delay block) and
+BlockProfile (controller wait is charged to the running block), and
+optionally RunEvents: every ❌/⚠️ message also becomes an error event for
+the block that caused it.  A dry run (blockly_dryrun.py) passes its own
+sleep so delays advance a virtual clock.
+
+Every move goes through the host's motion.MotionTracker, which returns a
+motion handle and waits for a move when its block asks to (or for a
+wait_motion / wait_all_motions block).  Unless the controller buffers
+motion commands (functions.motion_buffer()), a move is only sent once the
+robot is idle, so a background move is never cut short by the next one.
+A move made while another in the same space is still in flight starts
+from that move's target rather than from a position read mid-motion.
+
+    program = prepare_program(steps)
+    state, _ = run_program(program, BlocklyHost(session))
+"""
+import time
+
+import functions
+from blockly_runtime import LINEAR_AXES, PROGRESS_INTERVAL, Executor, RunControl, compile_program, optimize
+from motion import MotionTracker, ProgramStopped
+from motion_profile import move_profile
+
+MOVE_ACC = 30   # acc/dec of every Blockly move, as a percentage
+HOME_SPEED = 60
+
+
+def prepare_program(steps, verbose: bool = False):
+    """Compile and optimize the web view's steps; verbose prints every optimizer rewrite."""
+    # Lowered once; loops then run the flat instruction list
+    compiled = compile_program(steps)
+    program = optimize(compiled, log=print if verbose else None)
+    if len(program.instructions) != len(compiled.instructions):
+        print(f"[Blockly] ⚙️ Optimized {len(compiled.instructions)} -> "
+              f"{len(program.instructions)} instructions")
+    return program
+
+
+def run_program(program, host, progress=None, trace: bool = True, progress_interval: float = PROGRESS_INTERVAL):
+    """
+    Run program on host (its control, profile and events included) until it ends.
+    Returns (state, pc): "finished", "stopped" or "failed", and where it ended.
+    """
+    executor = Executor(program, host, trace=trace, control=host.control, progress=progress,
+                        progress_interval=progress_interval, profile=host.profile, events=host.events)
+    try:
+        executor.run()
+    except ProgramStopped:
+        return "stopped", executor.pc
+    except Exception as exc:
+        print(f"[Blockly] ❌ Program failed: {exc}")
+        if host.events is not None:
+            host.events.error(f"Program failed: {exc}", executor.pc)
+        return "failed", executor.pc
+    return "finished", executor.pc
+
+
+class BlocklyHost:
+    """Robot actions for one Blockly run."""
+
+    def __init__(self, session, control: RunControl = None, profile=None, sleep=None, events=None):
+        self.session = session
+        self.control = control if control is not None else RunControl()
+        self.profile = profile
+        self.events = events
+        # The delay block's wait; defaults to the interruptible RunControl.sleep
+        self.sleep = sleep if sleep is not None else self.control.sleep
+        self.motions = MotionTracker(self._running_state, sleep=self.sleep)
+
+    def problem(self, message: str):
+        """Print a ❌/⚠️ message and report it as an error event of the running block."""
+        print(message)
+        if self.events is not None:
+            self.events.error(message)
+
+    def io_call(self, func, *args, **kwargs):
+        """session.call, with the wait charged to the running block as controller time."""
+        if self.profile is None:
+            return self.session.call(func, *args, **kwargs)
+        began = time.perf_counter()
+        try:
+            return self.session.call(func, *args, **kwargs)
+        finally:
+            self.profile.add_wait(time.perf_counter() - began)
+
+    def apply_blockly_connect_step(self, ip: str, port: str, name: str, context_label: str):
+        """Connect block: blank fields fall back to the current robot config."""
+        default_ip, default_port, default_name = self.session.get_robot_config()
+        ip = ip or default_ip
+        port = port or default_port
+        name = name or default_name
+        print(f"{context_label}: connect {name} at {ip}:{port}")
+        self.apply_blockly_connect(ip, port, name)
+
+    def apply_blockly_connect(self, ip: str, port: str, name: str):
+        self.session.update_robot_config(ip, port, name)
+
+        if self.session.connected:
+            print("Robot is already connected; skipping new connect request.")
+            return
+
+        self.session.connect()
+
+    def apply_blockly_servo(self, state: str):
+        if not self.session.connected:
+            self.problem("❌ Cannot change servo state: robot not connected.")
+            return
+
+        desired_lock = state != "unlock"
+        if self.session.set_servo_locked(desired_lock):
+            label = "LOCKED" if desired_lock else "UNLOCKED"
+            emoji = "🔒" if desired_lock else "🔓"
+            print(f"{emoji} Servo {label}")
+
+    def apply_blockly_disconnect(self):
+        if not self.session.connected:
+            print("Robot already disconnected.")
+            return
+        self.session.disconnect()
+
+    # -------------------------
+    # Motion
+    # -------------------------
+    def _running_state(self) -> int:
+        _, _, robot_name = self.session.get_robot_config()
+        return self.io_call(functions.get_robot_running_state, robot_name)
+
+    def _start_pose(self, space: str, robot_name: str, coord: int) -> list:
+        """
+        Where the next move in `space` ("joint", "cart0".."cart2") starts: the
+        target of the move still in flight there, else the current position
+        (read once any move in another space has finished).
+        """
+        target = self.motions.pending_target(space)
+        if target is not None:
+            return list(target)
+        self.motions.wait_all()
+        return self.io_call(functions.get_current_position, robot_name, coord=coord)
+
+    def _send_motion(self, func, space: str, start, target, vel, coord: int, robot_name: str, wait: bool) -> int:
+        """Send one move (robot_movej/robot_movel) through the tracker; returns its motion handle."""
+        expected = move_profile(start, target, vel, MOVE_ACC, MOVE_ACC, cartesian=space != "joint").duration
+        handle = self.motions.send(
+            lambda: self.io_call(func, target, vel=vel, coord=coord, acc=MOVE_ACC, dec=MOVE_ACC, robot_name=robot_name),
+            expected, space, target,
+        )
+        if wait:
+            self.motions.wait(handle)
+        return handle
+
+    def apply_blockly_wait_motion(self, handle, name: str):
+        if handle is None:
+            return   # the undefined variable was reported already
+        try:
+            motion = int(handle)
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ '{name}' holds {handle!r}, not a motion handle")
+            return
+
+        print(f"⏳ Waiting for motion {motion} ({name})...")
+        try:
+            self.motions.wait(motion)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Waiting for motion failed: {exc}")
+
+    def apply_blockly_wait_all_motions(self):
+        print("⏳ Waiting for all motions...")
+        try:
+            self.motions.wait_all()
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Waiting for motions failed: {exc}")
+
+    def apply_blockly_move_joint_absolute(self, joint, angle, wait: bool = False):
+        if not self.session.ensure_robot_ready(auto_unlock=True, source="blockly joint move"):
+            return
+
+        try:
+            joint_index = int(joint)
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ Invalid joint index '{joint}'")
+            return
+
+        if not 0 <= joint_index <= 5:
+            self.problem(f"⚠️ Joint index {joint_index} out of range (0-5)")
+            return
+
+        try:
+            target_angle = float(angle)
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ Invalid joint angle '{angle}'")
+            return
+
+        _, _, robot_name = self.session.get_robot_config()
+
+        try:
+            start = self._start_pose("joint", robot_name, 0)
+            joints = list(start)
+            joints[joint_index] = target_angle
+            handle = self._send_motion(functions.robot_movej, "joint", start, joints,
+                                       self.session.get_speed(), 0, robot_name, wait)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Absolute joint move failed: {exc}")
+            return
+        self.session.show_position()
+        if wait:
+            print(f"✅ Joint {joint_index + 1} moved to {target_angle}")
+        else:
+            print(f"▶️ Joint {joint_index + 1} moving to {target_angle} (motion {handle})")
+        return handle
+
+    def apply_blockly_move_linear_absolute(self, mode: str, coords: dict, wait: bool = False):
+        if not self.session.ensure_robot_ready(auto_unlock=True, source="blockly linear move"):
+            return
+
+        mode_key = (mode or "tool").lower()
+        coord_map = {"tool": 0, "origin": 1, "base": 2}
+        coord_val = coord_map.get(mode_key)
+        if coord_val is None:
+            self.problem(f"⚠️ Unsupported coordinate mode '{mode}'")
+            return
+
+        _, _, robot_name = self.session.get_robot_config()
+
+        try:
+            self.io_call(functions.set_current_coord, coord_val, robot_name)
+        except Exception as exc:
+            self.problem(f"⚠️ Failed to set coordinate mode '{mode}': {exc}")
+        self.session.coord_changed()
+
+        space = f"cart{coord_val}"
+        try:
+            start = self._start_pose(space, robot_name, coord_val)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Failed to read current position: {exc}")
+            return
+        current = list(start)
+
+        axis_map = {
+            "x": 2,
+            "y": 1,
+            "z": 0,
+            "rx": 3,
+            "ry": 4,
+            "rz": 5,
+        }
+
+        for key, idx in axis_map.items():
+            value = coords.get(key)
+            if value is None:
+                continue
+            try:
+                current[idx] = float(value)
+            except (TypeError, ValueError):
+                self.problem(f"⚠️ Invalid value for {key.upper()}: '{value}'")
+                return
+
+        # Ensure we have 7 elements for API expectations
+        while len(current) < 7:
+            current.append(0.0)
+
+        speed = max(1, int(self.session.get_speed()))
+
+        try:
+            handle = self._send_motion(functions.robot_movel, space, start, current, speed * 5, 1, robot_name, wait)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Linear absolute move failed: {exc}")
+            return
+        self.session.show_position()
+        print("✅ Linear absolute move executed" if wait else f"▶️ Linear absolute move started (motion {handle})")
+        return handle
+
+    def apply_blockly_speed(self, speed_value):
+        if speed_value is None:
+            self.problem("⚠️ Speed value is undefined; skipping.")
+            return
+
+        try:
+            speed_int = int(float(speed_value))
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ Invalid speed value '{speed_value}', skipping.")
+            return
+
+        clamped = max(0, min(100, speed_int))
+        self.session.set_speed(clamped)
+        print(f"Speed set to {clamped}")
+
+    def apply_blockly_jog_joint(self, joint, delta, wait: bool = False):
+        if not self.session.connected:
+            self.problem("❌ Cannot jog joint: robot not connected.")
+            return
+
+        if delta is None:
+            self.problem("⚠️ Joint jog delta is undefined.")
+            return
+
+        try:
+            joint_index = int(joint)
+            delta_val = float(delta)
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ Invalid joint jog parameters joint={joint}, delta={delta}")
+            return
+
+        if not 0 <= joint_index <= 5:
+            self.problem(f"⚠️ Joint index {joint_index} is out of range (0-5).")
+            return
+
+        if delta_val == 0:
+            self.problem("⚠️ Jog delta is zero; skipping joint move.")
+            return
+
+        _, _, robot_name = self.session.get_robot_config()
+        speed = self.session.get_speed()
+
+        try:
+            start = self._start_pose("joint", robot_name, 0)
+            target = list(start)
+            target[joint_index] += delta_val
+            handle = self._send_motion(functions.robot_movej, "joint", start, target, speed, 0, robot_name, wait)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Joint jog failed: {exc}")
+            return
+        self.session.show_position()
+        if wait:
+            print(f"✅ Joint {joint_index + 1} moved by {delta_val}")
+        else:
+            print(f"▶️ Joint {joint_index + 1} moving by {delta_val} (motion {handle})")
+        return handle
+
+    def apply_blockly_jog_linear(self, axis, delta, wait: bool = False):
+        if not self.session.connected:
+            self.problem("❌ Cannot jog axis: robot not connected.")
+            return
+
+        if delta is None:
+            self.problem("⚠️ Linear jog delta is undefined.")
+            return
+
+        axis_index = LINEAR_AXES.get(str(axis).lower())
+        if axis_index is None:
+            self.problem(f"⚠️ Invalid axis '{axis}'")
+            return
+
+        try:
+            delta_val = float(delta)
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ Invalid linear jog delta '{delta}'")
+            return
+
+        if delta_val == 0:
+            self.problem("⚠️ Jog delta is zero; skipping linear move.")
+            return
+
+        _, _, robot_name = self.session.get_robot_config()
+        speed = self.session.get_speed()
+
+        try:
+            start = self._start_pose("cart1", robot_name, 1)
+            target = list(start)
+            target[axis_index] += delta_val
+            handle = self._send_motion(functions.robot_movel, "cart1", start, target, speed * 5, 1, robot_name, wait)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Linear jog failed: {exc}")
+            return
+        self.session.show_position()
+        axis_name = "XYZ"[axis_index]
+        if wait:
+            print(f"✅ Axis {axis_name} moved by {delta_val}")
+        else:
+            print(f"▶️ Axis {axis_name} moving by {delta_val} (motion {handle})")
+        return handle
+
+    def apply_blockly_jog_sequence(self, kind: str, moves, wait: bool = False):
+        """Jogs folded by the optimizer: (index, delta) moves sent after one position read; waits after the last."""
+        if not self.session.connected:
+            self.problem(f"❌ Cannot jog {kind}: robot not connected.")
+            return
+
+        _, _, robot_name = self.session.get_robot_config()
+        speed = self.session.get_speed()
+        if kind == "joint":
+            func, space, coord, vel = functions.robot_movej, "joint", 0, speed
+        else:
+            func, space, coord, vel = functions.robot_movel, "cart1", 1, speed * 5
+
+        try:
+            start = self._start_pose(space, robot_name, coord)
+            handle = None
+            for index, delta in moves:
+                target = list(start)
+                target[index] += delta
+                # The tracker holds each move back until the previous one has ended (or is buffered)
+                handle = self._send_motion(func, space, start, target, vel, coord, robot_name, False)
+                start = target
+            if wait:
+                self.motions.wait(handle)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Jog sequence failed: {exc}")
+            return
+        self.session.show_position()
+        print(f"✅ {len(moves)} {kind} jogs done" if wait else f"▶️ {len(moves)} {kind} jogs sent (motion {handle})")
+        return handle
+
+    def apply_blockly_home(self, use_library_home: bool, wait: bool = False):
+        if not self.session.connected:
+            self.problem("❌ Cannot move home: robot not connected.")
+            return
+        if not self.session.ensure_robot_ready(source="go home"):
+            return
+
+        _, _, robot_name = self.session.get_robot_config()
+        try:
+            if use_library_home:
+                # Where the library home is, and how long it takes, is up to the controller
+                handle = self.motions.send(lambda: self.io_call(functions.robot_go_home, robot_name))
+            else:
+                start = self._start_pose("joint", robot_name, 0)
+                handle = self._send_motion(functions.robot_movej, "joint", start, [0.0] * 7,
+                                           HOME_SPEED, 0, robot_name, False)
+            if wait:
+                self.motions.wait(handle)
+        except ProgramStopped:
+            raise
+        except Exception as exc:
+            self.problem(f"❌ Failed to move to home: {exc}")
+            return
+        self.session.show_position()
+        where = "using library function" if use_library_home else "(all-zero joints)"
+        print(f"✅ Robot moved to home {where}" if wait else f"▶️ Robot moving home {where} (motion {handle})")
+        return handle
+
+    def apply_blockly_delay(self, duration):
+        if duration is None:
+            self.problem("⚠️ Delay duration is undefined.")
+            return
+
+        try:
+            seconds = max(0.0, float(duration))
+        except (TypeError, ValueError):
+            self.problem(f"⚠️ Invalid delay duration '{duration}'")
+            return
+
+        print(f"⏳ Waiting for {seconds} seconds...")
+        self.sleep(seconds)
+
+    def apply_blockly_condition(self, condition_type: str, expected: bool) -> bool:
+        if condition_type == "is_connected":
+            return (self.session.connected is True) == expected
+        return (self.session.servo_locked is True) == expected
+
+    def apply_blockly_print(self, message, context_label):
+        if message is None:
+            message = ""
+        print(f"{context_label}: 🗒️ {message}")
+
+    def apply_blockly_get_coordinates(self, mode, store, context_label):
+        """Reads coordinates; the result is stored in the block's variable by the runtime."""
+        if not self.session.connected:
+            self.problem(f"{context_label}: ❌ Cannot read coordinates; robot not connected.")
+            return None
+
+        mode_lower = (mode or "joint").lower()
+        _, _, robot_name = self.session.get_robot_config()
+
+        coord_map = {"tool": 0, "origin": 1, "base": 2}
+        coord_val = coord_map.get(mode_lower, 0)
+
+        # Prefer the shared telemetry snapshot over another controller round-trip
+        state = self.session.latest_state()
+        if state is not None and mode_lower == "joint":
+            coords = state.joints
+        elif state is not None and state.coord == coord_val:
+            coords = state.cart
+        else:
+            try:
+                if mode_lower == "joint":
+                    coords = self.io_call(functions.get_current_position, robot_name, coord=0)
+                else:
+                    self.io_call(functions.set_current_coord, coord_val, robot_name)
+                    self.session.coord_changed()
+                    coords = self.io_call(functions.get_current_position, robot_name, coord=coord_val)
+            except Exception as exc:
+                self.problem(f"{context_label}: ⚠️ Failed to read coordinates: {exc}")
+                return None
+
+        coords_list = list(coords)
+        if store:
+            print(f"{context_label}: 📥 stored {mode_lower} coordinates in '{store}' => {coords_list}")
+        else:
+            print(f"{context_label}: 📍 {mode_lower} coordinates => {coords_list}")
+        return coords_list
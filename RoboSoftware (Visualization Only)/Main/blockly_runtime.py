@@ -0,0 +1,967 @@
+"""
+Blockly programs lowered once into a flat instruction list.
+
+compile_program(steps) walks the JSON step tree sent by the web view a single
+time: literal expressions are resolved to constants, variable names become
+slot indices, and repeat/if blocks become jumps.  Executor then runs the list
+with a program counter, so a block inside a nested loop costs an index, a
+tuple unpack and a call instead of a dict lookup chain and a re-parse.
+
+Robot actions go to a host object (BlocklyManager in the GUI).  Each action
+instruction names the host method it calls; the methods are looked up once
+per Executor, not per block:
+
+    program = optimize(compile_program(json.loads(program_json)))
+    Executor(program, host).run()
+
+Motion blocks either wait for their move or, with "wait": false, return at
+once; a background move can keep a motion handle in a variable for a later
+wait_motion block (wait_all_motions waits for every move sent).  The host
+tracks the moves in flight (motion.MotionTracker).
+
+optimize() is a peephole pass over the compiled list that folds runs of jog
+blocks with constant deltas, so they cost one position read instead of one
+per block.  A BlockProfile handed to the Executor collects per-block wall
+time (sampled from its own thread), run counts and controller wait for the
+editor's heatmap, and RunEvents lets the editor follow a run (blocks started
+and finished, variables, errors) in batches flushed at a capped rate.
+
+A RunControl passed to the Executor lets another thread stop or pause the
+run.  The executor only reads one attribute per instruction; the slow path
+(raise ProgramStopped, or block until resumed) is taken between blocks, so a
+stop lands within one block of being requested.
+
+No Qt in here, so programs can be compiled, run against a stand-in host and
+benchmarked without a display.
+"""
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from motion import ProgramStopped
+
+# Opcodes
+CALL = 0     # func(*args)
+SET = 1      # slots[target] = args[0]
+STORE = 2    # slots[target] = func(*args) unless it returned None (same checks and trace as CALL)
+BRANCH = 3   # func(*args): True -> next, False -> target, None -> end
+JUMP = 4     # pc = target
+LOOP = 5     # start loop `end` with args[0] iterations; 0 or invalid -> target (exit)
+NEXT = 6     # another iteration of loop `end` -> target (body start)
+LOG = 7      # log(text)
+
+OPCODE_NAMES = ("CALL", "SET", "STORE", "BRANCH", "JUMP", "LOOP", "NEXT", "LOG")
+
+LINEAR_AXES = {"0": 0, "1": 1, "2": 2, "x": 0, "y": 1, "z": 2}
+JOG_KINDS = {"apply_blockly_jog_joint": "joint", "apply_blockly_jog_linear": "linear"}
+ZERO_DELTA = 1e-9           # folded jogs that sum to less than this cancel out
+
+PROGRESS_INTERVAL = 0.1   # seconds between progress callbacks while running
+EVENT_FLUSH_INTERVAL = 0.05   # seconds between RunEvents batches to the editor (20 Hz)
+PROFILE_INTERVAL = 0.02       # seconds between BlockProfile samples of the running instruction
+
+COMPARE_SYMBOLS = {"EQ": "=", "NEQ": "≠", "LT": "<", "LTE": "≤", "GT": ">", "GTE": "≥"}
+
+
+class Instruction(NamedTuple):
+    op: int
+    func: object = None   # host method name (str), or a plain callable
+    args: tuple = ()      # operand getters: getter(slots) -> value
+    target: int = -1      # jump target or variable slot
+    end: int = -1         # BRANCH: end of the whole if; LOOP/NEXT: loop index
+    text: str = ""        # trace message, str.format()-ed with the operand values
+    label: str = ""       # "[Blockly] Step 3 ▶ Step 1", for warnings
+    block: str = None     # Blockly block id, when the web view sends one
+    required: tuple = ()  # operand indexes that must not be None
+    missing: str = ""     # warning when a required operand is None
+
+
+class Program(NamedTuple):
+    instructions: list
+    variables: list       # slot index -> variable name
+    loops: int            # number of loop counters
+
+
+# -------------------------
+# Values
+# -------------------------
+def literal_value(expr: dict, expected_type=None):
+    """A literal expression converted to expected_type ("number", "int", "string", "boolean")."""
+    value_type = expr.get("valueType")
+    value = expr.get("value")
+    if value_type == "number":
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if expected_type == "int":
+            return int(number)
+        if expected_type == "string":
+            return str(number)
+        if expected_type == "boolean":
+            return bool(number)
+        return number
+    if value_type == "boolean":
+        boolean_value = bool(value)
+        if expected_type == "string":
+            return "True" if boolean_value else "False"
+        if expected_type == "number":
+            return 1.0 if boolean_value else 0.0
+        return boolean_value
+    if value_type == "string" or value_type is None:
+        string_value = "" if value is None else str(value)
+        if expected_type == "number":
+            try:
+                return float(string_value)
+            except ValueError:
+                return None
+        if expected_type == "boolean":
+            return string_value.lower() in {"true", "1", "yes"}
+        return string_value
+    return value
+
+
+def coerce(value, expected_type=None):
+    """A variable's current value converted to expected_type (None if it can't be)."""
+    if expected_type == "number":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if expected_type == "int":
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+    if expected_type == "string":
+        return str(value)
+    if expected_type == "boolean":
+        return bool(value)
+    return value
+
+
+def compare_values(left, right, operator):
+    def try_float(value):
+        try:
+            return True, float(value)
+        except (TypeError, ValueError):
+            return False, None
+
+    numeric_left, left_num = try_float(left)
+    numeric_right, right_num = try_float(right)
+
+    if numeric_left and numeric_right:
+        a, b = left_num, right_num
+    else:
+        a = "" if left is None else str(left)
+        b = "" if right is None else str(right)
+
+    if operator == "EQ":
+        return a == b
+    if operator == "NEQ":
+        return a != b
+    if operator == "LT":
+        return a < b
+    if operator == "LTE":
+        return a <= b
+    if operator == "GT":
+        return a > b
+    if operator == "GTE":
+        return a >= b
+    print(f"⚠️ Unsupported operator '{operator}'")
+    return False
+
+
+def loop_iterations(count):
+    """Iteration count of a repeat block, or None if count is not a number."""
+    if count is None:
+        return None
+    try:
+        return max(0, int(float(count)))
+    except (TypeError, ValueError):
+        return None
+
+
+def _constant(value):
+    def get(slots):
+        return value
+    get.value = value  # lets later passes see through constants
+    return get
+
+
+def _variable(slot, name, expected_type):
+    def load(slots):
+        value = slots[slot]
+        if value is None:
+            print(f"⚠️ Variable '{name}' is undefined.")
+            return None
+        return coerce(value, expected_type) if expected_type else value
+    return load
+
+
+def _compare(operator):
+    def test(current, expected):
+        if expected is None and operator != "NEQ":
+            return None  # undefined comparison value: run neither branch
+        return compare_values(current, expected, operator)
+    return test
+
+
+def _optional(slot, name):
+    # The variable under test in a compare block: undefined is a warning, not an error
+    def load(slots):
+        value = slots[slot]
+        if value is None:
+            print(f"⚠️ Variable '{name}' is undefined.")
+        return value
+    return load
+
+
+# -------------------------
+# Compiler
+# -------------------------
+class _Compiler:
+    def __init__(self):
+        self.code = []
+        self.slots = {}
+        self.loops = 0
+
+    def slot(self, name: str) -> int:
+        return self.slots.setdefault(name, len(self.slots))
+
+    def operand(self, expr, expected_type=None):
+        """Getter for an expression; literals are converted now, once."""
+        if expr is None:
+            return _constant(None)
+        kind = expr.get("kind")
+        if kind == "literal":
+            return _constant(literal_value(expr, expected_type))
+        if kind == "variable":
+            name = (expr.get("name") or "").strip()
+            if not name:
+                print("⚠️ Variable reference missing name.")
+                return _constant(None)
+            return _variable(self.slot(name), name, expected_type)
+        print(f"⚠️ Unsupported value expression {expr}")
+        return _constant(None)
+
+    def emit(self, op, **fields) -> int:
+        self.code.append(Instruction(op, **fields))
+        return len(self.code) - 1
+
+    def patch(self, index: int, **fields):
+        self.code[index] = self.code[index]._replace(**fields)
+
+    def steps(self, steps, context):
+        for index, step in enumerate(steps, start=1):
+            self.step(step, f"{context} Step {index}")
+
+    def step(self, step, label):
+        action = step.get("type")
+        block = step.get("id")
+        common = {"label": label, "block": block}
+        number = "number"
+
+        if action == "connect_robot":
+            ip = (step.get("ip") or "").strip()
+            port = (step.get("port") or "").strip()
+            name = (step.get("name") or "").strip()
+            # Blank fields fall back to the robot config when the block runs
+            self.emit(CALL, func="apply_blockly_connect_step",
+                      args=(_constant(ip), _constant(port), _constant(name), _constant(label)), **common)
+        elif action == "disconnect_robot":
+            self.emit(CALL, func="apply_blockly_disconnect", text=f"{label}: disconnect robot", **common)
+        elif action == "set_servo_state":
+            state = step.get("state", "lock")
+            self.emit(CALL, func="apply_blockly_servo", args=(_constant(state),),
+                      text=f"{label}: set servo {{0}}", **common)
+        elif action == "set_speed":
+            self.emit(CALL, func="apply_blockly_speed", args=(self.operand(step.get("value"), number),),
+                      text=f"{label}: set speed to {{0}}", required=(0,),
+                      missing="Speed value is undefined; keeping the current speed.", **common)
+        elif action == "set_variable":
+            name = (step.get("name") or "").strip()
+            if not name:
+                self.emit(LOG, text=f"{label}: ⚠️ Variable name is empty; skipping assignment.", **common)
+                return
+            self.emit(SET, args=(self.operand(step.get("value")),), target=self.slot(name),
+                      text=f"{label}: 📝 {name} = {{0}}", **common)
+        elif action == "print":
+            self.emit(CALL, func="apply_blockly_print", args=(self.operand(step.get("message")), _constant(label)),
+                      **common)
+        elif action == "jog_joint":
+            joint = step.get("joint")
+            self.motion(step, "apply_blockly_jog_joint",
+                        (_constant(joint), self.operand(step.get("delta"), number)),
+                        text=f"{label}: jog joint {joint} by {{1}}", required=(1,),
+                        missing="Joint delta is undefined.", **common)
+        elif action == "jog_linear":
+            axis = step.get("axis")
+            self.motion(step, "apply_blockly_jog_linear",
+                        (_constant(axis), self.operand(step.get("delta"), number)),
+                        text=f"{label}: jog axis {axis} by {{1}}", required=(1,),
+                        missing="Linear delta is undefined.", **common)
+        elif action == "move_joint_absolute":
+            joint = step.get("joint")
+            self.motion(step, "apply_blockly_move_joint_absolute",
+                        (_constant(joint), self.operand(step.get("angle"), number)),
+                        text=f"{label}: move joint {joint} to {{1}}", required=(1,),
+                        missing="Target angle is undefined.", **common)
+        elif action == "move_linear_absolute":
+            mode = step.get("mode", "tool")
+            axes = ("x", "y", "z", "rx", "ry", "rz")
+            getters = [self.operand(step.get(axis), number) for axis in axes]
+            coords = lambda slots: {axis: get(slots) for axis, get in zip(axes, getters)}  # noqa: E731
+            self.motion(step, "apply_blockly_move_linear_absolute", (_constant(mode), coords),
+                        text=f"{label}: move linearly in {mode} frame to {{1}}", **common)
+        elif action == "go_home":
+            mode = step.get("mode", "manual")
+            self.motion(step, "apply_blockly_home", (_constant(mode == "library"),),
+                        text=f"{label}: move home ({mode})", **common)
+        elif action == "wait_motion":
+            name = (step.get("handle") or "").strip()
+            if not name:
+                self.emit(LOG, text=f"{label}: ⚠️ Motion variable name is empty; nothing to wait for.", **common)
+                return
+            self.emit(CALL, func="apply_blockly_wait_motion",
+                      args=(_variable(self.slot(name), name, None), _constant(name)),
+                      text=f"{label}: wait for motion {name}", **common)
+        elif action == "wait_all_motions":
+            self.emit(CALL, func="apply_blockly_wait_all_motions", text=f"{label}: wait for all motions", **common)
+        elif action == "delay":
+            self.emit(CALL, func="apply_blockly_delay", args=(self.operand(step.get("duration"), number),),
+                      text=f"{label}: delay {{0}} sec", required=(0,),
+                      missing="Delay duration is undefined.", **common)
+        elif action == "repeat_loop":
+            self.repeat(step, label, common)
+        elif action == "if_condition":
+            condition = step.get("condition", {})
+            kind = condition.get("type")
+            if kind not in ("is_connected", "servo_locked"):
+                self.emit(LOG, text=f"⚠️ Unsupported condition type '{kind}'.", **common)
+                return
+            self.branch(
+                "apply_blockly_condition",
+                (_constant(kind), _constant(bool(condition.get("value", True)))),
+                condition.get("true_branch") or [],
+                condition.get("false_branch") or [],
+                f"{label}: if condition {condition.get('type')} is {{1}} -> {{2}}",
+                label, common,
+            )
+        elif action == "if_variable_compare":
+            name = (step.get("name") or "").strip()
+            if not name:
+                self.emit(LOG, text=f"{label}: ⚠️ Variable name is empty in compare block.", **common)
+                return
+            operator = step.get("operator", "EQ")
+            self.branch(
+                _compare(operator),
+                (_optional(self.slot(name), name), self.operand(step.get("value"))),
+                step.get("true_branch") or [],
+                step.get("false_branch") or [],
+                f"{label}: compare {{0}} {COMPARE_SYMBOLS.get(operator, operator)} {{1}} -> {{2}}",
+                label, common,
+            )
+        elif action == "get_coordinates":
+            mode = step.get("mode", "joint")
+            store = (step.get("store") or "").strip()
+            self.emit(STORE, func="apply_blockly_get_coordinates",
+                      args=(_constant(mode), _constant(store), _constant(label)),
+                      target=self.slot(store) if store else -1, **common)
+        else:
+            self.emit(LOG, text=f"{label}: unsupported action '{action}'", **common)
+
+    def motion(self, step, func, args, text, **fields):
+        """
+        A motion block: the host method gets the block's operands plus `wait`.
+        Programs from before background moves have no "wait" and keep their
+        behaviour (send and go on).  A background move with a "handle" stores
+        the motion handle the host returns in that variable.
+        """
+        wait = bool(step.get("wait", False))
+        handle = "" if wait else (step.get("handle") or "").strip()
+        if not wait:
+            text += f" (in background as {handle})" if handle else " (in background)"
+        if handle:
+            self.emit(STORE, func=func, args=args + (_constant(wait),), target=self.slot(handle), text=text, **fields)
+        else:
+            self.emit(CALL, func=func, args=args + (_constant(wait),), text=text, **fields)
+
+    def repeat(self, step, label, common):
+        body = step.get("body") or []
+        count = self.operand(step.get("count"), "number")
+        if not body:
+            self.emit(LOG, text=f"{label}: ℹ️ Loop body is empty.", **common)
+            return
+        loop = self.loops
+        self.loops += 1
+        start = self.emit(LOOP, args=(count,), end=loop, text=f"🔁 {label} ▶ iteration {{0}}/{{1}}", **common)
+        self.steps(body, f"{label} ▶")
+        self.emit(NEXT, target=start + 1, end=loop, text=f"🔁 {label} ▶ iteration {{0}}/{{1}}", **common)
+        self.patch(start, target=len(self.code))
+
+    def branch(self, func, args, true_steps, false_steps, text, label, common):
+        test = self.emit(BRANCH, func=func, args=args, text=text, **common)
+        self.steps(true_steps, f"{label} TRUE")
+        if false_steps:
+            jump = self.emit(JUMP, **common)
+            self.patch(test, target=len(self.code))
+            self.steps(false_steps, f"{label} FALSE")
+            self.patch(jump, target=len(self.code))
+        else:
+            self.patch(test, target=len(self.code))
+        self.patch(test, end=len(self.code))
+
+
+def compile_program(steps, context: str = "[Blockly]") -> Program:
+    compiler = _Compiler()
+    compiler.steps(steps, context)
+    return Program(compiler.code, list(compiler.slots), compiler.loops)
+
+
+def disassemble(program: Program) -> str:
+    """Readable listing of a compiled program, one instruction per line."""
+    lines = []
+    for pc, ins in enumerate(program.instructions):
+        func = ins.func if isinstance(ins.func, str) or ins.func is None else getattr(ins.func, "__name__", "fn")
+        target = f" -> {ins.target}" if ins.op in (BRANCH, JUMP, LOOP, NEXT) else ""
+        slot = f" ${program.variables[ins.target]}" if ins.op in (SET, STORE) and ins.target >= 0 else ""
+        lines.append(f"{pc:5d}  {OPCODE_NAMES[ins.op]:<6} {func or ''}{slot}{target}  {ins.label}")
+    return "\n".join(lines)
+
+
+# -------------------------
+# Optimizer
+# -------------------------
+def _constant_jog(ins: Instruction):
+    """
+    (kind, index, delta, wait) of a jog block whose joint/axis and delta are
+    constants, else None.  Jogs that keep a motion handle (STORE) are left alone.
+    """
+    kind = JOG_KINDS.get(ins.func) if ins.op == CALL and isinstance(ins.func, str) else None
+    if kind is None or not all(hasattr(get, "value") for get in ins.args):
+        return None
+    where, delta, wait = ins.args[0].value, ins.args[1].value, ins.args[2].value
+    if delta is None:
+        return None   # the block warns when it runs
+    if kind == "joint":
+        try:
+            index = int(where)
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= index <= 5:
+            return None
+    else:
+        index = LINEAR_AXES.get(str(where).lower())
+        if index is None:
+            return None
+    return kind, index, delta, wait
+
+
+def _fold_moves(jogs):
+    """Adjacent moves of one joint/axis summed, zero and cancelling moves removed."""
+    moves = []
+    for _kind, index, delta, _wait in jogs:
+        if abs(delta) < ZERO_DELTA:
+            continue
+        if moves and moves[-1][0] == index:
+            total = moves[-1][1] + delta
+            if abs(total) < ZERO_DELTA:
+                moves.pop()   # may make the moves on either side adjacent
+            else:
+                moves[-1] = (index, total)
+        else:
+            moves.append((index, delta))
+    return moves
+
+
+def _jump_targets(code) -> set:
+    targets = set()
+    for ins in code:
+        if ins.op in (BRANCH, JUMP, LOOP, NEXT):
+            targets.add(ins.target)
+        if ins.op == BRANCH:
+            targets.add(ins.end)
+    return targets
+
+
+def _is_zero_delay(ins: Instruction) -> bool:
+    if ins.op != CALL or ins.func != "apply_blockly_delay" or not hasattr(ins.args[0], "value"):
+        return False
+    try:
+        return float(ins.args[0].value) <= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _move_text(kind: str, index: int, delta: float) -> str:
+    name = f"J{index + 1}" if kind == "joint" else "XYZ"[index]
+    return f"{name} {delta:+g}"
+
+
+def optimize(program: Program, log=None) -> Program:
+    """
+    Peephole pass over a compiled program.  Straight-line runs of jog blocks
+    with constant deltas (no jump lands inside a run) are rewritten:
+
+    - zero deltas are dropped, and adjacent jogs of one joint/axis are summed
+      (dropped if they cancel);
+    - a single remaining move stays an ordinary jog block;
+    - two or more moves of the same kind become one apply_blockly_jog_sequence
+      call: the position is read once and every move is sent with an
+      absolute target (previous target + delta).
+
+    Only jogs with the same wait setting are folded; a folded run of waiting
+    jogs waits once, after its last move (the robot still visits every
+    target, without stopping for the program in between).
+
+    Zero-second delays are dropped as well.  log(message) is called once per
+    rewrite (verbose mode).
+    """
+    code = program.instructions
+    targets = _jump_targets(code)
+    out = []
+    new_index = [0] * (len(code) + 1)   # old pc -> pc of what replaced it
+    pc = 0
+    while pc < len(code):
+        ins = code[pc]
+        if _is_zero_delay(ins):
+            if log is not None:
+                log(f"⚙️ {ins.label}: zero-second delay removed")
+            new_index[pc] = len(out)
+            pc += 1
+            continue
+        jog = _constant_jog(ins)
+        if jog is None:
+            new_index[pc] = len(out)
+            out.append(ins)
+            pc += 1
+            continue
+
+        jogs = [jog]
+        stop = pc + 1
+        while stop < len(code) and stop not in targets:
+            following = _constant_jog(code[stop])
+            if following is None or following[0] != jog[0] or following[3] != jog[3]:
+                break
+            jogs.append(following)
+            stop += 1
+        for old in range(pc, stop):
+            new_index[old] = len(out)
+
+        kind, wait = jog[0], jog[3]
+        moves = _fold_moves(jogs)
+        blocks = stop - pc
+        span = ins.label if blocks == 1 else f"{ins.label} .. {code[stop - 1].label}"
+        listed = ", ".join(_move_text(kind, index, delta) for index, delta in moves)
+        if not moves:
+            if log is not None:
+                log(f"⚙️ {span}: {blocks} jog block(s) with no net motion removed")
+        elif len(moves) == 1 and blocks == 1:
+            out.append(ins)
+        elif len(moves) == 1:
+            index, delta = moves[0]
+            where = str(index) if kind == "joint" else "XYZ"[index].lower()
+            out.append(ins._replace(args=(_constant(where), _constant(delta), _constant(wait)),
+                                    text=f"{ins.label}: jog {kind} {listed} ({blocks} blocks folded)"))
+            if log is not None:
+                log(f"⚙️ {span}: {blocks} jog blocks folded into {listed}")
+        else:
+            out.append(Instruction(
+                CALL, func="apply_blockly_jog_sequence",
+                args=(_constant(kind), _constant(tuple(moves)), _constant(wait)),
+                text=f"{ins.label}: jog {kind} sequence {listed} ({blocks} blocks, one position read)",
+                label=ins.label, block=ins.block,
+            ))
+            if log is not None:
+                log(f"⚙️ {span}: {blocks} jog blocks -> {len(moves)} absolute moves from one position read "
+                    f"({blocks - 1} fewer position reads)")
+        pc = stop
+    new_index[len(code)] = len(out)
+
+    for i, ins in enumerate(out):
+        if ins.op in (BRANCH, JUMP, LOOP, NEXT):
+            fields = {"target": new_index[ins.target]}
+            if ins.op == BRANCH:
+                fields["end"] = new_index[ins.end]
+            out[i] = ins._replace(**fields)
+    return Program(out, program.variables, program.loops)
+
+
+# -------------------------
+# Profiler
+# -------------------------
+class BlockProfile:
+    """
+    Where one run spent its time, per instruction, summed per Blockly block.
+
+    The Executor only counts runs and sets `current`, which RunEvents needs
+    anyway; between start() and stop() a sampler thread charges the time since
+    its previous sample to the instruction running now, every `interval`
+    seconds (self time: a repeat block only pays for its loop bookkeeping, not
+    its body).  Blocks shorter than the interval are estimates, but the totals
+    are exact and a run costs no clock reads per instruction.  The host adds
+    the time it spent waiting for the controller with add_wait().
+    """
+
+    def __init__(self, program: Program, interval: float = PROFILE_INTERVAL):
+        count = len(program.instructions)
+        self.program = program
+        self.interval = interval
+        self.wall = [0.0] * count
+        self.runs = [0] * count
+        self.wait = [0.0] * count
+        self.current = 0
+        self.pausing = False   # set by the executor while it waits in a pause
+        self.paused = 0.0      # time spent paused, left out of every block
+        self._done = threading.Event()
+        self._sampler = None
+        self._last = 0.0
+
+    def add_wait(self, seconds: float):
+        self.wait[self.current] += seconds
+
+    def start(self):
+        """Start sampling; the executor calls this when the run begins."""
+        if self._sampler is not None or not self.wall:
+            return
+        self._done.clear()
+        self._last = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name="BlockProfile", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """Stop sampling and charge the time since the last sample; safe to call twice."""
+        if self._sampler is None:
+            return
+        self._done.set()
+        self._sampler.join()
+        self._sampler = None
+        self._charge(time.perf_counter())
+
+    def _charge(self, now: float):
+        if not self.pausing:
+            self.wall[self.current] += now - self._last
+        self._last = now
+
+    def _sample(self):
+        clock = time.perf_counter
+        while not self._done.wait(self.interval):
+            self._charge(clock())
+
+    def blocks(self) -> list:
+        """Per-block totals, most expensive first: dicts with id, label, wall, calls, controller_wait."""
+        rows = {}
+        for pc, ins in enumerate(self.program.instructions):
+            key = ins.block or ins.label
+            row = rows.get(key)
+            if row is None:
+                # A block's first instruction (LOOP for a repeat) counts how often the block ran
+                row = rows[key] = {"id": ins.block, "label": ins.label, "wall": 0.0,
+                                   "calls": self.runs[pc], "controller_wait": 0.0}
+            row["wall"] += self.wall[pc]
+            row["controller_wait"] += self.wait[pc]
+        return sorted((row for row in rows.values() if row["calls"]), key=lambda row: row["wall"], reverse=True)
+
+    def summary(self) -> dict:
+        """JSON-ready report for the editor and for export."""
+        return {
+            "total": sum(self.wall),
+            "controller_wait": sum(self.wait),
+            "paused": self.paused,
+            "blocks": self.blocks(),
+        }
+
+
+# -------------------------
+# Run events
+# -------------------------
+class RunEvents:
+    """
+    What a run did since the last flush, for the editor.
+
+    The Executor only bumps a counter and stores the pc per instruction (into
+    the BlockProfile instead when it keeps one, whose counters are shared);
+    no event objects, no locks, no signals.  flush() runs on another thread
+    (the GUI timer) at EVENT_FLUSH_INTERVAL and turns the difference since the
+    previous flush into one compact batch, so a tight repeat body costs the
+    same whether the editor is watching or not:
+
+        {"seq": 12, "current": "blockId",
+         "blocks": [[block id, started, finished], ...],   # counts since the last batch
+         "vars": {"name": value, ...},                     # changed variables only
+         "errors": [[block id, message], ...]}
+    """
+
+    def __init__(self, program: Program):
+        count = len(program.instructions)
+        self.program = program
+        self.started = [0] * count    # cumulative, written by the executor only
+        self.current = -1             # instruction running now
+        self.ended = False
+        self.slots = None             # the executor's variable slots, once it starts
+        self._source = self           # whatever `current` is read from; see follow()
+        self.errors = deque()         # (pc, message); deque appends/pops are thread-safe
+        self.seq = 0
+        # A block's first instruction stands for the block (LOOP for a repeat)
+        firsts = {}
+        for pc, ins in enumerate(program.instructions):
+            if ins.block and ins.block not in firsts:
+                firsts[ins.block] = pc
+        self._firsts = sorted(firsts.values())
+        self._started = [0] * count
+        self._finished = [0] * count
+        self._values = [None] * len(program.variables)
+        self._current = None
+
+    def follow(self, profile: BlockProfile):
+        """Take the counts and the running instruction from a profile the executor fills anyway."""
+        self.started = profile.runs
+        self._source = profile
+
+    def error(self, message: str, pc: int = None):
+        """Record a problem with the running block (or instruction pc); safe from any thread."""
+        self.errors.append((self._source.current if pc is None else pc, message))
+
+    def flush(self) -> dict:
+        """Everything since the previous flush as one batch, or None when nothing changed."""
+        code = self.program.instructions
+        current = -1 if self.ended else self._source.current
+        started = self.started
+        blocks = []
+        for pc in self._firsts:
+            count = started[pc]
+            finished = count - (pc == current and count > 0)
+            if count != self._started[pc] or finished != self._finished[pc]:
+                blocks.append([code[pc].block, count - self._started[pc], finished - self._finished[pc]])
+                self._started[pc] = count
+                self._finished[pc] = finished
+
+        changed = {}
+        slots = self.slots
+        if slots is not None:
+            for index, name in enumerate(self.program.variables):
+                value = slots[index]
+                if value is not self._values[index] and value != self._values[index]:
+                    self._values[index] = value
+                    changed[name] = value
+
+        errors = []
+        while self.errors:
+            pc, message = self.errors.popleft()
+            errors.append([code[pc].block if 0 <= pc < len(code) else None, message])
+
+        block = code[current].block if 0 <= current < len(code) else None
+        if not blocks and not changed and not errors and block == self._current:
+            return None
+        self._current = block
+        self.seq += 1
+        return {"seq": self.seq, "current": block, "blocks": blocks, "vars": changed, "errors": errors}
+
+
+# -------------------------
+# Executor
+# -------------------------
+class RunControl:
+    """Stop / pause requests for a running Executor; every method is safe from any thread."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        # Polled by the executor before every instruction
+        self.interrupted = False
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._resume.is_set()
+
+    def stop(self):
+        self._stop.set()
+        self.interrupted = True
+        self._resume.set()   # a paused run wakes up only to stop
+
+    def pause(self):
+        if not self._stop.is_set():
+            self._resume.clear()
+            self.interrupted = True
+
+    def resume(self):
+        self._resume.set()
+        self.interrupted = self._stop.is_set()
+
+    def checkpoint(self):
+        """Between blocks: raise ProgramStopped when stopped, block while paused."""
+        self._resume.wait()
+        if self._stop.is_set():
+            raise ProgramStopped()
+
+    def sleep(self, seconds: float):
+        """Wait that ends early with ProgramStopped; a pause holds it at the end."""
+        if self._stop.wait(seconds):
+            raise ProgramStopped()
+        self.checkpoint()
+
+
+class Executor:
+    """
+    Runs a compiled Program against a host; trace=True logs every block like the old interpreter.
+    control: optional RunControl; a stop ends run() with ProgramStopped.
+    progress(pc): called at most every progress_interval seconds, and when the run pauses.
+    profile: optional BlockProfile for this program, filled in as the run goes.
+    events: optional RunEvents for this program, flushed by someone else.
+    """
+
+    def __init__(self, program: Program, host, log=print, trace: bool = True, control: RunControl = None,
+                 progress=None, progress_interval: float = PROGRESS_INTERVAL, profile: BlockProfile = None,
+                 events: RunEvents = None):
+        self.program = program
+        self.host = host
+        self.log = log
+        self.trace = trace
+        self.control = control
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.profile = profile
+        self.events = events
+        # Host methods resolved once; plain callables (compare tests) kept as they are
+        self.funcs = [getattr(host, ins.func) if isinstance(ins.func, str) else ins.func
+                      for ins in program.instructions]
+        self.variables = {}
+        self.pc = 0
+
+    def run(self):
+        code = self.program.instructions
+        funcs = self.funcs
+        log = self.log
+        trace = self.trace
+        control = self.control
+        progress = self.progress
+        interval = self.progress_interval
+        next_report = 0.0
+        profile = self.profile
+        slots = [None] * len(self.program.variables)
+        events = self.events
+        if events is not None:
+            events.slots = slots
+            if profile is not None:
+                # The profile counts every instruction and tracks the running one for both
+                events.follow(profile)
+        if profile is not None:
+            events, started = profile, profile.runs
+            profile.start()
+        elif events is not None:
+            started = events.started
+        counters = [0] * self.program.loops
+        totals = [0] * self.program.loops
+        pc = 0
+        end = len(code)
+        try:
+            while pc < end:
+                if control is not None and control.interrupted:
+                    self.pc = pc
+                    if progress is not None and control.paused:
+                        progress(pc)
+                    if profile is not None:
+                        began = time.perf_counter()
+                        profile.pausing = True
+                        try:
+                            control.checkpoint()
+                        finally:
+                            # Paused time is nobody's cost
+                            profile.pausing = False
+                            profile.paused += time.perf_counter() - began
+                    else:
+                        control.checkpoint()
+                if events is not None:
+                    started[pc] += 1
+                    events.current = pc
+                if progress is not None:
+                    now = time.monotonic()
+                    if now >= next_report:
+                        next_report = now + interval
+                        progress(pc)
+                ins = code[pc]
+                op = ins.op
+                if op == CALL:
+                    values = [get(slots) for get in ins.args]
+                    if ins.required and any(values[i] is None for i in ins.required):
+                        log(f"{ins.label}: ⚠️ {ins.missing}")
+                        if self.events is not None:
+                            self.events.error(ins.missing, pc)
+                    elif trace and ins.text:
+                        log(ins.text.format(*values))
+                        funcs[pc](*values)
+                    else:
+                        funcs[pc](*values)
+                elif op == SET:
+                    value = ins.args[0](slots)
+                    slots[ins.target] = value
+                    if trace:
+                        log(ins.text.format(value))
+                elif op == NEXT:
+                    loop = ins.end
+                    if counters[loop] < totals[loop]:
+                        counters[loop] += 1
+                        if trace:
+                            log(ins.text.format(counters[loop], totals[loop]))
+                        pc = ins.target
+                        continue
+                elif op == LOOP:
+                    count = ins.args[0](slots)
+                    iterations = loop_iterations(count)
+                    if not iterations:
+                        if iterations is None:
+                            log(f"{ins.label}: ⚠️ Invalid loop count '{count}'; skipping.")
+                        else:
+                            log(f"{ins.label}: ℹ️ Loop count is 0; nothing to execute.")
+                        pc = ins.target
+                        continue
+                    counters[ins.end] = 1
+                    totals[ins.end] = iterations
+                    if trace:
+                        log(ins.text.format(1, iterations))
+                elif op == BRANCH:
+                    values = [get(slots) for get in ins.args]
+                    result = funcs[pc](*values)
+                    if result is None:
+                        log(f"{ins.label}: ⚠️ Comparison value is undefined.")
+                        pc = ins.end
+                        continue
+                    if trace:
+                        log(ins.text.format(*values, result))
+                    if not result:
+                        pc = ins.target
+                        continue
+                elif op == JUMP:
+                    pc = ins.target
+                    continue
+                elif op == STORE:
+                    values = [get(slots) for get in ins.args]
+                    if ins.required and any(values[i] is None for i in ins.required):
+                        log(f"{ins.label}: ⚠️ {ins.missing}")
+                        if self.events is not None:
+                            self.events.error(ins.missing, pc)
+                    else:
+                        if trace and ins.text:
+                            log(ins.text.format(*values))
+                        value = funcs[pc](*values)
+                        if ins.target >= 0 and value is not None:
+                            slots[ins.target] = value
+                elif op == LOG:
+                    log(ins.text)
+                pc += 1
+        finally:
+            # Kept on a stop too, so the caller can report where the run ended
+            self.pc = pc
+            if profile is not None:
+                profile.stop()
+            if self.events is not None:
+                self.events.ended = True
+            self.variables = {name: slots[i] for i, name in enumerate(self.program.variables)}
+        return self.variables
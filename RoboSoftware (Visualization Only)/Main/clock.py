@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class RealClock:
+    """Wall-clock time source used with a real controller (or nrc_stub)."""
+
+    virtual = False
+
+    @staticmethod
+    def now() -> float:
+        return time.monotonic()
+
+    @staticmethod
+    def sleep(seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Time source for the simulator.
+    rate=None: time only moves when someone sleeps, so waits cost nothing and
+               a long program finishes as fast as the CPU allows.
+    rate=k:    time runs k times faster than the wall clock (GUI use).
+    """
+
+    virtual = True
+
+    def __init__(self, rate: float = None, start: float = 0.0):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._offset = start
+        self._wall0 = time.monotonic()
+
+    def now(self) -> float:
+        if self.rate is None:
+            return self._offset
+        return self._offset + (time.monotonic() - self._wall0) * self.rate
+
+    def sleep(self, seconds: float):
+        if seconds <= 0:
+            return
+        if self.rate is None:
+            self.advance(seconds)
+        else:
+            time.sleep(seconds / self.rate)
+
+    def advance(self, seconds: float):
+        """Jump virtual time forward without waiting."""
+        with self._lock:
+            self._offset += seconds
@@ -1,9 +1,77 @@
 import ctypes
 import os
+import sys
 
-# Load the DLL
-lib_path = "Main/libnrc_host.dll"
-nrc_lib = ctypes.CDLL(lib_path)
+import numpy as np
+
+from clock import RealClock, VirtualClock
+
+# -------------------------
+# Load the controller library
+# -------------------------
+def find_library() -> str:
+    """
+    Locate libnrc_host for this platform.
+    NRC_LIB_PATH wins; otherwise Main/ under the working directory is searched
+    first (original behaviour), then the folder containing this file.
+    On Linux/macOS this is the nrc_stub build (make -C nrc_stub).
+    """
+    override = os.environ.get("NRC_LIB_PATH")
+    if override:
+        return os.path.abspath(override)
+
+    if sys.platform.startswith("win"):
+        name = "libnrc_host.dll"
+    elif sys.platform == "darwin":
+        name = "libnrc_host.dylib"
+    else:
+        name = "libnrc_host.so"
+
+    for folder in (os.path.join(os.getcwd(), "Main"), os.path.dirname(os.path.abspath(__file__))):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    raise OSError(f"{name} not found; set NRC_LIB_PATH or build the stub with 'make -C nrc_stub'")
+
+# NRC_BACKEND=sim swaps the DLL for the pure-Python simulator (sim_backend.py).
+# NRC_SIM_RATE sets how fast its virtual clock runs ("max" = only when waited on),
+# NRC_SIM_MOTION_BUFFER=1 makes it hold a motion command behind the running move.
+# `clock` is the time source anything waiting on robot motion should use.
+if os.environ.get("NRC_BACKEND", "").lower() == "sim":
+    import sim_backend
+
+    _rate = os.environ.get("NRC_SIM_RATE", "1")
+    clock = VirtualClock(rate=None if _rate.lower() == "max" else float(_rate))
+    sim_backend.reset(clock, motion_buffer=int(os.environ.get("NRC_SIM_MOTION_BUFFER", "0")))
+    lib_path = None
+    nrc_lib = sim_backend
+else:
+    clock = RealClock()
+    lib_path = find_library()
+    nrc_lib = ctypes.CDLL(lib_path)
+
+def use_simulator(sim_clock=None, call_latency: float = 0.0, motion_buffer: int = 0):
+    """
+    Route every wrapper to a fresh simulated robot (virtual time by default).
+    RobotHandles created before the switch keep talking to the old backend.
+    """
+    global nrc_lib, clock, lib_path
+    import sim_backend
+
+    clock = sim_clock if sim_clock is not None else VirtualClock(rate=None)
+    lib_path = None
+    nrc_lib = sim_backend
+    return sim_backend.reset(clock, call_latency, motion_buffer)
+
+def motion_buffer() -> int:
+    """
+    Motion commands the controller holds behind the running move.
+    0 for libnrc_host: nrc_lib.h defines no buffering, and a movej/movel sent
+    while a move runs replaces it (as nrc_stub does).  The simulator reports
+    its motion_buffer setting.  Send a move before the running one has
+    finished only when this is > 0.
+    """
+    return nrc_lib.motion_buffer() if lib_path is None else 0
 
 # --- connect_robot ---
 nrc_lib.connect_robot.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p]
@@ -21,6 +89,13 @@ nrc_lib.disconnect_robot.restype = ctypes.c_int
 def disconnect_robot(robot_name: str) -> int:
     return nrc_lib.disconnect_robot(robot_name.encode("utf-8"))
 
+# --- get_connection_status ---
+nrc_lib.get_connection_status.argtypes = [ctypes.c_char_p]
+nrc_lib.get_connection_status.restype = ctypes.c_int
+
+def get_connection_status(robot_name: str) -> int:
+    return nrc_lib.get_connection_status(robot_name.encode("utf-8"))
+
 # --- set_servo_state ---
 nrc_lib.set_servo_state.argtypes = [ctypes.c_int, ctypes.c_char_p]
 nrc_lib.set_servo_state.restype = ctypes.c_int
@@ -31,6 +106,16 @@ def set_servo_state(state: int, robot_name: str) -> int:
     """
     return nrc_lib.set_servo_state(state, robot_name.encode("utf-8"))
 
+# --- get_servo_state ---
+nrc_lib.get_servo_state.argtypes = [ctypes.c_char_p]
+nrc_lib.get_servo_state.restype = ctypes.c_int
+
+def get_servo_state(robot_name: str) -> int:
+    """
+    0 -> stop, 1 -> ok, 2 -> error, 3 -> running (servoStatus in nrc_lib.h)
+    """
+    return nrc_lib.get_servo_state(robot_name.encode("utf-8"))
+
 # --- set_servo_poweron ---
 nrc_lib.set_servo_poweron.argtypes = [ctypes.c_char_p]
 nrc_lib.set_servo_poweron.restype = ctypes.c_int
@@ -45,6 +130,20 @@ nrc_lib.set_servo_poweroff.restype = ctypes.c_int
 def set_servo_poweroff(robot_name: str) -> int:
     return nrc_lib.set_servo_poweroff(robot_name.encode("utf-8"))
 
+# -------------------------
+# Lock / unlock servos
+# -------------------------
+def set_servo_locked(locked: bool, robot_name: str):
+    """
+    locked=True: servo OFF, then power off; False: servo ON, then power on.
+    """
+    if locked:
+        set_servo_state(0, robot_name)
+        set_servo_poweroff(robot_name)
+    else:
+        set_servo_state(1, robot_name)
+        set_servo_poweron(robot_name)
+
 # -------------------------
 # get_current_position
 # -------------------------
@@ -176,6 +275,23 @@ def get_robot_running_state(robot_name: str) -> int:
     """
     return nrc_lib.get_robot_running_state(robot_name.encode("utf-8"))
 
+# --- robot_go_home ---
+nrc_lib.robot_go_home.argtypes = [ctypes.c_char_p]
+nrc_lib.robot_go_home.restype = ctypes.c_int
+
+def robot_go_home(robot_name: str) -> int:
+    return nrc_lib.robot_go_home(robot_name.encode("utf-8"))
+
+# --- job_stop ---
+nrc_lib.job_stop.argtypes = [ctypes.c_char_p]
+nrc_lib.job_stop.restype = ctypes.c_int
+
+def job_stop(robot_name: str) -> int:
+    """
+    Stop the current motion/job immediately.
+    """
+    return nrc_lib.job_stop(robot_name.encode("utf-8"))
+
 # --- set_current_coord ---
 nrc_lib.set_current_coord.argtypes = [ctypes.c_int, ctypes.c_char_p]
 nrc_lib.set_current_coord.restype = ctypes.c_int
@@ -197,4 +313,95 @@ def get_current_coord(robot_name: str) -> int:
     Get the current coordinate type.
     Returns an integer representing the current coordinate mode.
     """
-    return nrc_lib.get_current_coord(robot_name.encode("utf-8"))
\ No newline at end of file
+    return nrc_lib.get_current_coord(robot_name.encode("utf-8"))
+
+
+# -------------------------
+# RobotHandle
+# -------------------------
+class RobotHandle:
+    """
+    Binding for one robot that avoids per-call allocations.
+    The name is encoded once and positions are exchanged through ctypes
+    buffers owned by the handle. `joints`, `cart` and `target` are NumPy views
+    on those buffers: every read overwrites them, so copy what you keep.
+    """
+
+    def __init__(self, robot_name: str):
+        self.robot_name = robot_name
+        self._name = robot_name.encode("utf-8")
+
+        self._joints_buf = (ctypes.c_double * 7)()
+        self._cart_buf = (ctypes.c_double * 7)()
+        self._target_buf = (ctypes.c_double * 7)()
+        self.joints = np.ctypeslib.as_array(self._joints_buf)
+        self.cart = np.ctypeslib.as_array(self._cart_buf)
+        self.target = np.ctypeslib.as_array(self._target_buf)
+
+        # Bound once so the hot path skips the CDLL attribute lookup
+        self._get_current_position = nrc_lib.get_current_position
+        self._robot_movej = nrc_lib.robot_movej
+        self._robot_movel = nrc_lib.robot_movel
+        self._get_robot_running_state = nrc_lib.get_robot_running_state
+
+    # --- reads ---
+    def read_joints(self) -> np.ndarray:
+        """Refresh and return the joint view (coord=0)."""
+        status = self._get_current_position(self._joints_buf, 0, self._name)
+        if status != 0:
+            raise Exception(f"get_current_position failed with code {status}")
+        return self.joints
+
+    def read_cart(self, coord: int) -> np.ndarray:
+        """Refresh and return the Cartesian view in the given coord."""
+        status = self._get_current_position(self._cart_buf, coord, self._name)
+        if status != 0:
+            raise Exception(f"get_current_position failed with code {status}")
+        return self.cart
+
+    def get_robot_running_state(self) -> int:
+        return self._get_robot_running_state(self._name)
+
+    def get_servo_state(self) -> int:
+        return nrc_lib.get_servo_state(self._name)
+
+    def get_connection_status(self) -> int:
+        return nrc_lib.get_connection_status(self._name)
+
+    def set_current_coord(self, coord: int) -> int:
+        return nrc_lib.set_current_coord(coord, self._name)
+
+    def job_stop(self) -> int:
+        return nrc_lib.job_stop(self._name)
+
+    # --- motion ---
+    def movej(self, pos, vel: int, coord: int, acc: int, dec: int) -> int:
+        """pos: 7 values (list, tuple or array); copied into the reusable target buffer."""
+        self.target[:] = pos
+        return self._robot_movej(self._target_buf, vel, coord, acc, dec, self._name)
+
+    def movel(self, pos, vel: int, coord: int, acc: int, dec: int) -> int:
+        self.target[:] = pos
+        return self._robot_movel(self._target_buf, vel, coord, acc, dec, self._name)
+
+    def move_joint_relative(self, joint_index: int, delta: float, vel: int, acc: int, dec: int) -> int:
+        if not (0 <= joint_index < 7):
+            raise ValueError("Invalid joint index")
+        self.read_joints()
+        self.target[:] = self.joints
+        self.target[joint_index] += delta
+        status = self._robot_movej(self._target_buf, vel, 0, acc, dec, self._name)
+        if status != 0:
+            raise Exception(f"robot_movej failed with code {status}")
+        return status
+
+    def linear_jog(self, axis_index: int, delta: float, vel: int, acc: int, dec: int) -> int:
+        if not (0 <= axis_index <= 2):
+            raise ValueError("Invalid axis index, must be 0=X,1=Y,2=Z")
+        self.read_cart(1)
+        self.target[:] = self.cart
+        self.target[axis_index] += delta
+        status = self._robot_movel(self._target_buf, vel, 1, acc, dec, self._name)
+        if status != 0:
+            raise Exception(f"robot_movel failed with code {status}")
+        return status
@@ -0,0 +1,259 @@
+"""
+Forward kinematics compiled from a URDF.
+
+KinematicChain.from_urdf parses the file once (xml.etree, no urdfpy) into
+per-link constant matrices.  fk() then evaluates every link transform with
+NumPy, for one configuration or a whole batch:
+
+    chain = KinematicChain.from_urdf("Main/Models/ur5_g.urdf")
+    T = chain.fk(q)            # q (6,)   -> (L, 4, 4)
+    T = chain.fk(path)         # (N, 6)   -> (N, L, 4, 4)
+    tool = T[..., chain.link_index("tool0"), :3, 3]
+
+Joint values are radians (metres for prismatic joints), in the order of
+chain.joint_names.
+"""
+import os
+import xml.etree.ElementTree as ET
+from typing import NamedTuple
+
+import numpy as np
+
+ACTUATED = ("revolute", "continuous", "prismatic")
+
+
+class Visual(NamedTuple):
+    link: int             # index into chain.link_names
+    filename: str         # mesh path, resolved against the URDF folder if needed
+    origin: np.ndarray    # 4x4 visual origin in the link frame
+    scale: np.ndarray     # mesh scale (3,)
+    coarse: str = ""      # the link's collision mesh when it shares the visual's frame
+
+
+def origin_matrix(xyz=(0.0, 0.0, 0.0), rpy=(0.0, 0.0, 0.0)) -> np.ndarray:
+    """URDF <origin>: translation xyz, then fixed-axis roll, pitch, yaw (R = Rz Ry Rx)."""
+    r, p, y = rpy
+    cr, sr = np.cos(r), np.sin(r)
+    cp, sp = np.cos(p), np.sin(p)
+    cy, sy = np.cos(y), np.sin(y)
+    T = np.eye(4)
+    T[:3, :3] = [
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ]
+    T[:3, 3] = xyz
+    return T
+
+
+class KinematicChain:
+    """
+    Kinematic tree of a URDF robot, links in parent-before-child order.
+    For link i: parents[i] (-1 for the root), the constant joint origin,
+    and for actuated joints the axis and the index of its joint value.
+    """
+
+    def __init__(self, link_names, parents, origins, joint_types, axes, joint_columns, joint_names,
+                 limits, visuals, name=""):
+        self.name = name
+        self.link_names = list(link_names)
+        self.parents = list(parents)
+        self.joint_types = list(joint_types)
+        self.joint_columns = list(joint_columns)   # -1 for fixed joints / the root
+        self.joint_names = list(joint_names)
+        self.limits = np.asarray(limits, dtype=np.float64).reshape(len(self.joint_names), 2)
+        self.visuals = list(visuals)
+        self.origins = np.asarray(origins, dtype=np.float64)
+        self.axes = np.asarray(axes, dtype=np.float64)
+        self._index = {link: i for i, link in enumerate(self.link_names)}
+
+        # Revolute: origin_R @ Rodrigues(axis, q) = A + sin(q) B + (1 - cos(q)) C
+        K = np.zeros((len(self.link_names), 3, 3))
+        ax = self.axes
+        K[:, 0, 1], K[:, 0, 2] = -ax[:, 2], ax[:, 1]
+        K[:, 1, 0], K[:, 1, 2] = ax[:, 2], -ax[:, 0]
+        K[:, 2, 0], K[:, 2, 1] = -ax[:, 1], ax[:, 0]
+        R0 = self.origins[:, :3, :3]
+        self._rot_sin = R0 @ K
+        self._rot_cos = R0 @ (K @ K)
+        # Prismatic: translation moves along origin_R @ axis
+        self._slide = np.einsum("lij,lj->li", R0, ax)
+
+    # -------------------------
+    # Construction
+    # -------------------------
+    @classmethod
+    def from_urdf(cls, path: str) -> "KinematicChain":
+        root_el = ET.parse(path).getroot()
+        base_dir = os.path.dirname(os.path.abspath(path))
+
+        links = [link.get("name") for link in root_el.findall("link")]
+        joints = {}
+        for joint in root_el.findall("joint"):
+            child = joint.find("child").get("link")
+            joints[child] = joint
+
+        # Parent-before-child order starting from the link that is nobody's child
+        children = {}
+        for child, joint in joints.items():
+            children.setdefault(joint.find("parent").get("link"), []).append(child)
+        roots = [link for link in links if link not in joints]
+        if len(roots) != 1:
+            raise ValueError(f"{path}: expected one root link, found {roots}")
+        order = []
+        stack = roots[:]
+        while stack:
+            link = stack.pop()
+            order.append(link)
+            # Reversed so siblings keep file order
+            stack.extend(reversed(children.get(link, [])))
+
+        link_pos = {link: i for i, link in enumerate(order)}
+        # Joint values follow the URDF's order of actuated joints
+        actuated = [j for j in root_el.findall("joint") if j.get("type") in ACTUATED]
+        joint_names = [j.get("name") for j in actuated]
+        limits = []
+        for joint in actuated:
+            limit = joint.find("limit")
+            if joint.get("type") == "continuous" or limit is None:
+                limits.append((-np.inf, np.inf))
+            else:
+                limits.append((float(limit.get("lower", "-inf")), float(limit.get("upper", "inf"))))
+
+        parents, origins, joint_types, axes, columns = [], [], [], [], []
+        for link in order:
+            joint = joints.get(link)
+            if joint is None:
+                parents.append(-1)
+                origins.append(np.eye(4))
+                joint_types.append("fixed")
+                axes.append((0.0, 0.0, 1.0))
+                columns.append(-1)
+                continue
+            parents.append(link_pos[joint.find("parent").get("link")])
+            origins.append(_parse_origin(joint.find("origin")))
+            joint_types.append(joint.get("type"))
+            axis_el = joint.find("axis")
+            axis = np.array([float(v) for v in axis_el.get("xyz").split()]) if axis_el is not None else np.array([1.0, 0, 0])
+            axes.append(axis / np.linalg.norm(axis))
+            columns.append(joint_names.index(joint.get("name")) if joint.get("type") in ACTUATED else -1)
+
+        visuals = []
+        link_elements = {link.get("name"): link for link in root_el.findall("link")}
+        for link in order:
+            # Collision meshes are coarse copies of the visuals; usable as a low LOD
+            coarse = {}
+            for collision in link_elements[link].findall("collision"):
+                mesh = collision.find("geometry/mesh")
+                if mesh is not None:
+                    coarse.setdefault(_origin_key(collision.find("origin"), mesh), mesh.get("filename"))
+            for visual in link_elements[link].findall("visual"):
+                mesh = visual.find("geometry/mesh")
+                if mesh is None:
+                    continue
+                scale = mesh.get("scale")
+                coarse_file = coarse.get(_origin_key(visual.find("origin"), mesh))
+                visuals.append(Visual(
+                    link_pos[link],
+                    _resolve_mesh(mesh.get("filename"), base_dir),
+                    _parse_origin(visual.find("origin")),
+                    np.array([float(v) for v in scale.split()]) if scale else np.ones(3),
+                    _resolve_mesh(coarse_file, base_dir) if coarse_file else "",
+                ))
+
+        return cls(order, parents, origins, joint_types, axes, columns, joint_names, limits, visuals,
+                   name=root_el.get("name", ""))
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def link_index(self, name: str) -> int:
+        return self._index[name]
+
+    def joint_vector(self, cfg: dict) -> np.ndarray:
+        """Joint values from a {joint name: value} dict (missing joints are 0)."""
+        return np.array([float(cfg.get(name, 0.0)) for name in self.joint_names])
+
+    def fk(self, q, links=None) -> np.ndarray:
+        """
+        World transforms of every link, or only of `links` (names or indices;
+        then only those links and their ancestors are evaluated).
+        q: (J,) or (N, J) joint values (extra trailing columns are ignored)
+        returns (L, 4, 4) or (N, L, 4, 4), L = len(links) when given
+        """
+        q = np.asarray(q, dtype=np.float64)
+        single = q.ndim == 1
+        q = q.reshape(-1, q.shape[-1])[:, :len(self.joint_names)]
+        n = len(q)
+        sin_q = np.sin(q)
+        cos_q = 1.0 - np.cos(q)
+
+        if links is None:
+            evaluated = range(len(self.link_names))
+        else:
+            targets = [self._index[link] if isinstance(link, str) else link for link in links]
+            needed = set()
+            for i in targets:
+                while i >= 0 and i not in needed:
+                    needed.add(i)
+                    i = self.parents[i]
+            evaluated = sorted(needed)  # links are stored parent-before-child
+        slot = {i: k for k, i in enumerate(evaluated)}
+
+        out = np.empty((n, len(slot), 4, 4))
+        local = np.zeros((n, 4, 4))
+        local[:, 3, 3] = 1.0
+        for i in evaluated:
+            parent = self.parents[i]
+            kind = self.joint_types[i]
+            col = self.joint_columns[i]
+            origin = self.origins[i]
+            if col < 0:
+                if parent < 0:
+                    out[:, slot[i]] = origin
+                else:
+                    np.matmul(out[:, slot[parent]], origin, out=out[:, slot[i]])
+                continue
+
+            if kind == "prismatic":
+                local[:, :3, :3] = origin[:3, :3]
+                local[:, :3, 3] = origin[:3, 3] + q[:, col, None] * self._slide[i]
+            else:
+                local[:, :3, :3] = (origin[:3, :3]
+                                    + sin_q[:, col, None, None] * self._rot_sin[i]
+                                    + cos_q[:, col, None, None] * self._rot_cos[i])
+                local[:, :3, 3] = origin[:3, 3]
+            if parent < 0:
+                out[:, slot[i]] = local
+            else:
+                np.matmul(out[:, slot[parent]], local, out=out[:, slot[i]])
+        if links is not None:
+            out = out[:, [slot[i] for i in targets]]
+        return out[0] if single else out
+
+
+def _parse_origin(element) -> np.ndarray:
+    if element is None:
+        return np.eye(4)
+    xyz = [float(v) for v in element.get("xyz", "0 0 0").split()]
+    rpy = [float(v) for v in element.get("rpy", "0 0 0").split()]
+    return origin_matrix(xyz, rpy)
+
+
+def _origin_key(origin, mesh):
+    """Frame of a visual/collision mesh, so the coarse mesh can stand in for the visual."""
+    return tuple(np.round(_parse_origin(origin), 9).ravel()) + (mesh.get("scale", ""),)
+
+
+def _resolve_mesh(filename: str, base_dir: str) -> str:
+    """Mesh paths in ur5_g.urdf are absolute paths from the author's machine; fall back to the copy next to the URDF."""
+    if filename.startswith("package://"):
+        filename = filename[len("package://"):]
+    candidates = [filename, os.path.join(base_dir, filename)]
+    parts = filename.replace("\\", "/").split("/")
+    candidates.append(os.path.join(base_dir, *parts[-2:]))
+    candidates.append(os.path.join(base_dir, parts[-1]))
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return filename
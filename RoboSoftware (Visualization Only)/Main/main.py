@@ -1,9 +1,16 @@
-import csv
+import os
 import sys
+import time
+from collections import deque
+
+from startup import StartupTrace, VizLoader
+
+# Started before the other imports so the trace covers them
+startup_trace = StartupTrace()
 
 import numpy as np
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QObject, Qt, QTimer
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog
 
@@ -11,14 +18,24 @@ from ui_main import Ui_MainWindow
 
 import functions  # Ctypes functions
 
-from robo_viz import RobotVisualizer
 from blockly import BlocklyManager
+import program_io
+from program_model import ProgramModel
+from robot_io import ProgramRunner, RobotIOWorker, lock_and_disconnect
+from telemetry import TelemetryPoller
+
+startup_trace.mark("imports")
 
 # Global variables
 ROBOT_NAME = "MyRobot"
 ROBOT_IP = "192.168.3.15"
 ROBOT_PORT = "6001"
 wspeed = 30  # default speed
+TELEMETRY_INTERVAL_MS = 100  # one shared controller read for all widgets
+PREVIEW_DELAY_MS = 300  # program edits refresh the path preview after this pause
+PROGRAM_LOOKAHEAD = 0.0  # s; > 0 only if functions.motion_buffer() > 0 (libnrc_host: 0)
+PROGRAM_FILE_FILTER = "Programs (*.rprog);;CSV Files (*.csv)"
+TERMINAL_FLUSH_MS = 50  # printed lines reach the terminal widget in batches, 20 per second at most
 
 # For Action Tab
 current_step_index = 0
@@ -30,17 +47,33 @@ off_path = "E:/College/projects/RoboSoftware/Icons/off.svg"
 lock_path = "E:/College/projects/RoboSoftware/Icons/Lock.svg"
 unlock_path = "E:/College/projects/RoboSoftware/Icons/unlock.svg"
 # Class to redirect print statements to QPlainTextEdit
-class EmittingStream:
+class EmittingStream(QObject):
+    # print() from any thread (Blockly runs) only queues the text; a GUI-thread
+    # timer appends everything queued in one go, so a tight loop that prints
+    # every block costs a deque append per line instead of a widget update
     def __init__(self, text_edit):
+        super().__init__(text_edit)
         self.text_edit = text_edit  # QPlainTextEdit object
+        self.pending = deque()  # appends/pops are thread-safe
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self._append)
+        self.flush_timer.start(TERMINAL_FLUSH_MS)
 
     def write(self, text):
         if text.strip() != "":
-            self.text_edit.appendPlainText(text.strip())
-            # Scroll to the bottom automatically
-            self.text_edit.verticalScrollBar().setValue(
-                self.text_edit.verticalScrollBar().maximum()
-            )
+            self.pending.append(text.strip())
+
+    def _append(self):
+        if not self.pending:
+            return
+        lines = []
+        while self.pending:
+            lines.append(self.pending.popleft())
+        self.text_edit.appendPlainText("\n".join(lines))
+        # Scroll to the bottom automatically
+        self.text_edit.verticalScrollBar().setValue(
+            self.text_edit.verticalScrollBar().maximum()
+        )
 
     def flush(self):
         pass  # Needed for compatibility with sys.stdout
@@ -50,6 +83,7 @@ class MainApp(QMainWindow):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
+        startup_trace.mark("ui setup")
         self.last_joints = None
         self.last_cart = None
         self.movement_threshold = 0.5  # Only update if change > 0.1 units
@@ -61,9 +95,18 @@ class MainApp(QMainWindow):
         self.unlock_icon_path = unlock_path
 
         
+        # All nrc_lib calls run on this thread, never on the GUI thread
+        self.robot_io = RobotIOWorker(self, clock=functions.clock)
+        self.robot_io.start()
+
+        # Single reader of robot state; labels, viz and Blockly share its snapshot
+        self.telemetry = TelemetryPoller(self.robot_io, lambda: ROBOT_NAME, TELEMETRY_INTERVAL_MS, self)
+        # The 3D view animates between samples itself, so it only needs each new one
+        self.telemetry.stateUpdated.connect(self.update_robot_viz)
+
         # Redirect stdout to the terminal QPlainTextEdit
-        sys.stdout = EmittingStream(self.ui.terminal)
-        sys.stderr = EmittingStream(self.ui.terminal)  # optional: capture errors too
+        # One stream for both, so errors stay in order with the lines around them
+        sys.stdout = sys.stderr = EmittingStream(self.ui.terminal)
 
         #============/Button Mappings\============#
         # Save config button
@@ -84,7 +127,7 @@ class MainApp(QMainWindow):
         self.ui.stop.clicked.connect(self.on_estop_click)
 
         # Connect coordinate mode change to label update
-        self.ui.coord_mode_combo.currentIndexChanged.connect(self.update_robot_labels)
+        self.ui.coord_mode_combo.currentIndexChanged.connect(self.on_coord_mode_changed)
 
 
         # Speed Control
@@ -160,10 +203,14 @@ class MainApp(QMainWindow):
         self.ui.saveL_btn.clicked.connect(self.save_program)
         self.ui.load_btn.clicked.connect(self.load_program)
         self.ui.clearT_btn.clicked.connect(self.clear_table)
+        self.setup_program_view()
 
-            # Timer for polling robot state
-        self.run_timer = QTimer()
-        self.run_timer.timeout.connect(self.check_robot_state)
+            # Whole program runs as one job on the I/O worker
+        self.program_runner = ProgramRunner(self.robot_io, self)
+        self.program_runner.stepStarted.connect(self.on_step_started)
+        self.program_runner.loopFinished.connect(self.on_loop_finished)
+        self.program_runner.programFinished.connect(self.on_program_finished)
+        self.loop_times = 0
 
         # Timer for updating labels
         self.label_timer = QTimer()
@@ -172,14 +219,72 @@ class MainApp(QMainWindow):
         
 
         #===================/Robot Visualization Tab\===================#
-        self.robot_viz = RobotVisualizer(self.ui.robot_viz_frame)
+        # Built once VizLoader has imported pyvista and loaded the model off the GUI thread
+        self.robot_viz = None
+        self.viz_loader = None
+        self._viz_placeholder = self._show_placeholder(self.ui.robot_viz_frame, "Loading 3D view…")
+        self.setup_path_preview()
 
         #===================/Blockly Tab\===================#
+        # The web view is only created when the Blockly tab is first opened
         self.blockly_manager = BlocklyManager(self)
-        self.blockly_manager.setup()
+        self._blockly_placeholder = self._show_placeholder(self.ui.blocklyContainer, "Loading Blockly…")
+        self.ui.tabWidget.currentChanged.connect(self.on_tab_changed)
 
+        startup_trace.mark("main window")
         print("Application started...")  # Test print
 
+    #============/Deferred startup\============#
+    def load_deferred_assets(self):
+        """Runs once the window is on screen: 3D assets in the background, Blockly if its tab is open."""
+        startup_trace.mark("first event loop pass")
+        self.viz_loader = VizLoader(self)
+        self.viz_loader.loaded.connect(self.on_viz_loaded)
+        self.viz_loader.failed.connect(self.on_viz_failed)
+        self.viz_loader.start()
+        if self.ui.tabWidget.currentWidget() is self.ui.Blockly:
+            self.setup_blockly()
+
+    def on_viz_loaded(self, robo_viz, model, timings):
+        for phase, (began, ended) in timings.items():
+            startup_trace.span(phase, began, ended, "background")
+        began = time.perf_counter()
+        self.robot_viz = robo_viz.RobotVisualizer(self.ui.robot_viz_frame, model=model)
+        self.ui.robot_viz_frame.layout().replaceWidget(self._viz_placeholder, self.robot_viz)
+        self._viz_placeholder.deleteLater()
+        startup_trace.span("build 3D view", began, time.perf_counter())
+        self.refresh_path_preview()
+        print(startup_trace.report())
+
+    def on_viz_failed(self, message):
+        print(f"❌ 3D view unavailable: {message}")
+        self._viz_placeholder.setText("3D view unavailable")
+
+    def on_tab_changed(self, index):
+        if self.ui.tabWidget.widget(index) is self.ui.Blockly:
+            self.setup_blockly()
+
+    def setup_blockly(self):
+        if self._blockly_placeholder is None:
+            return  # already set up
+        began = time.perf_counter()
+        self.blockly_manager.setup()
+        self._blockly_placeholder.deleteLater()
+        self._blockly_placeholder = None
+        ended = time.perf_counter()
+        startup_trace.span("Blockly view", began, ended)
+        print(f"Blockly view created in {(ended - began) * 1000:.0f} ms")
+
+    def _show_placeholder(self, container, text):
+        layout = container.layout()
+        if layout is None:
+            layout = QtWidgets.QVBoxLayout(container)
+            layout.setContentsMargins(0, 0, 0, 0)
+        label = QtWidgets.QLabel(text, container)
+        label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(label)
+        return label
+
     #============/Functions\============#
 
     def update_robot_config(self, ip: str, port: str, name: str):
@@ -209,41 +314,55 @@ class MainApp(QMainWindow):
         if self.ui.speed_slider.value() != wspeed:
             self.ui.speed_slider.setValue(wspeed)
 
-    def _apply_servo_state(self, locked: bool) -> bool:
-        """Set servo state and update UI feedback."""
-        try:
-            if locked:
-                functions.set_servo_state(0, ROBOT_NAME)
-                functions.set_servo_poweroff(ROBOT_NAME)
-                self.servo_locked = True
-                self.ui.lock.setIcon(QIcon(self.lock_icon_path))
-            else:
-                functions.set_servo_state(1, ROBOT_NAME)
-                functions.set_servo_poweron(ROBOT_NAME)
-                self.servo_locked = False
-                self.ui.lock.setIcon(QIcon(self.unlock_icon_path))
-            return True
-        except Exception as e:
+    def _apply_servo_state(self, locked: bool, on_done=None):
+        """
+        Set servo state on the I/O worker and update UI feedback when it is done.
+        The lock button stays disabled meanwhile; on_done(ok) runs afterwards.
+        """
+        self.ui.lock.setEnabled(False)
+
+        def finished(_result, error):
+            self.ui.lock.setEnabled(self.connected)
+            ok = self._servo_state_applied(locked, error)
+            if on_done is not None:
+                on_done(ok)
+
+        self.robot_io.submit(functions.set_servo_locked, locked, ROBOT_NAME, callback=finished)
+
+    def _servo_state_applied(self, locked: bool, error=None) -> bool:
+        """Record the outcome of a servo lock/unlock in the state and the lock icon."""
+        if error is not None:
             action = "lock" if locked else "unlock"
-            print(f"⚠️ Servo {action} failed: {e}")
+            print(f"⚠️ Servo {action} failed: {error}")
             return False
+        self.servo_locked = locked
+        self.ui.lock.setIcon(QIcon(self.lock_icon_path if locked else self.unlock_icon_path))
+        return True
 
-    def ensure_robot_ready(self, *, auto_unlock: bool = False, source: str = "operation") -> bool:
-        """Verify connection/servo state before motion, optionally auto-unlocking."""
+    def ensure_robot_ready(self, *, source: str = "operation", then=None) -> bool:
+        """
+        Verify connection/servo state before motion.  With `then`, a locked
+        servo is unlocked automatically and then() is called once it is.
+        """
         if not self.connected:
             print(f"❌ Cannot {source}: robot not connected.")
             return False
 
         if self.servo_locked:
-            if auto_unlock:
-                print(f"⚠️ {source.capitalize()} requires unlocked servo. Unlocking automatically...")
-                if not self._apply_servo_state(False):
-                    print(f"❌ Cannot {source}: failed to unlock servo.")
-                    return False
-                print("✅ Servo unlocked automatically.")
-            else:
+            if then is None:
                 print(f"❌ Cannot {source}: servo locked. Unlock the robot first.")
                 return False
+            print(f"⚠️ {source.capitalize()} requires unlocked servo. Unlocking automatically...")
+
+            def unlocked(ok):
+                if not ok:
+                    print(f"❌ Cannot {source}: failed to unlock servo.")
+                    return
+                print("✅ Servo unlocked automatically.")
+                then()
+
+            self._apply_servo_state(False, on_done=unlocked)
+            return False
 
         return True
 
@@ -266,44 +385,63 @@ class MainApp(QMainWindow):
         print(f"ROBOT_PORT = {ROBOT_PORT}")
    
     # --- Connect/Disconnect Button ---
+    # The button stays disabled until the controller has answered, so a second
+    # click can't start another connect or disconnect meanwhile
     def toggle_connection(self):
+        self.ui.on_off.setEnabled(False)
         if not self.connected:
             print("Connecting...")
-            status = functions.connect_robot(ROBOT_IP, ROBOT_PORT, ROBOT_NAME)
-            if status == 0:
-                print("✅ Robot connected")
-                self.connected = True
-                self.ui.on_off.setIcon(QIcon(self.on_icon_path))   # green
-                # assume safe state after connect = locked (power OFF) until user unlocks
-                self._apply_servo_state(True)
-                self.ui.lock.setEnabled(True)
-
-                # 👉 Start model update timer here
-                if not hasattr(self, "model_timer"):
-                    self.model_timer = QTimer()
-                    self.model_timer.timeout.connect(self.update_robot_viz)
-                self.model_timer.start(33) # ~30 FPS
-            else:
-                print("❌ Connect failed")
-                self.connected = False
-                self.ui.on_off.setIcon(QIcon(self.off_icon_path))  # red
-                self.ui.lock.setEnabled(False)
-                self.ui.lock.setIcon(QIcon(self.lock_icon_path))
-        else:
-            # on disconnect, force lock (power OFF), then disconnect
-            if not self._apply_servo_state(True):
-                print("⚠️ Power-off during disconnect failed")
 
-            functions.disconnect_robot(ROBOT_NAME)
-            print("Robot disconnected")
+            def connected(status, error):
+                self._connect_finished(status, error)
+                if self.connected:
+                    # assume safe state after connect = locked (power OFF) until user unlocks
+                    self._apply_servo_state(True)
+                self.ui.on_off.setEnabled(True)
+
+            self.robot_io.submit(functions.connect_robot, ROBOT_IP, ROBOT_PORT, ROBOT_NAME, callback=connected)
+        else:
+            # on disconnect, stop any program, force lock (power OFF), then disconnect
+            self._disconnect_started()
+
+            def disconnected(power_off_error, error):
+                self._disconnect_finished(power_off_error, error)
+                self.ui.on_off.setEnabled(True)
+
+            self.robot_io.submit(lock_and_disconnect, ROBOT_NAME, callback=disconnected)
+
+    def _connect_finished(self, status, error=None):
+        """GUI side of a connect_robot that returned status (or raised error)."""
+        if error is None and status == 0:
+            print("✅ Robot connected")
+            self.connected = True
+            self.ui.on_off.setIcon(QIcon(self.on_icon_path))   # green
+            self.telemetry.set_coord(self.current_coord_value())
+            self.telemetry.start()
+        else:
+            print(f"❌ Connect failed: {error}" if error is not None else "❌ Connect failed")
             self.connected = False
-            self.ui.on_off.setIcon(QIcon(self.off_icon_path))      # red
+            self.ui.on_off.setIcon(QIcon(self.off_icon_path))  # red
             self.ui.lock.setEnabled(False)
             self.ui.lock.setIcon(QIcon(self.lock_icon_path))
 
-            # 👉 Stop model update timer
-            if hasattr(self, "model_timer"):
-                self.model_timer.stop()
+    def _disconnect_started(self):
+        self.stop_program()
+        self.telemetry.stop()
+
+    def _disconnect_finished(self, power_off_error=None, error=None):
+        """GUI side of robot_io.lock_and_disconnect."""
+        if power_off_error is not None:
+            print(f"⚠️ Power-off during disconnect failed: {power_off_error}")
+        else:
+            self.servo_locked = True
+        if error is not None:
+            print(f"⚠️ Disconnect failed: {error}")
+        print("Robot disconnected")
+        self.connected = False
+        self.ui.on_off.setIcon(QIcon(self.off_icon_path))      # red
+        self.ui.lock.setEnabled(False)
+        self.ui.lock.setIcon(QIcon(self.lock_icon_path))
 
     # --- Lock/Unlock Button ---
     def toggle_servo_lock(self):
@@ -312,11 +450,9 @@ class MainApp(QMainWindow):
             return
 
         if self.servo_locked:
-            if self._apply_servo_state(False):
-                print("🔓 Servo UNLOCKED (power ON)")
+            self._apply_servo_state(False, on_done=lambda ok: ok and print("🔓 Servo UNLOCKED (power ON)"))
         else:
-            if self._apply_servo_state(True):
-                print("🔒 Servo LOCKED (power OFF)")
+            self._apply_servo_state(True, on_done=lambda ok: ok and print("🔒 Servo LOCKED (power OFF)"))
 
     # --- Emergency Stop Button ---
     def on_estop_click(self):
@@ -328,15 +464,15 @@ class MainApp(QMainWindow):
             self.stop_engaged = False
 
         if not self.stop_engaged:
-            # Engage stop: Lock servos
-            if self._apply_servo_state(True):
-                print("Emergency Stop ENGAGED: Servos Locked")
+            # Engage stop: halt the programs, then lock servos
+            self.stop_program()
+            self.blockly_manager.stop_program()
+            self._apply_servo_state(True, on_done=lambda ok: ok and print("Emergency Stop ENGAGED: Servos Locked"))
 
             self.stop_engaged = True
         else:
             # Release stop: Unlock servos
-            if self._apply_servo_state(False):
-                print("Emergency Stop RELEASED: Servos Unlocked")
+            self._apply_servo_state(False, on_done=lambda ok: ok and print("Emergency Stop RELEASED: Servos Unlocked"))
 
             # Remove border (reset style so global stylesheet applies again)
             self.ui.stop.setStyleSheet("")
@@ -370,23 +506,28 @@ class MainApp(QMainWindow):
         """
         if not self.ensure_robot_ready(source="jog joint"):
             return
-        try:
-            status = functions.move_joint_relative(
-                joint_index=joint_index,
-                delta=10.0 * direction,
-                vel=wspeed,        # use global speed
-                acc=30,
-                dec=30,
-                robot_name=ROBOT_NAME
-            )
+
+        def on_done(status, error):
+            if error is not None:
+                print(f"Error moving Joint {joint_index}:", error)
+                return
             # Update labels after jog
             self.update_robot_labels()
             if status == 0:
                 print(f"✅ Joint {joint_index+1} moved {10*direction}")
             else:
                 print(f"❌ robot_movej failed with code {status}")
-        except Exception as e:
-            print(f"Error moving Joint {joint_index}:", e)
+
+        self.robot_io.submit(
+            functions.move_joint_relative,
+            joint_index=joint_index,
+            delta=10.0 * direction,
+            vel=wspeed,        # use global speed
+            acc=30,
+            dec=30,
+            robot_name=ROBOT_NAME,
+            callback=on_done,
+        )
 
     # --- generic linear jog ---
     def jog_linear(self, axis_index: int, direction: int):
@@ -395,93 +536,109 @@ class MainApp(QMainWindow):
         """
         if not self.ensure_robot_ready(source="linear jog"):
             return
-        try:
-            functions.linear_jog(
-                axis_index=axis_index,
-                delta=50.0 * direction,
-                vel=wspeed * 5,   # linear jog is usually faster, scale it
-                acc=30,
-                dec=30,
-                robot_name=ROBOT_NAME
-            )
+
+        def on_done(_status, error):
+            if error is not None:
+                print(f"Error moving axis {axis_index}:", error)
+                return
             # Update labels after jog
             self.update_robot_labels()
             axis_name = ["X", "Y", "Z"][axis_index]
             print(f"✅ {axis_name} {50*direction} units")
-        except Exception as e:
-            print(f"Error moving axis {axis_index}:", e)
+
+        self.robot_io.submit(
+            functions.linear_jog,
+            axis_index=axis_index,
+            delta=50.0 * direction,
+            vel=wspeed * 5,   # linear jog is usually faster, scale it
+            acc=30,
+            dec=30,
+            robot_name=ROBOT_NAME,
+            callback=on_done,
+        )
 
     # --- Update Robot Position Labels ---
+    def current_coord_value(self) -> int:
+        mode = self.ui.coord_mode_combo.currentText()
+        mode_map = {
+            "Tool": 0,
+            "Origin": 1,
+            "Base": 2,
+        }
+        return mode_map.get(mode, 0)
+
+    def on_coord_mode_changed(self):
+        self.telemetry.set_coord(self.current_coord_value())
+        self.last_cart = None
+        if self.connected:
+            self.telemetry.poll()
+
     def update_robot_labels(self):
         if not self.connected:
             return
 
-        try:
-            mode = self.ui.coord_mode_combo.currentText()
-            mode_map = {
-                "Tool": 0,
-                "Origin": 1,
-                "Base": 2,
-            }
-            coord_val = mode_map.get(mode, 0)
-            functions.set_current_coord(coord_val, ROBOT_NAME)
+        state = self.telemetry.latest
+        if state is None or state.coord != self.current_coord_value():
+            return  # first snapshot for this frame not in yet
 
-            joints = functions.get_current_position(ROBOT_NAME, coord=0)
-            cart = functions.get_current_position(ROBOT_NAME, coord=coord_val)
+        joints, cart = state.joints, state.cart
 
-            # Check for significant movement
-            update_needed = False
-            if self.last_joints is None or self.last_cart is None:
-                update_needed = True
-            else:
+        # Check for significant movement
+        update_needed = False
+        if self.last_joints is None or self.last_cart is None:
+            update_needed = True
+        else:
+            for i in range(6):
+                if abs(joints[i] - self.last_joints[i]) > self.movement_threshold:
+                    update_needed = True
+                    break
+            if not update_needed:
                 for i in range(6):
-                    if abs(joints[i] - self.last_joints[i]) > self.movement_threshold:
+                    if abs(cart[i] - self.last_cart[i]) > self.movement_threshold:
                         update_needed = True
                         break
-                if not update_needed:
-                    for i in range(6):
-                        if abs(cart[i] - self.last_cart[i]) > self.movement_threshold:
-                            update_needed = True
-                            break
-
-            if update_needed:
-                self.ui.label_num_J1.setText(f"{joints[0]:.2f}")
-                self.ui.label_num_J2.setText(f"{joints[1]:.2f}")
-                self.ui.label_num_J3.setText(f"{joints[2]:.2f}")
-                self.ui.label_num_J4.setText(f"{joints[3]:.2f}")
-                self.ui.label_num_J5.setText(f"{joints[4]:.2f}")
-                self.ui.label_num_J6.setText(f"{joints[5]:.2f}")
-
-                self.ui.label_num_x.setText(f"{cart[2]:.2f}")
-                self.ui.label_num_y.setText(f"{cart[1]:.2f}")
-                self.ui.label_num_z.setText(f"{cart[0]:.2f}")
-                self.ui.label_num_rx.setText(f"{cart[3]:.2f}")
-                self.ui.label_num_ry.setText(f"{cart[4]:.2f}")
-                self.ui.label_num_rz.setText(f"{cart[5]:.2f}")
-
-                self.last_joints = joints
-                self.last_cart = cart
 
-        except Exception as e:
-            print(f"⚠️ Failed to update robot labels: {e}")
+        if update_needed:
+            self.ui.label_num_J1.setText(f"{joints[0]:.2f}")
+            self.ui.label_num_J2.setText(f"{joints[1]:.2f}")
+            self.ui.label_num_J3.setText(f"{joints[2]:.2f}")
+            self.ui.label_num_J4.setText(f"{joints[3]:.2f}")
+            self.ui.label_num_J5.setText(f"{joints[4]:.2f}")
+            self.ui.label_num_J6.setText(f"{joints[5]:.2f}")
+
+            self.ui.label_num_x.setText(f"{cart[2]:.2f}")
+            self.ui.label_num_y.setText(f"{cart[1]:.2f}")
+            self.ui.label_num_z.setText(f"{cart[0]:.2f}")
+            self.ui.label_num_rx.setText(f"{cart[3]:.2f}")
+            self.ui.label_num_ry.setText(f"{cart[4]:.2f}")
+            self.ui.label_num_rz.setText(f"{cart[5]:.2f}")
+
+            self.last_joints = joints
+            self.last_cart = cart
             
     # --- Go Home Button ---        
     def go_home(self, use_library_home=False):
         if not self.ensure_robot_ready(source="go home"):
             return
 
-        try:
+        def on_done(_status, error):
+            if error is not None:
+                print(f"❌ Failed to move to home: {error}")
+                return
             if use_library_home:
-                functions.robot_go_home(ROBOT_NAME)
                 print("✅ Robot moved to home using library function")
             else:
-                pos = [0.0]*7
-                functions.robot_movej(pos, vel=60, coord=0, acc=30, dec=30, robot_name=ROBOT_NAME)
                 print("✅ Robot moved to home (all-zero joints)")
-            
             self.update_robot_labels()
-        except Exception as e:
-            print(f"❌ Failed to move to home: {e}")
+
+        if use_library_home:
+            self.robot_io.submit(functions.robot_go_home, ROBOT_NAME, callback=on_done)
+        else:
+            pos = [0.0]*7
+            self.robot_io.submit(
+                functions.robot_movej, pos, vel=60, coord=0, acc=30, dec=30, robot_name=ROBOT_NAME,
+                callback=on_done,
+            )
 
     # --- Clear Error Button ---
     def on_clear_error_click(self):
@@ -489,34 +646,85 @@ class MainApp(QMainWindow):
             print("❌ Robot not connected, cannot clear errors")
             return
 
-        try:
-            status = functions.clear_error(ROBOT_NAME)
-            if status == 0:
+        def on_done(status, error):
+            if error is not None:
+                print(f"⚠️ Exception while clearing errors: {error}")
+            elif status == 0:
                 print("✅ Robot errors cleared successfully")
             else:
                 print(f"❌ Failed to clear errors, code: {status}")
-        except Exception as e:
-            print(f"⚠️ Exception while clearing errors: {e}")
+
+        self.robot_io.submit(functions.clear_error, ROBOT_NAME, callback=on_done)
 
     #=======|Action Tab|=======#
+    def setup_program_view(self):
+        """Swap the designer's QTableWidget for a QTableView on the NumPy-backed ProgramModel."""
+        old = self.ui.programTable
+        headers = [old.horizontalHeaderItem(col).text() for col in range(old.columnCount())]
+        self.program_model = ProgramModel(headers, self)
+
+        view = QtWidgets.QTableView(old.parentWidget())
+        view.setObjectName(old.objectName())
+        view.setAlternatingRowColors(old.alternatingRowColors())
+        view.setSelectionMode(old.selectionMode())
+        view.setSelectionBehavior(old.selectionBehavior())
+        view.horizontalHeader().setStretchLastSection(False)
+        # Fixed row height: the view never measures rows it doesn't paint
+        view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        view.setModel(self.program_model)
+
+        self.ui.gridLayout_8.replaceWidget(old, view)
+        old.deleteLater()
+        self.ui.programTable = view
+
+    def setup_path_preview(self):
+        """'Preview Path' toggle next to Run: overlays the program's tool path in the 3D view."""
+        self.preview_btn = QtWidgets.QPushButton("Preview Path", self.ui.actionC_btns_box)
+        self.preview_btn.setCheckable(True)
+        self.preview_btn.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        self.preview_btn.setMinimumHeight(50)
+        self.ui.horizontalLayout_20.insertWidget(1, self.preview_btn)
+        self.preview_btn.toggled.connect(self.refresh_path_preview)
+
+        # Edits refresh the preview once they pause, not on every row
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self._preview_timer.timeout.connect(self.refresh_path_preview)
+        for signal in (self.program_model.modelReset, self.program_model.rowsInserted,
+                       self.program_model.rowsRemoved, self.program_model.dataChanged):
+            signal.connect(self._schedule_path_preview)
+
+    def _schedule_path_preview(self, *_args):
+        if self.preview_btn.isChecked():
+            self._preview_timer.start()
+
+    def refresh_path_preview(self, *_args):
+        if self.robot_viz is None:
+            return  # shown once the 3D view has loaded
+        try:
+            if self.preview_btn.isChecked():
+                self.robot_viz.show_program_path(self.program_model.waypoints)
+            else:
+                self.robot_viz.clear_program_path()
+        except Exception as e:
+            print(f"❌ Path preview failed: {e}")
+
+    def selected_step(self) -> int:
+        index = self.ui.programTable.currentIndex()
+        return index.row() if index.isValid() else -1
+
         # --- Save Current Position as New Step ---
     def save_step(self):
         if not self.connected:
             print("❌ Cannot save step: robot not connected.")
             return
-        row = self.ui.programTable.rowCount()
-        self.ui.programTable.insertRow(row)
 
-        step_no = row + 1
-        pos = functions.get_current_position(ROBOT_NAME, coord=0)
-        # Ensure pos has 7 elements
-        while len(pos) < 7:
-            pos.append(0.0)
+        def read(pos):
+            self.program_model.append(pos)
+            print(f"Step {len(self.program_model)} saved.")
 
-        self.ui.programTable.setItem(row, 0, QtWidgets.QTableWidgetItem(str(step_no)))
-        for i, val in enumerate(pos, start=1):
-            self.ui.programTable.setItem(row, i, QtWidgets.QTableWidgetItem(f"{val:.2f}"))
-        print(f"Step {step_no} saved.")
+        self._read_position(self.ui.save_btn, read)
 
         # --- Edit Selected Row ---
     def edit_step(self):
@@ -524,13 +732,11 @@ class MainApp(QMainWindow):
             print("❌ Cannot edit step: robot not connected.")
             return
         else:
-            row = self.ui.programTable.currentRow()
+            row = self.selected_step()
             if row < 0:
                 print(self, "No Selection", "Please select a row to edit.")
                 return
-            pos = functions.get_current_position(ROBOT_NAME, coord=0)
-            for i, val in enumerate(pos, start=1):
-                self.ui.programTable.setItem(row, i, QtWidgets.QTableWidgetItem(f"{val:.2f}"))
+            self._read_position(self.ui.edit_btn, lambda pos: self.program_model.set_waypoint(row, pos))
 
         # --- Insert Below Selected Row ---
     def insert_step(self):
@@ -538,19 +744,23 @@ class MainApp(QMainWindow):
             print("❌ Cannot insert step: robot not connected.")
             return
         else:
-            row = self.ui.programTable.currentRow()
-            if row < 0: row = self.ui.programTable.rowCount() - 1
-            self.ui.programTable.insertRow(row + 1)
+            row = self.selected_step()
+            if row < 0: row = len(self.program_model) - 1
+
+            self._read_position(self.ui.insert_btn, lambda pos: self.program_model.insert(row + 1, pos))
 
-            pos = functions.get_current_position(ROBOT_NAME, coord=0)
-            while len(pos) < 7:
-                pos.append(0.0)
+    def _read_position(self, button, on_read):
+        """Read the joint position on the I/O worker, then on_read(pos); button is disabled meanwhile."""
+        button.setEnabled(False)
 
-            self.ui.programTable.setItem(row + 1, 0, QtWidgets.QTableWidgetItem(str(row + 2)))
-            for i, val in enumerate(pos, start=1):
-                self.ui.programTable.setItem(row + 1, i, QtWidgets.QTableWidgetItem(f"{val:.2f}"))
+        def finished(pos, error):
+            button.setEnabled(True)
+            if error is not None:
+                print(f"❌ Failed to read current position: {error}")
+                return
+            on_read(pos)
 
-            self.renumber_steps()
+        self.robot_io.submit(functions.get_current_position, ROBOT_NAME, coord=0, callback=finished)
 
         # --- Delete Selected Row ---
     def delete_step(self):
@@ -558,175 +768,155 @@ class MainApp(QMainWindow):
             print("❌ Cannot delete step: robot not connected.")
             return
         else:
-            row = self.ui.programTable.currentRow()
+            row = self.selected_step()
             if row >= 0:
-                self.ui.programTable.removeRow(row)
-                self.renumber_steps()
-
-        # --- Renumber Steps ---
-    def renumber_steps(self):
-        for row in range(self.ui.programTable.rowCount()):
-            self.ui.programTable.setItem(row, 0, QtWidgets.QTableWidgetItem(str(row + 1)))
+                self.program_model.remove(row)
 
         # --- Run Program ---
     def run_program(self):
-        if not self.ensure_robot_ready(auto_unlock=True, source="run program"):
+        if not self.ensure_robot_ready(source="run program", then=self.run_program):
             return
-        global current_step_index, program_running
-        if self.ui.programTable.rowCount() == 0:
+        if len(self.program_model) == 0:
             print(self, "No Program", "No steps available.")
             return
+        self.start_program(loops=1)
 
-        program_running = True
-        current_step_index = 0
-        self.execute_step(current_step_index)
-        self.run_timer.start(200)  # poll every 200 ms
-
-        # --- Execute Step ---
-    def execute_step(self, index):
-        if not self.ensure_robot_ready(source="execute step"):
-            return
-        row = index
-        pos = []
-        for col in range(1, 7):  # J1..J6 (columns 1-7)
-            item = self.ui.programTable.item(row, col)
-            if item is None or item.text().strip() == "":
-                print(f"❌ Step {row+1}, column {col}: missing or empty value.")
-                return
-            try:
-                val = float(item.text())
-            except ValueError:
-                print(f"❌ Step {row+1}, column {col}: invalid number '{item.text()}'.")
-                return
-            pos.append(val)
-
-        # Send command to robot
-        while len(pos) < 7:
-            pos.append(0.0)
-        
-        functions.robot_movej(pos, vel=wspeed, coord=0, acc=30, dec=30, robot_name=ROBOT_NAME)
-       
         # Loop control
     def start_loop(self):
-        if not self.ensure_robot_ready(auto_unlock=True, source="start loop"):
+        if not self.ensure_robot_ready(source="start loop", then=self.start_loop):
             return
         loop_times = self.ui.loop_count.value()
         if loop_times < 1:
             print("❌ Loop count must be at least 1.")
             return
-        if self.ui.programTable.rowCount() == 0:
+        if len(self.program_model) == 0:
             print("❌ No steps to loop.")
             return
+        self.start_program(loops=loop_times)
 
-        self.loop_times = loop_times
-        self.loop_counter = 0
-        self.start_program_loop()
-    def start_program_loop(self):
+    def start_program(self, loops):
         global current_step_index, program_running
-        program_running = True
-        current_step_index = 0
-        self.loop_counter += 1
-        print(f"🔁 Loop {self.loop_counter} of {self.loop_times}")
-        self.execute_step(current_step_index)
-        self.run_timer.start(200)
-
-        # --- Poll Robot State ---
-    def check_robot_state(self):
-        if not self.connected:
-            print("❌ Cannot check robot state: robot not connected.")
+        if program_running:
+            print("⚠️ Program already running.")
             return
-        else:
-            global current_step_index, program_running
-            if not program_running:
-                self.run_timer.stop()
-                return
+        # Snapshot for the I/O thread; edits made while running apply next run
+        waypoints, params = self.program_model.run_snapshot()
 
-            state = functions.get_robot_running_state(ROBOT_NAME)  # 0=idle,1=running (assumed)
-            if state == 0:  # finished current move
-                current_step_index += 1
-            if current_step_index < self.ui.programTable.rowCount():
-                self.execute_step(current_step_index)
-            else:
-                # Finished all steps, check for loop
-                if hasattr(self, 'loop_times') and self.loop_counter < self.loop_times:
-                    self.start_program_loop()
-                else:
-                    program_running = False
-                    self.run_timer.stop()
-                    print(self, "Program Done", "All steps executed!")
-                    # Reset loop variables
-                    self.loop_counter = 0
-                    self.loop_times = 0
+        self.loop_times = loops
+        current_step_index = 0
+        program_running = self.program_runner.start(
+            waypoints, ROBOT_NAME, loops=loops, vel=wspeed, acc=30, dec=30, lookahead=PROGRAM_LOOKAHEAD,
+            params=params,
+        )
+
+    def stop_program(self):
+        if program_running:
+            self.program_runner.stop()
+
+        # --- Progress reported by the program runner ---
+    def on_step_started(self, loop, index):
+        global current_step_index
+        current_step_index = index
+        if index == 0 and self.loop_times > 1:
+            print(f"🔁 Loop {loop + 1} of {self.loop_times}")
+
+    def on_loop_finished(self, loop, seconds):
+        print(f"⏱️ Loop {loop + 1}: cycle time {seconds:.2f} s")
+
+    def on_program_finished(self, completed, message):
+        global program_running
+        program_running = False
+        self.loop_times = 0
+        if completed:
+            print(self, "Program Done", "All steps executed!")
+        elif message == "stopped":
+            print(f"⏹️ Program stopped at step {current_step_index + 1}.")
+        else:
+            print(f"❌ Step {current_step_index + 1} failed: {message}")
 
     def save_program(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save Program", "", "CSV Files (*.csv)")
+        path, selected = QFileDialog.getSaveFileName(self, "Save Program", "", PROGRAM_FILE_FILTER)
         if not path:
             return
         try:
-            with open(path, "w", newline="") as f:
-                writer = csv.writer(f)
-                for row in range(self.ui.programTable.rowCount()):
-                    row_data = []
-                    for col in range(self.ui.programTable.columnCount()):
-                        item = self.ui.programTable.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
+            model = self.program_model
+            params = model.params if model.has_params else None
+            if path.lower().endswith(".csv") or (selected.startswith("CSV") and "." not in os.path.basename(path)):
+                path = path if path.lower().endswith(".csv") else path + ".csv"
+                program_io.write_csv(path, model.waypoints, params, axes=model.shown_axes)
+            else:
+                path = path if path.lower().endswith(".rprog") else path + ".rprog"
+                mapped = model.mapped_path
+                if mapped is not None and os.path.normcase(mapped) == os.path.normcase(os.path.abspath(path)):
+                    # Windows can't replace a file that is still mapped
+                    if program_running:
+                        print("⚠️ Cannot overwrite the program file while it is running.")
+                        return
+                    model.release_file()
+                    params = model.params if model.has_params else None
+                program_io.save_program(path, model.waypoints, params)
             print(f"✅ Program saved to {path}")
         except Exception as e:
             print(f"❌ Failed to save program: {e}")
     def load_program(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Load Program", "", "CSV Files (*.csv)")
+        if program_running:
+            print("⚠️ Cannot load a program while one is running.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Load Program", "", PROGRAM_FILE_FILTER)
         if not path:
             return
         try:
-            with open(path, "r", newline="") as f:
-                reader = csv.reader(f)
-                self.ui.programTable.setRowCount(0)
-                for row_data in reader:
-                    row = self.ui.programTable.rowCount()
-                    self.ui.programTable.insertRow(row)
-                    for col, value in enumerate(row_data):
-                        self.ui.programTable.setItem(row, col, QtWidgets.QTableWidgetItem(value))
-            print(f"✅ Program loaded from {path}")
-            self.renumber_steps()
+            if path.lower().endswith(".csv"):
+                points, params = program_io.read_csv(path)
+                self.program_model.set_program(points, params)
+            else:
+                # Mapped, not read: the model copies only if the program gets edited
+                points, params = program_io.load_program(path)
+                self.program_model.set_program(points, params, copy=False)
+            print(f"✅ Program loaded from {path} ({len(self.program_model)} steps)")
         except Exception as e:
             print(f"❌ Failed to load program: {e}")
     def clear_table(self):
-        self.ui.programTable.setRowCount(0)
+        self.program_model.clear()
         print("✅ Program table cleared.")
 
     #===================/Robot Visualization Tab\===================#
-    def update_robot_viz(self):
+    def update_robot_viz(self, state):
         """
-        Called by label_timer every 300 ms.
-        Reads current joint positions from robot and updates visualization.
+        Called for every telemetry snapshot.
+        Pushes the joints, with their read time, to the visualization, which
+        interpolates between snapshots at display rate.
         """
-        if not self.connected:
-            print("❌ Cannot update viz: robot not connected. Showing default pose.")
-            return
-        
-        else:
-            try:
-               
-                pos = functions.get_current_position(ROBOT_NAME, coord=0)  
-                #pos = [j1, j2, j3, j4, j5, j6]
+        if self.robot_viz is None:
+            return  # 3D view still loading
+        try:
+            #pos = [j1, j2, j3, j4, j5, j6]
+            pos_rad = np.radians(state.joints)
+            # Map to URDF joint names
+            angles = {
+                "shoulder_pan_joint": pos_rad[0],
+                "shoulder_lift_joint": pos_rad[1],
+                "elbow_joint": pos_rad[2],
+                "wrist_1_joint": pos_rad[3],
+                "wrist_2_joint": pos_rad[4],
+                "wrist_3_joint": pos_rad[5],
+            }
 
-                pos_rad = np.radians(pos)
-                # Map to URDF joint names
-                angles = {
-                    "shoulder_pan_joint": pos_rad[0],
-                    "shoulder_lift_joint": pos_rad[1],
-                    "elbow_joint": pos_rad[2],
-                    "wrist_1_joint": pos_rad[3],
-                    "wrist_2_joint": pos_rad[4],
-                    "wrist_3_joint": pos_rad[5],
-                }
+            # Send to visualization
+            self.robot_viz.set_joint_angles(angles, state.timestamp)
 
-                # Send to visualization
-                self.robot_viz.set_joint_angles(angles)
+        except Exception as e:
+            print(f"update_robot_viz error: {e}")
 
-            except Exception as e:
-                print(f"update_robot_viz error: {e}")
+    def closeEvent(self, event):
+        self.stop_program()
+        self.blockly_manager.shutdown()
+        self.label_timer.stop()
+        self.telemetry.stop()
+        self.robot_io.stop()
+        if self.viz_loader is not None:
+            self.viz_loader.wait()
+        super().closeEvent(event)
 
 
 # Run the application
@@ -734,4 +924,7 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainApp()
     window.show()
+    startup_trace.mark("show window")
+    # Heavy assets load once the event loop has painted the window
+    QTimer.singleShot(0, window.load_deferred_assets)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,288 @@
+from typing import NamedTuple
+
+import numpy as np
+
+import functions
+from motion_profile import move_durations
+
+# Polling schedule for wait_motion_done (seconds)
+FAST_POLL = 0.005      # near the expected end of a move
+SLOW_POLL = 0.1        # upper bound while the move is far from done
+UNKNOWN_POLL = 0.02    # no duration estimate available
+END_MARGIN = 0.02      # start fast polling this long before the expected end
+START_GRACE = 0.1      # "idle" this soon after a command may mean "not started yet"
+STOP_CHECK = 0.05      # longest a program run sleeps before checking for a stop request
+MOTION_TIMEOUT = 30.0  # s; longest to wait past a move's predicted end for idle or room for the next
+
+
+class MotionResult(NamedTuple):
+    elapsed: float   # seconds from the call until idle was seen
+    polls: int       # running-state queries spent
+
+
+def wait_motion_done(get_state, expected: float = None, timeout: float = None, sleep=None, clock=None) -> MotionResult:
+    """
+    Block until the robot reports idle after a motion command.
+
+    get_state: callable returning get_robot_running_state (0 = idle)
+    expected:  predicted move time (motion_profile.move_duration); polling
+               stays slow until shortly before it, then switches to FAST_POLL
+    sleep:     how to wait between polls; on the robot I/O thread pass
+               RobotIOWorker.idle so queued commands keep running
+    """
+    clock = clock if clock is not None else functions.clock
+    sleep = sleep if sleep is not None else clock.sleep
+    grace = START_GRACE if expected is None else min(START_GRACE, expected)
+
+    t0 = clock.now()
+    if expected is not None and expected > END_MARGIN:
+        # Nothing useful to learn before the move can possibly be done
+        sleep(expected - END_MARGIN)
+
+    polls = 0
+    seen_running = False
+    while True:
+        state = get_state()
+        polls += 1
+        elapsed = clock.now() - t0
+        if state != 0:
+            seen_running = True
+        elif seen_running or elapsed >= grace:
+            return MotionResult(elapsed, polls)
+
+        if timeout is not None and elapsed >= timeout:
+            raise TimeoutError(f"motion not finished after {elapsed:.2f} s")
+        sleep(_next_interval(elapsed, expected))
+
+
+def _next_interval(elapsed: float, expected: float) -> float:
+    if expected is None:
+        return UNKNOWN_POLL
+    to_end = expected - END_MARGIN - elapsed
+    if to_end > FAST_POLL:
+        return min(SLOW_POLL, to_end)
+    # Past the prediction: stay fast at first, back off if the estimate was far off
+    overrun = max(0.0, elapsed - expected)
+    return min(SLOW_POLL, FAST_POLL + 0.1 * overrun)
+
+
+# -------------------------
+# Motions in flight
+# -------------------------
+class MotionTracker:
+    """
+    Motions sent without waiting for them, for Blockly's background moves.
+
+    Each send() returns a handle (1, 2, ...).  A controller without a motion
+    buffer (functions.motion_buffer() == 0, libnrc_host) replaces the
+    running move with a new one, so send() first waits for the robot to be
+    idle: the program goes on while a move runs, but the next move starts
+    only once it has ended.  A controller that buffers runs its moves in
+    order; send() then keeps at most `buffer` moves behind the running one
+    and retries a refused send while the robot is busy.
+
+    Each motion's end is predicted when it is sent: it starts when the
+    previous one ends and lasts its trapezoidal profile time (None: unknown,
+    e.g. library home).  wait(handle) sleeps until a motion's predicted end
+    while newer ones are queued behind it; waiting for the newest one, or
+    for all, is confirmed with get_robot_running_state (wait_motion_done).
+
+    get_state: callable returning get_robot_running_state
+    sleep:     how to wait; a Blockly run passes its interruptible sleep
+    buffer:    motion commands the controller holds; None asks functions.motion_buffer()
+    """
+
+    def __init__(self, get_state, sleep=None, clock=None, buffer: int = None):
+        self.get_state = get_state
+        self.clock = clock if clock is not None else functions.clock
+        self.sleep = sleep if sleep is not None else self.clock.sleep
+        self.buffer = buffer
+        self.pending = {}   # handle -> (predicted end or None, space, target), oldest first
+        self.last = 0
+
+    def send(self, move, expected: float = None, space=None, target=None) -> int:
+        """
+        move() sends one motion command and returns its status.  expected is
+        its predicted duration; space/target ("joint", [...]) let the next move
+        in the same space start from this target (pending_target).
+        """
+        buffer = functions.motion_buffer() if self.buffer is None else self.buffer
+        if buffer <= 0:
+            # A new move would cut the running one short
+            self.wait_all()
+        self._prune()
+        while len(self.pending) > buffer:
+            self.wait(next(iter(self.pending)))
+
+        status = move()
+        if status != 0 and buffer > 0:
+            # The prediction ran ahead of the robot: retry while the controller is still busy
+            deadline = max([self.clock.now()] + [end for end, _, _ in self.pending.values() if end is not None])
+            deadline += MOTION_TIMEOUT
+            while status != 0 and self.get_state() != 0 and self.clock.now() < deadline:
+                self.sleep(FAST_POLL)
+                status = move()
+        if status != 0:
+            raise Exception(f"motion command failed with code {status}")
+
+        now = self.clock.now()
+        start = now
+        if self.pending:
+            previous = self.pending[next(reversed(self.pending))][0]
+            start = None if previous is None else max(now, previous)
+        end = None if start is None or expected is None else start + expected
+        self.last += 1
+        self.pending[self.last] = (end, space, None if target is None else list(target))
+        return self.last
+
+    def wait(self, handle: int):
+        """Return once motion `handle` is done (at once if it already is, or is unknown)."""
+        if handle not in self.pending:
+            return
+        end = self.pending[handle][0]
+        if handle == self.last or end is None:
+            self.wait_all()
+            return
+        remaining = end - self.clock.now()
+        if remaining > 0:
+            self.sleep(remaining)
+        for older in [h for h in self.pending if h <= handle]:
+            del self.pending[older]
+
+    def wait_all(self):
+        """Return once every motion sent has finished and the robot is idle."""
+        if not self.pending:
+            return
+        end = self.pending[self.last][0]
+        expected = None if end is None else max(0.0, end - self.clock.now())
+        timeout = None if expected is None else expected + MOTION_TIMEOUT
+        wait_motion_done(self.get_state, expected=expected, timeout=timeout, sleep=self.sleep, clock=self.clock)
+        self.pending.clear()
+
+    def pending_target(self, space):
+        """Target of the newest motion if it is still in flight and moves in `space`, else None."""
+        self._prune()
+        if not self.pending:
+            return None
+        _, last_space, target = self.pending[self.last]
+        return target if last_space == space else None
+
+    def _prune(self):
+        # Predicted done, except the newest: only the controller can confirm that one
+        now = self.clock.now()
+        for handle in list(self.pending):
+            end = self.pending[handle][0]
+            if handle == self.last or end is None or end > now:
+                break
+            del self.pending[handle]
+
+
+# -------------------------
+# Waypoint programs
+# -------------------------
+class ProgramStopped(Exception):
+    """Raised inside run_waypoints when its stop_event is set."""
+
+
+def run_waypoints(handle, waypoints, loops: int = 1, vel: int = 30, acc: int = 30, dec: int = 30,
+                  lookahead: float = 0.0, sleep=None, clock=None, stop_event=None,
+                  on_step=None, on_loop=None, params=None, timeout: float = MOTION_TIMEOUT) -> list:
+    """
+    Run a joint program back to back without leaving the calling thread.
+
+    handle:    functions.RobotHandle; targets go through its reusable buffer
+    waypoints: (N, 7) float array, compiled once by the caller
+    params:    optional (N, 3) per-step vel/acc/dec; NaN falls back to vel/acc/dec
+    lookahead: 0 sends the next move as soon as the robot reports idle.  > 0
+               sends it this many seconds before the predicted end of the
+               running move; only for controllers that buffer a motion command
+               (functions.motion_buffer() > 0), since others replace the
+               running move.  A rejected send is retried while the robot is busy.
+    timeout:   how long past a move's predicted end to wait for the robot to
+               go idle or to accept the next move before giving up (TimeoutError)
+    on_step(loop, index) is called right after each move is accepted,
+    on_loop(loop, seconds) with each loop's cycle time (first send to first
+    send of the next loop; the last loop runs until the robot is idle).
+    Returns the list of cycle times.  On stop_event the running move is
+    halted with job_stop and ProgramStopped is raised.
+    """
+    clock = clock if clock is not None else functions.clock
+    sleep = sleep if sleep is not None else clock.sleep
+    waypoints = np.ascontiguousarray(waypoints, dtype=np.float64)
+    count = len(waypoints)
+    if count == 0:
+        return []
+    if lookahead > 0 and functions.motion_buffer() == 0:
+        raise ValueError("lookahead needs a controller that buffers motion commands")
+
+    def check_stop():
+        if stop_event is not None and stop_event.is_set():
+            handle.job_stop()
+            raise ProgramStopped("program stopped")
+
+    def pause(seconds):
+        # Sliced so a stop request is seen within STOP_CHECK
+        end = clock.now() + seconds
+        while True:
+            check_stop()
+            remaining = end - clock.now()
+            if remaining <= 0:
+                return
+            sleep(min(remaining, STOP_CHECK))
+
+    if params is not None:
+        steps = np.where(np.isnan(params), [vel, acc, dec], params).astype(int)
+        vels, accs, decs = steps[:, 0], steps[:, 1], steps[:, 2]
+    else:
+        vels, accs, decs = np.full(count, vel), np.full(count, acc), np.full(count, dec)
+
+    get_state = handle.get_robot_running_state
+    # Expected move times for every step, computed once
+    first_durations = move_durations(handle.read_joints(), waypoints, vels, accs, decs).tolist()
+    loop_durations = move_durations(waypoints[-1], waypoints, vels, accs, decs).tolist()
+    vels, accs, decs = vels.tolist(), accs.tolist(), decs.tolist()
+
+    cycles = []
+    busy_until = None   # predicted end of the last accepted move
+    loop_start = None
+    for loop in range(loops):
+        durations = first_durations if loop == 0 else loop_durations
+        for index in range(count):
+            if busy_until is not None:
+                if lookahead > 0:
+                    pause(busy_until - lookahead - clock.now())
+                else:
+                    remaining = max(0.0, busy_until - clock.now())
+                    wait_motion_done(get_state, expected=remaining, timeout=remaining + timeout,
+                                     sleep=pause, clock=clock)
+            check_stop()
+
+            status = handle.movej(waypoints[index], vels[index], 0, accs[index], decs[index])
+            if status != 0 and lookahead > 0:
+                deadline = max(clock.now(), busy_until) + timeout
+                while status != 0 and get_state() != 0:
+                    if clock.now() >= deadline:
+                        raise TimeoutError(f"controller still refusing the next move (code {status}) "
+                                           f"{timeout:.0f} s after the running one should have ended")
+                    pause(FAST_POLL)  # controller buffer still full
+                    status = handle.movej(waypoints[index], vels[index], 0, accs[index], decs[index])
+            if status != 0:
+                raise Exception(f"robot_movej failed with code {status}")
+
+            now = clock.now()
+            if index == 0:
+                if loop_start is not None:
+                    cycles.append(now - loop_start)
+                    if on_loop is not None:
+                        on_loop(loop - 1, cycles[-1])
+                loop_start = now
+            busy_until = max(now, busy_until if busy_until is not None else now) + durations[index]
+            if on_step is not None:
+                on_step(loop, index)
+
+    remaining = max(0.0, busy_until - clock.now())
+    wait_motion_done(get_state, expected=remaining, timeout=remaining + timeout, sleep=pause, clock=clock)
+    cycles.append(clock.now() - loop_start)
+    if on_loop is not None:
+        on_loop(loops - 1, cycles[-1])
+    return cycles
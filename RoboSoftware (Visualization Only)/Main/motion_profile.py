@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+
+# Controller limits used to turn the percentage vel/acc/dec arguments of
+# robot_movej/robot_movel into physical units.  Tune to the real arm.
+JOINT_MAX_VEL = 180.0      # deg/s   at vel=100
+JOINT_MAX_ACC = 720.0      # deg/s^2 at acc/dec=100
+LINEAR_MAX_VEL = 1000.0    # mm/s    (movel vel is given in mm/s, clamped here)
+LINEAR_MAX_ACC = 4000.0    # mm/s^2  at acc/dec=100
+
+MIN_PERCENT = 1.0
+
+
+class TrapezoidProfile:
+    """
+    Rest-to-rest trapezoidal velocity profile over `distance` (>= 0).
+    Falls back to a triangular profile when the move is too short to reach v.
+    """
+
+    def __init__(self, distance: float, v: float, a: float, d: float):
+        self.distance = abs(distance)
+        self.a = a
+        self.d = d
+        # Distances needed to reach/leave cruise speed
+        if v * v / (2 * a) + v * v / (2 * d) > self.distance:
+            v = math.sqrt(2 * self.distance * a * d / (a + d))
+        self.v = v
+        self.t_acc = v / a if a > 0 else 0.0
+        self.t_dec = v / d if d > 0 else 0.0
+        cruise_distance = self.distance - v * self.t_acc / 2 - v * self.t_dec / 2
+        self.t_cruise = cruise_distance / v if v > 0 else 0.0
+        self.duration = self.t_acc + self.t_cruise + self.t_dec
+
+    def position(self, t: float) -> float:
+        """Distance travelled after t seconds."""
+        if t <= 0 or self.distance == 0:
+            return 0.0
+        if t >= self.duration:
+            return self.distance
+        if t < self.t_acc:
+            return 0.5 * self.a * t * t
+        s_acc = 0.5 * self.v * self.t_acc
+        if t < self.t_acc + self.t_cruise:
+            return s_acc + self.v * (t - self.t_acc)
+        t_left = self.duration - t
+        return self.distance - 0.5 * self.d * t_left * t_left
+
+
+def _scale(percent, limit):
+    return limit * max(MIN_PERCENT, min(100.0, float(percent))) / 100.0
+
+
+def move_profile(start, target, vel, acc, dec, cartesian: bool = False) -> TrapezoidProfile:
+    """
+    Synchronized point-to-point profile: the axis with the largest travel
+    sets the timing and every other axis follows the same normalized curve.
+    """
+    distance = max((abs(t - s) for s, t in zip(start, target)), default=0.0)
+    if cartesian:
+        v = min(LINEAR_MAX_VEL, max(MIN_PERCENT, float(vel)))
+        a = _scale(acc, LINEAR_MAX_ACC)
+        d = _scale(dec, LINEAR_MAX_ACC)
+    else:
+        v = _scale(vel, JOINT_MAX_VEL)
+        a = _scale(acc, JOINT_MAX_ACC)
+        d = _scale(dec, JOINT_MAX_ACC)
+    return TrapezoidProfile(distance, v, a, d)
+
+
+def move_duration(start, target, vel, acc, dec, cartesian: bool = False) -> float:
+    """Expected time (s) for a robot_movej/robot_movel between two poses."""
+    return move_profile(start, target, vel, acc, dec, cartesian).duration
+
+
+def move_durations(start, waypoints, vel, acc, dec) -> np.ndarray:
+    """
+    Vectorized move_duration for a joint program: element i is the time of
+    the movej into waypoints[i] from waypoints[i-1] (from `start` for i=0).
+    vel/acc/dec may be scalars or per-step arrays.
+    """
+    waypoints = np.asarray(waypoints, dtype=np.float64)
+    if len(waypoints) == 0:
+        return np.zeros(0)
+    previous = np.vstack([np.asarray(start, dtype=np.float64)[None, :waypoints.shape[1]], waypoints[:-1]])
+    distance = np.abs(waypoints - previous).max(axis=1)
+
+    v = JOINT_MAX_VEL * np.clip(np.asarray(vel, dtype=np.float64), MIN_PERCENT, 100.0) / 100.0
+    a = JOINT_MAX_ACC * np.clip(np.asarray(acc, dtype=np.float64), MIN_PERCENT, 100.0) / 100.0
+    d = JOINT_MAX_ACC * np.clip(np.asarray(dec, dtype=np.float64), MIN_PERCENT, 100.0) / 100.0
+    # Peak speed is v unless the move is too short to reach it (triangular profile)
+    peak = np.minimum(v, np.sqrt(2 * distance * a * d / (a + d)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cruise = np.where(peak > 0, (distance - peak * peak / (2 * a) - peak * peak / (2 * d)) / peak, 0.0)
+    return peak / a + peak / d + np.maximum(cruise, 0.0)
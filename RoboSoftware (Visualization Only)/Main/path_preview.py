@@ -0,0 +1,83 @@
+"""
+Geometry for previewing a whole program in the 3D view.
+
+Every waypoint and the joint-space moves between them go through one batched
+KinematicChain.fk call per chunk, so a 50k-step program costs a few hundred
+milliseconds of NumPy and ends up as a single polyline, plus one merged mesh
+of a few semi-transparent "ghost" robots along the way.  No Qt or VTK here;
+robo_viz turns the arrays into actors.
+"""
+import numpy as np
+
+from kinematics import KinematicChain
+
+MAX_STEP = np.radians(2.0)   # joint change per interpolated sample of a move
+MAX_SEGMENT_SAMPLES = 16
+MAX_PATH_POINTS = 200_000    # interpolation is thinned to stay under this
+FK_CHUNK = 20_000            # configurations per fk() call (bounds temporary memory)
+GHOST_POSES = 8
+
+
+def interpolate_moves(q: np.ndarray, max_step: float = MAX_STEP, max_points: int = MAX_PATH_POINTS):
+    """
+    Joint-space samples of the moves through q (N, J), as a movej travels.
+    Each move is split so no joint changes more than max_step per sample.
+    Returns (path (M, J), index of each waypoint in path (N,)).
+    """
+    q = np.asarray(q, dtype=np.float64)
+    if len(q) < 2:
+        return q.copy(), np.arange(len(q))
+    dq = np.diff(q, axis=0)
+    steps = np.ceil(np.abs(dq).max(axis=1) / max_step).clip(1, MAX_SEGMENT_SAMPLES).astype(np.int64)
+    if steps.sum() + 1 > max_points:
+        steps = np.maximum(1, steps * (max_points - 1) // steps.sum())
+
+    starts = np.cumsum(steps) - steps
+    segment = np.repeat(np.arange(len(dq)), steps)
+    fraction = (np.arange(len(segment)) - starts[segment]) / steps[segment]
+    path = np.empty((len(segment) + 1, q.shape[1]))
+    np.multiply(dq[segment], fraction[:, None], out=path[:-1])
+    path[:-1] += q[segment]
+    path[-1] = q[-1]
+    return path, np.append(starts, len(segment))
+
+
+def link_positions(chain: KinematicChain, path: np.ndarray, link) -> np.ndarray:
+    """World position (M, 3) of one link for every configuration in path (M, J)."""
+    out = np.empty((len(path), 3))
+    for start in range(0, len(path), FK_CHUNK):
+        T = chain.fk(path[start:start + FK_CHUNK], links=[link])
+        out[start:start + FK_CHUNK] = T[:, 0, :3, 3]
+    return out
+
+
+def ghost_indices(count: int, ghosts: int = GHOST_POSES) -> np.ndarray:
+    """Evenly spread waypoint indices, first and last included."""
+    if count == 0:
+        return np.arange(0)
+    return np.unique(np.linspace(0, count - 1, min(ghosts, count)).round().astype(np.int64))
+
+
+def posed_meshes(chain: KinematicChain, meshes, poses: np.ndarray):
+    """
+    One triangle mesh of the robot drawn at every configuration in poses (K, J).
+    meshes[i]: (points, VTK faces) of chain.visuals[i] in its own frame.
+    Returns (points (P, 3), faces) ready for a single PolyData.
+    """
+    transforms = chain.fk(np.atleast_2d(poses))   # (K, L, 4, 4)
+    all_points, all_faces = [], []
+    offset = 0
+    for visual, (points, faces) in zip(chain.visuals, meshes):
+        T = transforms[:, visual.link] @ visual.origin            # (K, 4, 4)
+        local = np.asarray(points, dtype=np.float64) * visual.scale
+        posed = local @ T[:, :3, :3].transpose(0, 2, 1) + T[:, None, :3, 3]   # (K, n, 3)
+        # One copy of the faces per pose, pointing at that pose's points
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 4)
+        tiled = np.repeat(faces[None], len(T), axis=0)
+        tiled[:, :, 1:] += (offset + np.arange(len(T)) * len(local))[:, None, None]
+        all_faces.append(tiled.ravel())
+        all_points.append(posed.reshape(-1, 3))
+        offset += len(T) * len(local)
+    if not all_points:
+        return np.empty((0, 3)), np.empty(0, dtype=np.int64)
+    return np.concatenate(all_points), np.concatenate(all_faces)
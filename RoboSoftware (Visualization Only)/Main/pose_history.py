@@ -0,0 +1,99 @@
+"""
+Timestamped joint history for smooth animation from sparse telemetry.
+
+Telemetry arrives every ~100 ms; the 3D view draws at display rate.  The view
+renders a little in the past (`delay`, about one sample interval), so almost
+every frame falls between two real samples and is interpolated linearly.  When
+a sample is late the last motion is extrapolated for at most
+`max_extrapolation` seconds, then the pose holds.
+
+    history.add(state.timestamp, q)
+    q = history.sample(time.monotonic() - history.delay)
+"""
+import numpy as np
+
+CAPACITY = 32
+MAX_DELAY = 0.25          # s, cap on the adaptive render delay
+MAX_EXTRAPOLATION = 0.1   # s past the newest sample
+MAX_GAP = 1.0             # s; a longer silence starts a new history
+
+
+class PoseHistory:
+    def __init__(self, capacity: int = CAPACITY, delay: float = None, max_extrapolation: float = MAX_EXTRAPOLATION):
+        """delay=None follows the median spacing of recent samples."""
+        self.capacity = capacity
+        self.fixed_delay = delay
+        self.max_extrapolation = max_extrapolation
+        self._times = np.empty(capacity)
+        self._poses = None        # (capacity, J) ring buffer, allocated on the first sample
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+
+    def add(self, timestamp: float, q):
+        """Sample taken at `timestamp` (time.monotonic()); older or repeated timestamps are ignored."""
+        q = np.asarray(q, dtype=np.float64)
+        if self._poses is None or self._poses.shape[1] != len(q):
+            self._poses = np.empty((self.capacity, len(q)))
+            self.clear()
+        if self._count and timestamp <= self.last_time:
+            return
+        if self._count and timestamp - self.last_time > MAX_GAP:
+            self.clear()  # don't animate across a reconnect or a stalled link
+        slot = (self._start + self._count) % self.capacity
+        self._times[slot] = timestamp
+        self._poses[slot] = q
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    @property
+    def last_time(self) -> float:
+        return self._times[(self._start + self._count - 1) % self.capacity]
+
+    @property
+    def delay(self) -> float:
+        """How far behind the newest sample the view renders."""
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        if self._count < 2:
+            return 0.0
+        return min(MAX_DELAY, float(np.median(np.diff(self._ordered()[0]))))
+
+    def sample(self, t: float) -> np.ndarray:
+        """Joint values at time t, interpolated between samples or extrapolated past the last one."""
+        if not self._count:
+            raise ValueError("PoseHistory is empty")
+        times, poses = self._ordered()
+        if self._count == 1 or t <= times[0]:
+            return poses[0].copy()
+        if t >= times[-1]:
+            # Continue the last motion briefly, then hold
+            dt = min(t - times[-1], self.max_extrapolation)
+            velocity = (poses[-1] - poses[-2]) / (times[-1] - times[-2])
+            return poses[-1] + velocity * dt
+        i = int(np.searchsorted(times, t, side="right"))
+        w = (t - times[i - 1]) / (times[i] - times[i - 1])
+        return poses[i - 1] + w * (poses[i] - poses[i - 1])
+
+    def settled(self, t: float) -> bool:
+        """True once sample(t) no longer changes with t (until a new sample arrives)."""
+        if self._count < 2:
+            return True
+        times, poses = self._ordered()
+        if t < times[-1]:
+            # Still between samples: settled only if the rest of the way is standing still
+            i = max(1, int(np.searchsorted(times, t, side="right")))
+            return bool((poses[i - 1:] == poses[-1]).all())
+        return t >= times[-1] + self.max_extrapolation or np.array_equal(poses[-1], poses[-2])
+
+    def _ordered(self):
+        index = (self._start + np.arange(self._count)) % self.capacity
+        return self._times[index], self._poses[index]
@@ -0,0 +1,187 @@
+"""
+Program files for the Actions tab.
+
+Binary format (.rprog), little endian:
+
+    offset  size  field
+    0       8     magic b"RPROG\\x00\\x00\\x01"
+    8       4     axes per waypoint (7)
+    12      4     flags (bit 0: vel/acc/dec block present)
+    16      8     waypoint count N
+    24      40    reserved (zero)
+    64      N*axes*8   float64 waypoints, row major
+    ...     N*3*8      float64 vel, acc, dec per step (NaN = program default)
+
+load_program maps the file with np.memmap, so opening is O(1) whatever the
+size and the arrays can be handed to the runner without a copy.  CSV
+("step, J1..J6[, vel, acc, dec]") is converted in fixed-size chunks.
+"""
+import csv
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"RPROG\x00\x00\x01"
+HEADER = struct.Struct("<8sIIQ40x")
+AXES = 7
+PARAMS = ("vel", "acc", "dec")
+FLAG_PARAMS = 1
+CHUNK_ROWS = 65536
+
+
+# -------------------------
+# Binary format
+# -------------------------
+def save_program(path: str, points, params=None):
+    """Write an (N, <=7) waypoint array and optional (N, 3) vel/acc/dec array."""
+    points = np.asarray(points, dtype=np.float64)
+    count = len(points)
+    # Write next to the target and swap, so a crash mid-write never leaves a
+    # truncated program.  Windows refuses to replace a file that is still
+    # mapped: release the mapping first (ProgramModel.release_file)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, AXES, FLAG_PARAMS if params is not None else 0, count))
+        for start in range(0, count, CHUNK_ROWS):
+            _padded(points[start:start + CHUNK_ROWS]).tofile(f)
+        if params is not None:
+            np.ascontiguousarray(params, dtype=np.float64).tofile(f)
+    os.replace(tmp_path, path)
+
+
+def load_program(path: str):
+    """
+    Map a .rprog file read-only.
+    Returns (points, params): an (N, 7) memmap and an (N, 3) memmap or None.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path}: not a program file (too short)")
+    magic, axes, flags, count = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a program file (bad magic)")
+    if count == 0:
+        return np.zeros((0, axes)), (np.zeros((0, 3)) if flags & FLAG_PARAMS else None)
+
+    points = np.memmap(path, dtype=np.float64, mode="r", offset=HEADER.size, shape=(count, axes))
+    params = None
+    if flags & FLAG_PARAMS:
+        params = np.memmap(path, dtype=np.float64, mode="r",
+                           offset=HEADER.size + count * axes * 8, shape=(count, 3))
+    return points, params
+
+
+# -------------------------
+# CSV
+# -------------------------
+def iter_csv(path: str, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yield (points, params) chunks from a program CSV.
+    Without a header row every column after "step" is a joint value; with
+    one, columns named vel/acc/dec are read as per-step parameters.
+    """
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        axis_cols = None
+        param_cols = {}  # slot in PARAMS -> CSV column
+        points, params = [], []
+        for line, row in enumerate(reader, start=1):
+            if not any(cell.strip() for cell in row):
+                continue
+            if axis_cols is None:
+                if line == 1 and not _is_number(row[0]):
+                    names = [cell.strip().lower() for cell in row]
+                    param_cols = {PARAMS.index(name): col for col, name in enumerate(names) if name in PARAMS}
+                    axis_cols = [col for col in range(1, len(row)) if names[col] not in PARAMS]
+                    continue
+                axis_cols = list(range(1, len(row)))
+            try:
+                points.append([float(row[col]) for col in axis_cols])
+                if param_cols:
+                    step = [np.nan] * len(PARAMS)
+                    for slot, col in param_cols.items():
+                        if col < len(row) and row[col].strip():
+                            step[slot] = float(row[col])
+                    params.append(step)
+            except (ValueError, IndexError):
+                raise ValueError(f"{path}, line {line}: invalid row {row}")
+            if len(points) == chunk_rows:
+                yield _chunk(points, params)
+                points, params = [], []
+        if points:
+            yield _chunk(points, params)
+
+
+def read_csv(path: str):
+    """Whole CSV program as ((N, 7) points, (N, 3) params or None)."""
+    points, params = [], []
+    for chunk_points, chunk_params in iter_csv(path):
+        points.append(chunk_points)
+        params.append(chunk_params)
+    if not points:
+        return np.zeros((0, AXES)), None
+    return np.vstack(points), (np.vstack(params) if params[0] is not None else None)
+
+
+def write_csv(path: str, points, params=None, axes: int = 6):
+    """Export "step, J1..J<axes>" rows (plus a header and vel/acc/dec if params is given)."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        if params is not None:
+            writer.writerow(["step"] + [f"J{i + 1}" for i in range(axes)] + list(PARAMS))
+        for start in range(0, len(points), CHUNK_ROWS):
+            block = np.asarray(points[start:start + CHUNK_ROWS, :axes])
+            if params is not None:
+                block = np.hstack([block, params[start:start + CHUNK_ROWS]])
+            for step, row in enumerate(block.tolist(), start=start + 1):
+                writer.writerow([step] + ["" if v != v else repr(v) for v in row])
+
+
+def csv_to_program(csv_path: str, program_path: str):
+    """Stream a CSV program into the binary format; returns the step count."""
+    count = 0
+    flags = 0
+    with open(program_path, "wb") as f, tempfile.TemporaryFile() as params_file:
+        f.write(HEADER.pack(MAGIC, AXES, flags, count))
+        for points, params in iter_csv(csv_path):
+            points.tofile(f)
+            count += len(points)
+            if params is not None:
+                flags = FLAG_PARAMS
+                params.tofile(params_file)
+        if flags & FLAG_PARAMS:
+            # The params block follows all waypoints
+            params_file.seek(0)
+            shutil.copyfileobj(params_file, f)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, AXES, flags, count))
+    return count
+
+
+def program_to_csv(program_path: str, csv_path: str, axes: int = 6):
+    points, params = load_program(program_path)
+    write_csv(csv_path, points, params, axes)
+    return len(points)
+
+
+def _padded(points):
+    out = np.zeros((len(points), AXES))
+    out[:, :min(points.shape[1], AXES)] = points[:, :AXES]
+    return out
+
+
+def _chunk(points, params):
+    points = _padded(np.array(points, dtype=np.float64).reshape(len(points), -1))
+    return points, (np.array(params, dtype=np.float64) if params else None)
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
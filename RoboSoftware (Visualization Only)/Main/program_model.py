@@ -0,0 +1,211 @@
+import os
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+AXES = 7             # values per waypoint, as returned by get_current_position
+MIN_CAPACITY = 64
+
+
+class ProgramModel(QAbstractTableModel):
+    """
+    Actions tab program: waypoints in an (N, 7) float64 array with spare
+    capacity, shown as "Step, J1..." columns through a QTableView.
+
+    Appends are amortized O(1); inserts and deletes shift the tail of the
+    array in one memmove. Step numbers are the row index, so nothing has to
+    be renumbered, and text is only formatted for rows the view paints.
+    Per-step vel/acc/dec overrides live in `params` (NaN = program default).
+
+    A program opened from a .rprog file keeps the read-only memmap as its
+    storage until the first edit, so huge programs open without being read
+    and run_snapshot() can hand them to the runner without a copy.
+    """
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)           # "Step" + one label per shown axis
+        self.shown_axes = len(self.headers) - 1
+        self._count = 0
+        self._points = np.zeros((MIN_CAPACITY, AXES))
+        self._params = np.full((MIN_CAPACITY, 3), np.nan)
+        self._mapped = False   # storage is a file mapping shared with running jobs
+        self._mapped_file = None
+
+    # -------------------------
+    # Qt model interface
+    # -------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return str(row + 1)
+            return f"{self._points[row, col - 1]:.2f}"
+        if role == Qt.EditRole and col > 0:
+            return str(float(self._points[row, col - 1]))
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter) if col > 0 else int(Qt.AlignCenter)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or index.column() == 0:
+            return False
+        try:
+            val = float(value)
+        except (TypeError, ValueError):
+            print(f"❌ Step {index.row() + 1}: invalid number '{value}'.")
+            return False
+        self._detach()
+        self._points[index.row(), index.column() - 1] = val
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() > 0:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+    # -------------------------
+    # Program editing
+    # -------------------------
+    def __len__(self):
+        return self._count
+
+    @property
+    def waypoints(self) -> np.ndarray:
+        """(N, 7) view of the program; copy it before handing it to another thread."""
+        return self._points[:self._count]
+
+    @property
+    def params(self) -> np.ndarray:
+        """(N, 3) view of the per-step vel/acc/dec overrides."""
+        return self._params[:self._count]
+
+    def append(self, pos, params=None):
+        self.insert(self._count, pos, params)
+
+    def insert(self, row: int, pos, params=None):
+        """Insert one waypoint before `row` (row == len(self) appends)."""
+        row = max(0, min(row, self._count))
+        self._detach()
+        self._reserve(self._count + 1)
+        self.beginInsertRows(QModelIndex(), row, row)
+        # Shift the tail down by one row (no-op for appends)
+        self._points[row + 1:self._count + 1] = self._points[row:self._count]
+        self._params[row + 1:self._count + 1] = self._params[row:self._count]
+        self._set_row(row, pos, params)
+        self._count += 1
+        self.endInsertRows()
+
+    def remove(self, row: int):
+        if not 0 <= row < self._count:
+            return
+        self._detach()
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._points[row:self._count - 1] = self._points[row + 1:self._count]
+        self._params[row:self._count - 1] = self._params[row + 1:self._count]
+        self._count -= 1
+        self.endRemoveRows()
+
+    def set_waypoint(self, row: int, pos):
+        self._detach()
+        self._set_row(row, pos, None)
+        self.dataChanged.emit(self.index(row, 1), self.index(row, self.columnCount() - 1))
+
+    @property
+    def has_params(self) -> bool:
+        return bool(np.isfinite(self.params).any())
+
+    def run_snapshot(self):
+        """
+        (points, params) for a run on another thread: the file mapping itself
+        while unedited, otherwise a copy. params is None without overrides.
+        """
+        params = self.params if self.has_params else None
+        if self._mapped:
+            return self.waypoints, params
+        return self.waypoints.copy(), (params.copy() if params is not None else None)
+
+    def set_program(self, points, params=None, copy=True):
+        """
+        Replace the whole program with an (N, <=7) array in one reset.
+        copy=False adopts (N, 7) float64 arrays, e.g. program_io.load_program's
+        read-only memmaps, as storage; they are copied on the first edit.
+        """
+        source = getattr(points, "filename", None)   # np.memmap; asarray drops the subclass
+        points = np.asarray(points, dtype=np.float64)
+        # An empty program has no row length to infer
+        points = points.reshape(len(points), -1) if points.size else np.zeros((0, AXES))
+        if not copy and points.shape[1] == AXES and len(points) > 0:
+            self.beginResetModel()
+            self._points = points
+            self._params = np.asarray(params, dtype=np.float64) if params is not None else np.full((len(points), 3), np.nan)
+            self._count = len(points)
+            self._mapped = True
+            self._mapped_file = source
+            self.endResetModel()
+            return
+
+        self.beginResetModel()
+        self._count = 0
+        self._reserve(len(points), force=self._mapped)
+        self._mapped = False
+        self._points[:len(points)] = 0.0
+        self._points[:len(points), :points.shape[1]] = points[:, :AXES]
+        self._params[:len(points)] = np.nan if params is None else params
+        self._count = len(points)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_program(np.zeros((0, AXES)))
+
+    @property
+    def mapped_path(self):
+        """Absolute path of the file the program is still mapped from, else None."""
+        return os.path.abspath(self._mapped_file) if self._mapped and self._mapped_file else None
+
+    def release_file(self):
+        """Copy mapped storage into memory and drop the mapping, e.g. before that file is replaced."""
+        self._detach()
+
+    def _set_row(self, row, pos, params):
+        values = np.asarray(pos, dtype=np.float64)[:AXES]
+        self._points[row] = 0.0
+        self._points[row, :len(values)] = values
+        self._params[row] = np.nan if params is None else params
+
+    def _detach(self):
+        # Copy adopted storage before the first write
+        if self._mapped:
+            self._mapped = False
+            self._reserve(self._count + 1, force=True)
+
+    def _reserve(self, count: int, force: bool = False):
+        capacity = max(len(self._points), MIN_CAPACITY)
+        if count <= len(self._points) and not force:
+            return
+        while capacity < count:
+            capacity *= 2
+        points = np.zeros((capacity, AXES))
+        params = np.full((capacity, 3), np.nan)
+        points[:self._count] = self._points[:self._count]
+        params[:self._count] = self._params[:self._count]
+        self._points, self._params = points, params
@@ -1,16 +1,146 @@
-from urdfpy import URDF
 import numpy as np
 import pyvista as pv
 from pyvistaqt import QtInteractor
 from PyQt5 import QtWidgets, QtCore
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
 import os
+import time
+
+from kinematics import KinematicChain
+import path_preview
+from pose_history import PoseHistory
+import viz_cache
+from viz_frames import FrameScheduler
+from viz_lod import FAST_SPEED, LodSelector
+
+URDF_PATH = "Main/Models/ur5_g.urdf"
+MODEL_RADIUS = 0.9     # m, UR5 reach; sizes the robot on screen for LOD
+LOD_SETTLE_MS = 250    # full detail returns this long after the last motion
+POSE_TOLERANCE = 1e-4  # rad; smaller joint changes are not redrawn
+PATH_LINK = "tool0"    # link whose path the program preview traces
+
+# Robot axes (controller order) -> URDF joints
+JOINT_AXES = (
+    "shoulder_pan_joint",
+    "shoulder_lift_joint",
+    "elbow_joint",
+    "wrist_1_joint",
+    "wrist_2_joint",
+    "wrist_3_joint",
+)
+
+class RobotScene:
+    """
+    Link meshes of a robot in a PyVista plotter, posed with a
+    kinematics.KinematicChain. Every visual's mesh is uploaded to VTK once;
+    posing the robot only rewrites each actor's 4x4 user matrix.
+    With viz_cache levels of detail, each level gets its own actor (created
+    on first use, sharing the visual's matrix) and set_level() switches
+    which one is visible.
+    """
+
+    def __init__(self, plotter, chain: KinematicChain, mesh_data=None):
+        self.plotter = plotter
+        self.chain = chain
+        # Optional LOD list of (points, faces) per visual from viz_cache; files are read otherwise
+        self.mesh_data = mesh_data
+        self.level = 0
+        # visual index -> (actor per level or None, user matrix)
+        self.meshes = {}
+
+    def level_faces(self) -> list:
+        """Triangles drawn at each level; visuals with fewer levels stay at their coarsest."""
+        if self.mesh_data is None:
+            return [0]
+        count = max(len(levels) for levels in self.mesh_data)
+        return [
+            sum(len(levels[min(k, len(levels) - 1)][1]) // 4 for levels in self.mesh_data)
+            for k in range(count)
+        ]
+
+    def set_level(self, level: int):
+        if level == self.level:
+            return
+        self.level = level
+        for idx in self.meshes:
+            self._show_level(idx)
+
+    def visual_mesh(self, idx, level=-1):
+        """(points, faces) of a visual at a detail level (-1: coarsest), in its own frame."""
+        if self.mesh_data is None:
+            return viz_cache.read_mesh(self.chain.visuals[idx].filename)
+        return self.mesh_data[idx][level]
+
+    def set_pose(self, cfg):
+        """cfg: {joint name: angle in radians}"""
+        self.set_joint_vector(self.chain.joint_vector(cfg))
+
+    def set_joint_vector(self, q):
+        try:
+            transforms = self.chain.fk(q)
+        except Exception as e:
+            print(f"FK calculation error: {e}")
+            return
+        self.apply_transforms(transforms)
+
+    def apply_transforms(self, transforms):
+        """transforms: (L, 4, 4) link transforms from chain.fk"""
+        for idx, visual in enumerate(self.chain.visuals):
+            try:
+                if idx not in self.meshes:
+                    levels = len(self.mesh_data[idx]) if self.mesh_data is not None else 1
+                    self.meshes[idx] = ([None] * levels, vtkMatrix4x4())
+                    self._show_level(idx)
+                _actors, matrix = self.meshes[idx]
+                T = transforms[visual.link] @ visual.origin
+                matrix.DeepCopy(T.ravel())  # marks the actors' transform modified
+            except Exception as e:
+                print(f"Could not load/update mesh for {self.chain.link_names[visual.link]}: {e}")
+
+    def _show_level(self, idx):
+        actors, matrix = self.meshes[idx]
+        level = min(self.level, len(actors) - 1)
+        if actors[level] is None:
+            actors[level] = self._add_actor(idx, level, matrix)
+        for k, actor in enumerate(actors):
+            if actor is not None:
+                actor.SetVisibility(k == level)
+
+    def _add_actor(self, idx, level, matrix):
+        # Geometry stays in the link's visual frame; the pose lives in the user matrix
+        visual = self.chain.visuals[idx]
+        if self.mesh_data is not None:
+            points, faces = self.mesh_data[idx][level]
+            base_mesh = pv.PolyData(np.asarray(points), np.asarray(faces))
+        else:
+            base_mesh = pv.read(visual.filename)
+        if not np.allclose(visual.scale, 1.0):
+            base_mesh.points *= visual.scale
+        actor = self.plotter.add_mesh(base_mesh, color="lightgrey", show_edges=False)
+        actor.SetUserMatrix(matrix)
+        return actor
+
+
+def load_model(urdf_path: str = URDF_PATH):
+    """
+    (chain, mesh_data) for the 3D view, or None if the URDF is missing.
+    Kinematic tree + preprocessed meshes, memory-mapped from the viz cache
+    when it is current; no widgets are touched, so any thread may call it.
+    """
+    if not os.path.exists(urdf_path):
+        print(f"❌ FATAL ERROR: URDF file not found at {urdf_path}")
+        print(f"Current directory is: {os.getcwd()}")
+        return None
+    try:
+        return viz_cache.load_robot_model(urdf_path)
+    except Exception as e:
+        print(f"⚠️ Viz cache unavailable ({e}), loading meshes directly")
+        return KinematicChain.from_urdf(urdf_path), None
 
-# Patch numpy deprecated alias
-if not hasattr(np, "float"):
-    np.float = float
 
 class RobotVisualizer(QtWidgets.QFrame):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, model=None):
+        """model: (chain, mesh_data) from load_model(), e.g. loaded in the background; loaded here if None."""
         super().__init__(parent)
 
         # PyVista Qt interactor
@@ -25,15 +155,13 @@ class RobotVisualizer(QtWidgets.QFrame):
         layout.addWidget(self.plotter.interactor)
         self.setLayout(layout)
 
-        # Load URDF
-        urdf_path = "Main/Models/ur5_g.urdf"
-        if not os.path.exists(urdf_path):
-            print(f"❌ FATAL ERROR: URDF file not found at {urdf_path}")
-            print(f"Current directory is: {os.getcwd()}")
+        # Load URDF; FK for every frame is plain NumPy (kinematics.py)
+        if model is None:
+            model = load_model()
+        if model is None:
             self.robot = None
             return
-        
-        self.robot = URDF.load(urdf_path)
+        self.robot, mesh_data = model
 
         # --- UPDATED LOGIC ---
         # This dictionary stores the permanent offsets needed to align the model's
@@ -51,8 +179,32 @@ class RobotVisualizer(QtWidgets.QFrame):
         # It's initialized with the offset values for the first draw.
         self.current_joint_angles = self.zero_pose_offsets.copy()
 
-        # Dict to hold the actors for updating the scene
-        self.meshes = {}
+        # Timestamped telemetry; frames in between are interpolated at display rate
+        self.history = PoseHistory()
+        self._display_time = -np.inf
+
+        # Actors for every link visual, posed by set_pose()
+        self.scene = RobotScene(self.plotter, self.robot, mesh_data)
+
+        # Level of detail: coarser while the arm moves fast or frames run long
+        self.lod = LodSelector(self.scene.level_faces(), model_radius=MODEL_RADIUS)
+        self._last_q = None
+        self._last_time = None
+        self._settle_timer = QtCore.QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(LOD_SETTLE_MS)
+        self._settle_timer.timeout.connect(self.update_robot)
+
+        # Render on change: at most one frame per display refresh, and only
+        # when the pose, the camera or the detail level changed
+        self.frames = FrameScheduler(self._draw_frame, parent=self)
+        self._drawn_q = None
+        self._drawn_camera = None   # camera MTime as of the last render (ours or the interactor's)
+        self._scene_changed = False  # actors added or removed since the last render
+        self.plotter.render_window.AddObserver("EndEvent", self._on_rendered)
+
+        # Program preview actors (path polyline, ghost poses)
+        self._path_actors = []
 
         self._setup_scene()
 
@@ -62,68 +214,131 @@ class RobotVisualizer(QtWidgets.QFrame):
             
         self.plotter.set_background("white")
         # First draw using the initial (offset) angles
-        self.update_robot()
+        self._draw_frame()
         # Axes/grid
         self.plotter.add_axes()
         self.plotter.show_grid()
         self.plotter.reset_camera()
 
     def update_robot(self):
+        """Schedules a redraw at the current joint angles (coalesced, at most once per display frame)."""
+        self.frames.request()
+
+    def _draw_frame(self) -> bool:
         """
-        Updates robot mesh positions smoothly and correctly using stored base meshes.
-        Prevents flicker and cumulative transformations.
+        Moves the link actors to the current joint angles and renders, unless
+        nothing visible changed.  Only the actors' transforms change; mesh
+        data is never copied.  Returns whether a render was performed.
         """
-        try:
-            fk = self.robot.link_fk(cfg=self.current_joint_angles)
-        except Exception as e:
-            print(f"FK calculation error: {e}")
-            return
+        now = time.monotonic()
+        if len(self.history):
+            # Slightly in the past so frames land between samples; never step backwards
+            self._display_time = max(self._display_time, now - self.history.delay)
+            q = self.history.sample(self._display_time)
+            if not self.history.settled(self._display_time):
+                self.frames.request()  # keep animating until the newest sample is reached
+        else:
+            q = self.robot.joint_vector(self.current_joint_angles)
+        speed = 0.0
+        if self._last_q is not None and now > self._last_time:
+            speed = float(np.abs(q - self._last_q).max()) / (now - self._last_time)
+        self._last_q, self._last_time = q, now
+        moving = speed > FAST_SPEED
 
-        for link in self.robot.links:
-            if not link.visuals:
-                continue
+        level = self.lod.choose(self._viewport_px(), self._camera_distance(), speed)
+        pose_changed = self._drawn_q is None or np.abs(q - self._drawn_q).max() > POSE_TOLERANCE
+        camera_changed = self._camera().GetMTime() != self._drawn_camera
+        if not (pose_changed or camera_changed or self._scene_changed or level != self.scene.level):
+            return False
+        self._scene_changed = False
 
-            for idx, visual in enumerate(link.visuals):
-                geom = visual.geometry
-                if geom.mesh is None:
-                    continue
+        self.scene.set_level(level)
+        if pose_changed:
+            self.scene.set_joint_vector(q)
+            self._drawn_q = q
+        start = time.perf_counter()
+        self.plotter.render()
+        self.lod.record_frame((time.perf_counter() - start) * 1000.0, moving)
+        if moving:
+            self._settle_timer.start()  # brings full detail back once the arm stops
+        return True
 
-                key = f"{link.name}_{idx}"
+    # -------------------------
+    # Program preview
+    # -------------------------
+    def joint_vectors(self, joints_deg) -> np.ndarray:
+        """Chain joint vectors (N, J) for controller joint values (N, >= 6) in degrees, zero-pose offsets applied."""
+        joints = np.radians(np.atleast_2d(np.asarray(joints_deg, dtype=np.float64)))
+        q = np.zeros((len(joints), len(self.robot.joint_names)))
+        for axis, name in enumerate(JOINT_AXES):
+            if name in self.robot.joint_names:
+                q[:, self.robot.joint_names.index(name)] = self.zero_pose_offsets[name] - joints[:, axis]
+        return q
 
-                try:
-                    T_link = fk[link]
-                    T_visual = visual.origin if visual.origin is not None else np.eye(4)
-                    T = T_link @ T_visual
+    def show_program_path(self, joints_deg):
+        """
+        Overlays a program (N, 7 controller joints in degrees, e.g. the Actions
+        tab or a recorded trajectory): the tool path through every waypoint and
+        joint-space move as one polyline actor, and a few ghost poses along it
+        as one translucent mesh actor.
+        """
+        if self.robot is None:
+            return
+        self.clear_program_path()
+        if len(joints_deg) == 0:
+            return
+        q = self.joint_vectors(joints_deg)
+        path, waypoint_index = path_preview.interpolate_moves(q)
+        link = PATH_LINK if PATH_LINK in self.robot.link_names else self.robot.link_names[-1]
+        points = path_preview.link_positions(self.robot, path, link)
 
-                    # --- CASE 1: Already loaded (reuse base mesh) ---
-                    if key in self.meshes:
-                        actor, base_mesh = self.meshes[key]
-                        # Create transformed copy from the original (untransformed) mesh
-                        transformed_mesh = base_mesh.copy()
-                        transformed_mesh.transform(T, inplace=True)
-                        actor.mapper.SetInputData(transformed_mesh)
+        # Path as one line cell; waypoints as vertices of the same PolyData
+        polyline = pv.PolyData(points)
+        if len(points) > 1:
+            polyline.lines = np.concatenate(([len(points)], np.arange(len(points))))
+        polyline.verts = np.column_stack((np.ones(len(waypoint_index), dtype=np.int64), waypoint_index)).ravel()
+        self._path_actors.append(self.plotter.add_mesh(
+            polyline, color="royalblue", line_width=2, point_size=6,
+            render_points_as_spheres=True, reset_camera=False,
+        ))
 
-                    # --- CASE 2: First time load ---
-                    else:
-                        mesh_file = geom.mesh.filename
-                        base_mesh = pv.read(mesh_file)
-                        transformed_mesh = base_mesh.copy()
-                        transformed_mesh.transform(T, inplace=True)
-                        actor = self.plotter.add_mesh(transformed_mesh, color="lightgrey", show_edges=False)
+        meshes = [self.scene.visual_mesh(idx) for idx in range(len(self.robot.visuals))]
+        ghost_points, ghost_faces = path_preview.posed_meshes(self.robot, meshes, q[path_preview.ghost_indices(len(q))])
+        if len(ghost_faces):
+            self._path_actors.append(self.plotter.add_mesh(
+                pv.PolyData(ghost_points, ghost_faces), color="lightsteelblue", opacity=0.2, reset_camera=False,
+            ))
+        self._scene_changed = True
+        self.update_robot()
 
-                        # Store original untransformed mesh
-                        self.meshes[key] = (actor, base_mesh)
+    def clear_program_path(self):
+        if self.robot is None:
+            return
+        for actor in self._path_actors:
+            self.plotter.remove_actor(actor, render=False)
+        if self._path_actors:
+            self._path_actors = []
+            self._scene_changed = True
+            self.update_robot()
 
-                except Exception as e:
-                    print(f"Could not load/update mesh for {link.name}: {e}")
+    def _on_rendered(self, _window, _event):
+        self._drawn_camera = self._camera().GetMTime()
 
-        self.plotter.render()
+    def _camera(self):
+        return self.plotter.renderer.GetActiveCamera()
+
+    def _viewport_px(self) -> int:
+        return max(1, self.plotter.interactor.height())
+
+    def _camera_distance(self) -> float:
+        return self._camera().GetDistance()
 
     
-    def set_joint_angles(self, incoming_angles_dict):
+    def set_joint_angles(self, incoming_angles_dict, timestamp: float = None):
         """
         Applies the zero-pose offset to the incoming robot angles 
-        and then triggers a refresh of the scene.
+        and then schedules a refresh of the scene.
+        timestamp: time.monotonic() when the angles were read (default: now)
         """
         # --- UPDATED LOGIC ---
         # Calculate the final angles by adding the offset to the incoming values.
@@ -135,5 +350,7 @@ class RobotVisualizer(QtWidgets.QFrame):
                 )
         
         # Now update the visualization with the correctly offset angles
-        self.update_robot()
-        self.plotter.render()
\ No newline at end of file
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.history.add(timestamp, self.robot.joint_vector(self.current_joint_angles))
+        self.update_robot()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+import functions
+from clock import RealClock
+from motion import ProgramStopped, run_waypoints
+
+
+class RobotIOWorker(QThread):
+    """
+    Single thread that owns every call into nrc_lib.
+    Commands are queued with submit()/call() and executed in order, so a slow
+    controller reply never stalls the Qt event loop.
+    """
+
+    # callback, result, error -> delivered on the GUI thread
+    commandDone = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None, clock=None):
+        super().__init__(parent)
+        self.clock = clock if clock is not None else RealClock()
+        self.stopping = False
+        self._queue = queue.Queue()
+        self._thread_id = None
+        self.commandDone.connect(self._dispatch_callback)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def submit(self, func, *args, callback=None, **kwargs) -> Future:
+        """
+        Queue func(*args, **kwargs) on the I/O thread.
+        callback(result, error) is invoked on the GUI thread once the call finishes.
+        """
+        future = Future()
+        self._queue.put((func, args, kwargs, future, callback))
+        return future
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run func on the I/O thread and return its result; for worker threads
+        (e.g. a Blockly run).  The GUI thread uses submit() with a callback:
+        waiting there would freeze it, and a nested event loop would let the
+        slot that is waiting run again.
+        """
+        if self.on_io_thread():
+            return func(*args, **kwargs)
+
+        if threading.current_thread() is threading.main_thread():
+            raise RuntimeError("RobotIOWorker.call() from the GUI thread; use submit() with a callback")
+        return self.submit(func, *args, **kwargs).result()
+
+    def on_io_thread(self) -> bool:
+        return threading.get_ident() == self._thread_id
+
+    def idle(self, seconds: float):
+        """
+        On the I/O thread: sleep while still executing queued commands, so a
+        long job (e.g. waiting for a move to finish) doesn't starve telemetry.
+        """
+        if not self.on_io_thread():
+            self.clock.sleep(seconds)
+            return
+
+        clock = self.clock
+        deadline = clock.now() + seconds
+        while not self.stopping:
+            remaining = deadline - clock.now()
+            if remaining <= 0:
+                return
+            if getattr(clock, "virtual", False) and clock.rate is None:
+                # Virtual time only moves when we sleep: run what's queued, then jump
+                self._drain()
+                clock.sleep(remaining)
+                return
+            rate = getattr(clock, "rate", None) or 1.0
+            try:
+                item = self._queue.get(timeout=remaining / rate)
+            except queue.Empty:
+                return
+            if item is None:
+                self._stop_requested()
+                return
+            self._execute(item)
+
+    def stop(self):
+        """Finish queued commands, then stop the thread."""
+        self._queue.put(None)
+        self.wait()
+
+    # -------------------------
+    # Thread body
+    # -------------------------
+    def run(self):
+        self._thread_id = threading.get_ident()
+        while not self.stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._execute(item)
+
+    def _drain(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self._stop_requested()
+                return
+            self._execute(item)
+
+    def _stop_requested(self):
+        # Seen inside idle(): let the current job return, then run() exits
+        self.stopping = True
+
+    def _execute(self, item):
+        func, args, kwargs, future, callback = item
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            future.set_exception(exc)
+            if callback is not None:
+                self.commandDone.emit(callback, None, exc)
+        else:
+            future.set_result(result)
+            if callback is not None:
+                self.commandDone.emit(callback, result, None)
+
+    def _dispatch_callback(self, callback, result, error):
+        callback(result, error)
+
+
+def lock_and_disconnect(robot_name: str):
+    """
+    Disconnect job: lock (power OFF), then disconnect.  Returns the power-off
+    error, if any; the disconnect happens regardless.
+    """
+    try:
+        functions.set_servo_locked(True, robot_name)
+    except Exception as exc:
+        power_off_error = exc
+    else:
+        power_off_error = None
+    functions.disconnect_robot(robot_name)
+    return power_off_error
+
+
+class ProgramRunner(QObject):
+    """
+    Runs a whole waypoint program as a single job on the I/O worker
+    (motion.run_waypoints), so no GUI round trip sits between two moves.
+    Progress is reported through queued signals.
+    """
+
+    stepStarted = pyqtSignal(int, int)      # loop, step index (0-based)
+    loopFinished = pyqtSignal(int, float)   # loop, cycle time in seconds
+    programFinished = pyqtSignal(bool, str)  # completed, message
+
+    def __init__(self, robot_io: RobotIOWorker, parent=None):
+        super().__init__(parent)
+        self.robot_io = robot_io
+        self.running = False
+        self._stop_event = threading.Event()
+
+    def start(self, waypoints, robot_name: str, loops: int = 1, vel: int = 30, acc: int = 30, dec: int = 30,
+              lookahead: float = 0.0, params=None) -> bool:
+        """
+        Queue the program. waypoints is the (N, 7) program array and params
+        the optional (N, 3) per-step vel/acc/dec; neither may change while running.
+        """
+        if self.running:
+            return False
+        self.running = True
+        self._stop_event = threading.Event()
+        stop_event = self._stop_event
+
+        def job():
+            handle = functions.RobotHandle(robot_name)
+            return run_waypoints(
+                handle, waypoints, loops=loops, vel=vel, acc=acc, dec=dec, lookahead=lookahead,
+                sleep=self.robot_io.idle, clock=self.robot_io.clock, stop_event=stop_event,
+                on_step=self.stepStarted.emit, on_loop=self.loopFinished.emit, params=params,
+            )
+
+        self.robot_io.submit(job, callback=self._on_done)
+        return True
+
+    def stop(self):
+        """Halt the running program; the current move is stopped with job_stop."""
+        self._stop_event.set()
+
+    def _on_done(self, _cycles, error):
+        self.running = False
+        if error is None:
+            self.programFinished.emit(True, "")
+        elif isinstance(error, ProgramStopped):
+            self.programFinished.emit(False, "stopped")
+        else:
+            self.programFinished.emit(False, str(error))
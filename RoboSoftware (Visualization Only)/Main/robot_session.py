@@ -0,0 +1,162 @@
+"""
+The robot side of a Blockly run, behind one small interface.
+
+BlocklyHost (blockly_host.py) implements the blocks and only ever talks to a
+RobotSession: connection and servo state, speed, controller calls and the
+latest telemetry (homing is a move like any other, in BlocklyHost).  Two implementations exist:
+
+- blockly.GuiRobotSession: backed by MainApp, so a run from the editor shares
+  the GUI's connection, speed slider, I/O worker and telemetry;
+- DirectRobotSession (here): calls functions directly, with no Qt at all,
+  for run_blockly.py on a cell PC or in CI against the simulator.
+
+RobotSession is an ABC: a subclass that misses one of the robot calls fails
+when it is created, not halfway through a program.
+"""
+import threading
+from abc import ABC, abstractmethod
+
+import functions
+
+
+class RobotSession(ABC):
+    """What a Blockly run needs from the robot side; subclasses fill in the robot calls."""
+
+    connected = False
+    servo_locked = True
+
+    @abstractmethod
+    def get_robot_config(self):
+        """(ip, port, name)"""
+
+    @abstractmethod
+    def update_robot_config(self, ip: str, port: str, name: str):
+        ...
+
+    @abstractmethod
+    def connect(self) -> bool:
+        ...
+
+    @abstractmethod
+    def disconnect(self):
+        ...
+
+    @abstractmethod
+    def set_servo_locked(self, locked: bool) -> bool:
+        ...
+
+    @abstractmethod
+    def get_speed(self) -> int:
+        ...
+
+    @abstractmethod
+    def set_speed(self, speed_value: int):
+        ...
+
+    @abstractmethod
+    def call(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) against the controller and return its result."""
+
+    @abstractmethod
+    def stop_motion(self):
+        """Halt the current move now (job_stop); safe from any thread."""
+
+    def ensure_robot_ready(self, *, auto_unlock: bool = False, source: str = "operation") -> bool:
+        """Verify connection/servo state before motion, optionally auto-unlocking."""
+        if not self.connected:
+            print(f"❌ Cannot {source}: robot not connected.")
+            return False
+
+        if self.servo_locked:
+            if auto_unlock:
+                print(f"⚠️ {source.capitalize()} requires unlocked servo. Unlocking automatically...")
+                if not self.set_servo_locked(False):
+                    print(f"❌ Cannot {source}: failed to unlock servo.")
+                    return False
+                print("✅ Servo unlocked automatically.")
+            else:
+                print(f"❌ Cannot {source}: servo locked. Unlock the robot first.")
+                return False
+
+        return True
+
+    # Optional: sessions without telemetry or position widgets keep these
+    def latest_state(self):
+        """A fresh telemetry.RobotState, or None to read the controller instead."""
+        return None
+
+    def coord_changed(self):
+        """Something changed the controller's current coord behind telemetry's back."""
+
+    def show_position(self):
+        """Refresh whatever displays the robot position after a move."""
+
+
+class DirectRobotSession(RobotSession):
+    """
+    Session that calls functions directly from the running thread.
+    A lock keeps calls from two threads (the program and a stop request)
+    from overlapping inside nrc_lib.
+    """
+
+    def __init__(self, ip: str, port: str, name: str, speed: int = 30):
+        self.ip = ip
+        self.port = port
+        self.name = name
+        self.speed = max(0, min(100, int(speed)))
+        self.connected = False
+        self.servo_locked = True
+        self._lock = threading.Lock()
+
+    def get_robot_config(self):
+        return self.ip, self.port, self.name
+
+    def update_robot_config(self, ip: str, port: str, name: str):
+        self.ip, self.port, self.name = ip, port, name
+
+    def call(self, func, *args, **kwargs):
+        with self._lock:
+            return func(*args, **kwargs)
+
+    def connect(self) -> bool:
+        if self.connected:
+            return True
+        print(f"Connecting to {self.name} at {self.ip}:{self.port}...")
+        status = self.call(functions.connect_robot, self.ip, self.port, self.name)
+        if status != 0:
+            print(f"❌ Connect failed (code {status})")
+            return False
+        print("✅ Robot connected")
+        self.connected = True
+        # Same safe state as the GUI: locked (power OFF) until something unlocks
+        self.set_servo_locked(True)
+        return True
+
+    def disconnect(self):
+        if not self.connected:
+            return
+        if not self.set_servo_locked(True):
+            print("⚠️ Power-off during disconnect failed")
+        self.call(functions.disconnect_robot, self.name)
+        self.connected = False
+        print("Robot disconnected")
+
+    def set_servo_locked(self, locked: bool) -> bool:
+        try:
+            self.call(functions.set_servo_locked, locked, self.name)
+        except Exception as e:
+            action = "lock" if locked else "unlock"
+            print(f"⚠️ Servo {action} failed: {e}")
+            return False
+        self.servo_locked = locked
+        return True
+
+    def get_speed(self) -> int:
+        return self.speed
+
+    def set_speed(self, speed_value: int):
+        self.speed = max(0, min(100, int(speed_value)))
+
+    def stop_motion(self):
+        if self.connected:
+            self.call(functions.job_stop, self.name)
@@ -0,0 +1,151 @@
+"""
+Run an exported Blockly program without the GUI.
+
+The program file is the steps JSON the editor's Run button sends ("Export
+Program" in the Blockly tab saves it).  The blocks run through the same
+BlocklyHost as in the GUI, over a DirectRobotSession: no Qt, no web view.
+
+    python Main/run_blockly.py program.json --sim      # pure-Python simulator (CI)
+    python Main/run_blockly.py program.json --ip 192.168.3.15 --port 6001 --name MyRobot
+
+The robot is connected before the program starts (pass --no-connect to leave
+that to the program's own connect block) and, once the last move has
+finished, locked and disconnected again.  Ctrl+C stops the program and the
+robot (job_stop).  Exit status: 0 finished, 1 failed or stopped, 2 the
+program could not be read.
+
+--dry-run predicts the cycle time instead (blockly_dryrun.py): the program
+runs on the simulator in virtual time, starting connected and unlocked, and
+--report saves the per-block totals and timeline.  The modelled controller
+has no motion buffer, like libnrc_host, unless --motion-buffer says otherwise.
+
+    python Main/run_blockly.py program.json --dry-run --speed 50 --report dry_run.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+SETTLE_TIMEOUT = 60.0   # s; longest wait for the last move before disconnecting
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("program", help="steps JSON exported from the Blockly tab")
+    parser.add_argument("--sim", action="store_true", help="run against the simulator (NRC_BACKEND=sim)")
+    parser.add_argument("--ip", default="192.168.3.15")
+    parser.add_argument("--port", default="6001")
+    parser.add_argument("--name", default="MyRobot", help="robot name")
+    parser.add_argument("--speed", type=int, default=30, help="initial speed (0-100) until a set_speed block")
+    parser.add_argument("--no-connect", action="store_true", help="don't connect before running")
+    parser.add_argument("--quiet", action="store_true", help="don't log every block")
+    parser.add_argument("--verbose-optimizer", action="store_true", help="log every optimizer rewrite")
+    parser.add_argument("--profile", metavar="PATH", help="profile the run per block and write the JSON here")
+    parser.add_argument("--dry-run", action="store_true", help="predict the cycle time on the simulator in virtual time")
+    parser.add_argument("--report", metavar="PATH", help="dry run: write the report JSON (totals and timeline) here")
+    parser.add_argument("--start-joints", type=_floats, metavar="J1,J2,...", help="dry run: starting joint angles")
+    parser.add_argument("--start-cart", type=_floats, metavar="X,Y,Z,...", help="dry run: starting Cartesian pose")
+    parser.add_argument("--motion-buffer", type=int, default=0, metavar="N",
+                        help="dry run: motion commands the controller holds behind the running move (libnrc_host: 0)")
+    return parser.parse_args(argv)
+
+
+def _floats(text: str) -> list:
+    return [float(value) for value in text.split(",") if value.strip()]
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    if args.sim or args.dry_run:
+        # functions picks its backend when it is first imported
+        os.environ["NRC_BACKEND"] = "sim"
+
+    import functions
+    from blockly_host import BlocklyHost, prepare_program, run_program
+    from blockly_runtime import BlockProfile, RunControl
+    from motion import wait_motion_done
+    from robot_session import DirectRobotSession
+
+    try:
+        with open(args.program, encoding="utf-8") as handle:
+            steps = json.load(handle)
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"❌ Cannot read {args.program}: {exc}")
+        return 2
+    if not isinstance(steps, list):
+        print("❌ Not a steps list. Use Export Program; Save Script stores the editor workspace instead.")
+        return 2
+
+    program = prepare_program(steps, verbose=args.verbose_optimizer)
+    if args.dry_run:
+        return dry_run_main(args, program)
+    session = DirectRobotSession(args.ip, args.port, args.name, speed=args.speed)
+    control = RunControl()
+    # Profiling is opt-in here; without RunEvents its run counts would be the only per-block cost
+    profile = BlockProfile(program) if args.profile else None
+    host = BlocklyHost(session, control, profile)
+    if not args.no_connect and not session.connect():
+        return 1
+    print(f"⏱️ Ready after {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # The program runs on a worker thread so Ctrl+C stays responsive
+    result = {}
+    done = threading.Event()
+
+    def job():
+        try:
+            result["state"], _ = run_program(program, host, trace=not args.quiet)
+        finally:
+            done.set()
+
+    began = time.perf_counter()
+    threading.Thread(target=job, name="blockly-program", daemon=True).start()
+    try:
+        while not done.wait(0.1):
+            pass
+    except KeyboardInterrupt:
+        print("⏹️ Stopping...")
+        control.stop()
+        session.stop_motion()
+        done.wait()
+    state = result.get("state", "failed")
+
+    if profile is None:
+        print(f"[Blockly] Program {state} after {time.perf_counter() - began:.2f} s")
+    else:
+        summary = profile.summary()
+        print(f"[Blockly] Program {state} after {summary['total']:.2f} s "
+              f"({summary['controller_wait']:.2f} s waiting on the controller)")
+        with open(args.profile, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+        print(f"Profile written to {args.profile}")
+
+    if session.connected:
+        try:
+            # Motion commands don't block: let the last one finish before powering off
+            wait_motion_done(lambda: session.call(functions.get_robot_running_state, session.name),
+                             timeout=SETTLE_TIMEOUT)
+        except Exception as exc:
+            print(f"⚠️ Last move did not settle: {exc}")
+            session.stop_motion()
+        session.disconnect()
+    return 0 if state == "finished" else 1
+
+
+def dry_run_main(args, program) -> int:
+    from blockly_dryrun import dry_run, format_report
+
+    report = dry_run(program, speed=args.speed, name=args.name, connect=not args.no_connect,
+                     joints=args.start_joints, cart=args.start_cart, motion_buffer=args.motion_buffer)
+    print(format_report(report))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as handle:
+            json.dump(report, handle)
+        print(f"Dry-run report written to {args.report}")
+    return 0 if report["state"] == "finished" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
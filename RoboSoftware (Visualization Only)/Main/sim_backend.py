@@ -0,0 +1,348 @@
+"""
+Pure-Python stand-in for nrc_lib.
+
+The module exposes the same exports as libnrc_host (see nrc_lib.h), taking the
+same arguments functions.py passes through ctypes (bytes names, 7-double
+arrays), so functions.py can use it in place of the DLL:
+
+    NRC_BACKEND=sim python Main/main.py           # real-time simulation
+    NRC_BACKEND=sim NRC_SIM_RATE=max python ...   # virtual time, as fast as possible
+
+Motions follow the synchronized trapezoidal profile from motion_profile.py
+using the vel/acc/dec of each robot_movej/robot_movel call, and time comes
+from a clock.VirtualClock so programs can run faster than real time.
+Joint and Cartesian poses are tracked independently (there is no kinematics).
+
+As with nrc_stub, a motion command sent while a move is running replaces it,
+starting from wherever the robot is.  nrc_lib.h has no notion of a motion
+buffer; motion_buffer=1 (NRC_SIM_MOTION_BUFFER=1) models a controller that
+holds one command behind the running move instead.  It starts the instant
+the running move ends, and a command sent while one is already held is
+refused with BUFFER_FULL.  functions.motion_buffer() reports the setting.
+"""
+import threading
+from collections import Counter
+
+from clock import VirtualClock
+from motion_profile import move_profile
+
+AXES = 7
+JOG_SPEED = 10.0  # deg/s or mm/s while jogging
+BUFFER_FULL = -3  # motion command status with motion_buffer=1 while a command is already held
+
+# servoStatus in nrc_lib.h
+SERVO_STOP = 0
+SERVO_OK = 1
+SERVO_ERROR = 2
+SERVO_RUNNING = 3
+
+
+class _Motion:
+    def __init__(self, start, target, profile, t0, cartesian):
+        self.start = list(start)
+        self.target = list(target)
+        self.profile = profile
+        self.t0 = t0
+        self.cartesian = cartesian
+        self.jog_axis = -1
+        self.jog_dir = 0.0
+
+
+class SimulatedRobot:
+    """State of one simulated controller. All exports below operate on `robot`."""
+
+    def __init__(self, clock=None, call_latency: float = 0.0, motion_buffer: int = 0):
+        self.clock = clock if clock is not None else VirtualClock(rate=1.0)
+        self.call_latency = call_latency
+        self.motion_buffer = motion_buffer  # 0: a new move replaces the running one; 1: one is held behind it
+        self.call_counts = Counter()
+        self.lock = threading.RLock()
+        self.connected = False
+        self.servo_state = SERVO_STOP
+        self.speed = 30
+        self.coord = 0
+        self.mode = 0
+        self.joints = [0.0] * AXES
+        self.cart = [400.0, 0.0, 500.0, 180.0, 0.0, 0.0, 0.0]
+        self.motion = None
+        self.queued = None  # (target, cartesian, vel, acc, dec) waiting behind self.motion
+
+    def enter(self, name: str):
+        """Bookkeeping done on entry to every export."""
+        self.call_counts[name] += 1
+        if self.call_latency > 0:
+            self.clock.sleep(self.call_latency)
+        self.update()
+
+    def update(self):
+        """Advance the active motion to the current (virtual) time."""
+        motion = self.motion
+        if motion is None:
+            return
+        pose = self.cart if motion.cartesian else self.joints
+        elapsed = self.clock.now() - motion.t0
+
+        if motion.jog_axis >= 0:
+            axis = motion.jog_axis
+            pose[axis] = motion.start[axis] + motion.jog_dir * JOG_SPEED * elapsed
+            return
+
+        profile = motion.profile
+        if elapsed >= profile.duration:
+            pose[:] = motion.target
+            self.motion = None
+            if self.queued is not None:
+                queued, self.queued = self.queued, None
+                self._begin_motion(*queued, t0=motion.t0 + profile.duration)
+                self.update()
+            elif self.servo_state == SERVO_RUNNING:
+                self.servo_state = SERVO_OK
+            return
+        s = profile.position(elapsed) / profile.distance
+        for i in range(AXES):
+            pose[i] = motion.start[i] + (motion.target[i] - motion.start[i]) * s
+
+    def start_motion(self, target, cartesian: bool, vel, acc, dec) -> int:
+        if not self.connected:
+            return -1
+        if self.servo_state in (SERVO_STOP, SERVO_ERROR):
+            return -2
+        target = [float(target[i]) for i in range(AXES)]
+        if self.motion is not None and self.motion.jog_axis < 0 and self.motion_buffer > 0:
+            if self.queued is not None:
+                return BUFFER_FULL
+            self.queued = (target, cartesian, vel, acc, dec)
+            return 0
+        # Replaces the running move (or jog) from the pose update() just interpolated
+        self.motion = None
+        self._begin_motion(target, cartesian, vel, acc, dec, t0=self.clock.now())
+        return 0
+
+    def _begin_motion(self, target, cartesian, vel, acc, dec, t0):
+        pose = self.cart if cartesian else self.joints
+        profile = move_profile(pose, target, vel, acc, dec, cartesian)
+        if profile.distance == 0:
+            if self.motion is None and self.servo_state == SERVO_RUNNING:
+                self.servo_state = SERVO_OK
+            return
+        self.motion = _Motion(pose, target, profile, t0, cartesian)
+        self.servo_state = SERVO_RUNNING
+
+    def idle_at(self) -> float:
+        """Time at which the running and buffered moves will have finished (inf while jogging)."""
+        with self.lock:
+            self.update()
+            motion = self.motion
+            if motion is None:
+                return self.clock.now()
+            if motion.jog_axis >= 0:
+                return float("inf")
+            end = motion.t0 + motion.profile.duration
+            if self.queued is not None:
+                target, cartesian, vel, acc, dec = self.queued
+                # The buffered move starts where the running one ends (poses are tracked per space)
+                start = motion.target if motion.cartesian == cartesian else (self.cart if cartesian else self.joints)
+                end += move_profile(start, target, vel, acc, dec, cartesian).duration
+            return end
+
+    def stop_motion(self):
+        self.motion = None
+        self.queued = None
+        if self.servo_state == SERVO_RUNNING:
+            self.servo_state = SERVO_OK
+
+
+robot = SimulatedRobot()
+
+
+def reset(clock=None, call_latency: float = 0.0, motion_buffer: int = 0) -> SimulatedRobot:
+    """Start over with a fresh robot (e.g. a VirtualClock(rate=None) for CI runs)."""
+    global robot
+    robot = SimulatedRobot(clock, call_latency, motion_buffer)
+    return robot
+
+
+def motion_buffer() -> int:
+    """Not an nrc_lib export: motion commands held behind the running move (see functions.motion_buffer)."""
+    return robot.motion_buffer
+
+
+# -------------------------
+# nrc_lib exports
+# -------------------------
+def connect_robot(ip, port, robot_name):
+    with robot.lock:
+        robot.enter("connect_robot")
+        robot.connected = True
+        return 0
+
+
+def disconnect_robot(robot_name):
+    with robot.lock:
+        robot.enter("disconnect_robot")
+        robot.connected = False
+        robot.stop_motion()
+        robot.servo_state = SERVO_STOP
+        return 0
+
+
+def get_connection_status(robot_name):
+    with robot.lock:
+        robot.enter("get_connection_status")
+        return 1 if robot.connected else 0
+
+
+def clear_error(robot_name):
+    with robot.lock:
+        robot.enter("clear_error")
+        if robot.servo_state == SERVO_ERROR:
+            robot.servo_state = SERVO_STOP
+        return 0
+
+
+def set_servo_state(state, robot_name):
+    with robot.lock:
+        robot.enter("set_servo_state")
+        if not robot.connected:
+            return -1
+        robot.servo_state = SERVO_OK if state else SERVO_STOP
+        if not state:
+            robot.stop_motion()
+        return 0
+
+
+def get_servo_state(robot_name):
+    with robot.lock:
+        robot.enter("get_servo_state")
+        return robot.servo_state
+
+
+def set_servo_poweron(robot_name):
+    with robot.lock:
+        robot.enter("set_servo_poweron")
+        if not robot.connected:
+            return -1
+        if robot.servo_state == SERVO_STOP:
+            robot.servo_state = SERVO_OK
+        return 0
+
+
+def set_servo_poweroff(robot_name):
+    with robot.lock:
+        robot.enter("set_servo_poweroff")
+        if not robot.connected:
+            return -1
+        robot.stop_motion()
+        robot.servo_state = SERVO_STOP
+        return 0
+
+
+def get_current_position(pos, coord, robot_name):
+    with robot.lock:
+        robot.enter("get_current_position")
+        if not robot.connected:
+            return -1
+        source = robot.joints if coord == 0 else robot.cart
+        for i in range(AXES):
+            pos[i] = source[i]
+        return 0
+
+
+def get_robot_running_state(robot_name):
+    with robot.lock:
+        robot.enter("get_robot_running_state")
+        return 1 if robot.motion is not None or robot.queued is not None else 0
+
+
+def set_speed(speed, robot_name):
+    with robot.lock:
+        robot.enter("set_speed")
+        robot.speed = speed
+        return 0
+
+
+def get_speed(robot_name):
+    with robot.lock:
+        robot.enter("get_speed")
+        return robot.speed
+
+
+def set_current_coord(coord, robot_name):
+    with robot.lock:
+        robot.enter("set_current_coord")
+        robot.coord = coord
+        return 0
+
+
+def get_current_coord(robot_name):
+    with robot.lock:
+        robot.enter("get_current_coord")
+        return robot.coord
+
+
+def set_current_mode(mode, robot_name):
+    with robot.lock:
+        robot.enter("set_current_mode")
+        robot.mode = mode
+        return 0
+
+
+def get_current_mode(robot_name):
+    with robot.lock:
+        robot.enter("get_current_mode")
+        return robot.mode
+
+
+def robot_start_jogging(axis, direction, robot_name):
+    with robot.lock:
+        robot.enter("robot_start_jogging")
+        if not robot.connected or robot.servo_state == SERVO_STOP or not 1 <= axis <= AXES:
+            return -1
+        cartesian = robot.coord != 0
+        pose = robot.cart if cartesian else robot.joints
+        motion = _Motion(pose, pose, None, robot.clock.now(), cartesian)
+        motion.jog_axis = axis - 1
+        motion.jog_dir = 1.0 if direction else -1.0
+        robot.queued = None
+        robot.motion = motion
+        robot.servo_state = SERVO_RUNNING
+        return 0
+
+
+def robot_stop_jogging(axis, robot_name):
+    with robot.lock:
+        robot.enter("robot_stop_jogging")
+        if robot.motion is not None and robot.motion.jog_axis >= 0:
+            robot.stop_motion()
+        return 0
+
+
+def robot_go_to_reset_position(robot_name):
+    with robot.lock:
+        robot.enter("robot_go_to_reset_position")
+        return robot.start_motion([0.0] * AXES, False, robot.speed, 100, 100)
+
+
+def robot_go_home(robot_name):
+    with robot.lock:
+        robot.enter("robot_go_home")
+        return robot.start_motion([0.0] * AXES, False, robot.speed, 100, 100)
+
+
+def robot_movej(pos, vel, coord, acc, dec, robot_name):
+    with robot.lock:
+        robot.enter("robot_movej")
+        return robot.start_motion(pos, coord != 0, vel, acc, dec)
+
+
+def robot_movel(pos, vel, coord, acc, dec, robot_name):
+    with robot.lock:
+        robot.enter("robot_movel")
+        return robot.start_motion(pos, True, vel, acc, dec)
+
+
+def job_stop(robot_name):
+    with robot.lock:
+        robot.enter("job_stop")
+        robot.stop_motion()
+        return 0
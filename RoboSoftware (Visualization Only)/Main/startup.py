@@ -0,0 +1,61 @@
+"""
+Startup bookkeeping: a per-phase timing trace and the background loader for
+the 3D view's assets.
+
+The main window is shown before anything heavy happens.  VizLoader then
+imports robo_viz (pyvista/VTK) and loads the robot model (URDF + meshes, via
+viz_cache) on its own thread; the GUI thread only builds the widget once the
+data is ready.  Importing is safe off the GUI thread; creating widgets is not,
+so nothing here touches Qt widgets.
+"""
+import importlib
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class StartupTrace:
+    """Wall-clock breakdown of application startup by phase."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = []   # (name, start offset s, duration s, where)
+
+    def mark(self, phase: str):
+        """End the current GUI-thread phase (it began where the previous one ended)."""
+        now = time.perf_counter()
+        self.phases.append((phase, self._last - self.start, now - self._last, "gui"))
+        self._last = now
+
+    def span(self, phase: str, began: float, ended: float, where: str = "gui"):
+        """Record a phase measured elsewhere (background thread, lazy tab setup)."""
+        self.phases.append((phase, began - self.start, ended - began, where))
+
+    def report(self) -> str:
+        lines = ["Startup trace (ms):"]
+        for name, offset, duration, where in self.phases:
+            lines.append(f"  {offset * 1000:8.1f} +{duration * 1000:8.1f}  {name} [{where}]")
+        return "\n".join(lines)
+
+
+class VizLoader(QThread):
+    """Imports robo_viz and loads the robot model off the GUI thread."""
+
+    # robo_viz module, (chain, mesh_data) or None, {phase: (began, ended)}
+    loaded = pyqtSignal(object, object, object)
+    failed = pyqtSignal(str)
+
+    def run(self):
+        timings = {}
+        try:
+            began = time.perf_counter()
+            robo_viz = importlib.import_module("robo_viz")
+            timings["import robo_viz"] = (began, time.perf_counter())
+            began = time.perf_counter()
+            model = robo_viz.load_model()
+            timings["load robot model"] = (began, time.perf_counter())
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(robo_viz, model, timings)
@@ -0,0 +1,135 @@
+import time
+from typing import NamedTuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import functions
+
+
+class RobotState(NamedTuple):
+    """Immutable snapshot of everything the UI shows about the robot."""
+
+    timestamp: float          # time.monotonic() when the read finished
+    joints: tuple             # 7 joint values (deg)
+    cart: tuple               # 7 Cartesian values in `coord`
+    coord: int                # 0=Tool, 1=Origin, 2=Base
+    running_state: int        # 0=idle, 1=running
+    servo_state: int          # servoStatus from nrc_lib.h
+    connection_status: int
+
+
+def read_robot_state(handle: functions.RobotHandle, coord: int, apply_coord: bool) -> RobotState:
+    """One full telemetry read. Runs on the robot I/O thread."""
+    if apply_coord:
+        handle.set_current_coord(coord)
+    joints = tuple(handle.read_joints().tolist())
+    cart = tuple(handle.read_cart(coord).tolist())
+    return RobotState(
+        time.monotonic(),
+        joints,
+        cart,
+        coord,
+        handle.get_robot_running_state(),
+        handle.get_servo_state(),
+        handle.get_connection_status(),
+    )
+
+
+class TelemetryPoller(QObject):
+    """
+    Reads the robot state at a fixed rate on the I/O worker and publishes it
+    as a RobotState. Widgets read `latest` (or listen to stateUpdated) instead
+    of talking to the controller themselves.
+    """
+
+    stateUpdated = pyqtSignal(object)  # RobotState
+
+    def __init__(self, robot_io, robot_name_provider, interval_ms: int = 100, parent=None):
+        super().__init__(parent)
+        self.robot_io = robot_io
+        self.robot_name_provider = robot_name_provider
+        self.latest = None
+        self._handle = None
+        self._coord = 0
+        self._coord_applied = False
+        self._pending = False
+        self._failures = 0   # failed reads in a row; only the first and the recovery are printed
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.poll)
+
+    # -------------------------
+    # Configuration
+    # -------------------------
+    @property
+    def interval_ms(self) -> int:
+        return self._timer.interval()
+
+    def set_interval(self, interval_ms: int):
+        self._timer.setInterval(max(1, int(interval_ms)))
+
+    def set_coord(self, coord: int):
+        """Select the Cartesian frame reported in `cart`."""
+        if coord != self._coord:
+            self._coord = coord
+            self._coord_applied = False
+
+    def mark_coord_dirty(self):
+        """Call after something else changed the controller's current coord."""
+        self._coord_applied = False
+
+    def start(self):
+        self._coord_applied = False
+        self._failures = 0
+        self._timer.start()
+        self.poll()
+
+    def stop(self):
+        self._timer.stop()
+        self.latest = None
+
+    def is_fresh(self, max_age: float = None) -> bool:
+        """True if `latest` is no older than max_age seconds (default: two intervals)."""
+        if self.latest is None:
+            return False
+        if max_age is None:
+            max_age = 2 * self.interval_ms / 1000.0
+        return time.monotonic() - self.latest.timestamp <= max_age
+
+    # -------------------------
+    # Polling
+    # -------------------------
+    def poll(self):
+        # At most one read in flight; a slow controller lowers the rate instead of queueing reads
+        if self._pending:
+            return
+        self._pending = True
+        robot_name = self.robot_name_provider()
+        if self._handle is None or self._handle.robot_name != robot_name:
+            self._handle = functions.RobotHandle(robot_name)
+        apply_coord = not self._coord_applied
+        self._coord_applied = True
+        self.robot_io.submit(
+            read_robot_state,
+            self._handle,
+            self._coord,
+            apply_coord,
+            callback=self._on_state,
+        )
+
+    def _on_state(self, state, error):
+        self._pending = False
+        if error is not None:
+            self._coord_applied = False
+            if not self._failures:
+                print(f"⚠️ Telemetry read failed: {error}")
+            self._failures += 1
+            return
+        if self._failures:
+            print(f"✅ Telemetry reads recovered after {self._failures} failed read(s)")
+            self._failures = 0
+        if not self._timer.isActive():
+            return  # stopped while the read was in flight
+        self.latest = state
+        self.stateUpdated.emit(state)
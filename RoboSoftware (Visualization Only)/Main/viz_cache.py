@@ -0,0 +1,268 @@
+"""
+On-disk cache of everything the 3D view needs at startup.
+
+load_robot_model(urdf_path) returns the compiled KinematicChain and, per
+visual, its levels of detail as triangle meshes (points, VTK face array),
+finest first.  The first (cold) start parses the URDF, reads and triangulates
+every mesh, decimates it to each face budget in LOD_FACES and adds the
+link's coarse collision mesh as the last level, then writes one bundle file:
+
+    magic b"VIZB\\x00\\x00\\x00\\x01" | u64 JSON length | JSON | 64-byte aligned arrays
+
+The JSON holds the chain's names/indices, the array table and the cache key:
+a SHA-256 of the URDF, the decimator (the VTK version, or none when pyvista
+is missing and every level keeps full resolution) plus size, mtime and
+SHA-256 of every mesh file.  Installing pyvista thus rebuilds a bundle that
+was written without decimated levels.  Warm
+starts hash the (small) URDF, stat the meshes (re-hashing only files whose
+size or mtime changed) and memory-map the bundle; no mesh is parsed.
+"""
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from kinematics import KinematicChain, Visual
+
+MAGIC = b"VIZB\x00\x00\x00\x01"
+ALIGN = 64
+LOD_FACES = (20000, 5000, 1500)   # face budget per mesh for each decimated level
+CACHE_DIR_NAME = ".viz_cache"
+
+
+# -------------------------
+# Public API
+# -------------------------
+def load_robot_model(urdf_path: str, cache_dir: str = None, lod_faces=LOD_FACES):
+    """
+    (chain, meshes) for urdf_path, where meshes[i] lists the levels of
+    chain.visuals[i], finest first, each as (points (n, 3) float32, faces
+    (m * 4,) int64 in VTK "3, a, b, c" layout).  Levels that would not be
+    coarser than the previous one are left out, so visuals may differ in
+    how many levels they have.
+    Uses the bundle when it is current, otherwise rebuilds it.
+    """
+    lod_faces = list(lod_faces)
+    path = bundle_path(urdf_path, cache_dir)
+    urdf_hash = _sha256(urdf_path)
+    decimator = _decimator()
+    cached = _read_bundle(path, urdf_hash, lod_faces, decimator)
+    if cached is not None:
+        return cached
+
+    chain = KinematicChain.from_urdf(urdf_path)
+    meshes = [_levels(visual, lod_faces) for visual in chain.visuals]
+    try:
+        _write_bundle(path, urdf_hash, lod_faces, decimator, chain, meshes)
+    except OSError as e:
+        print(f"⚠️ Could not write viz cache {path}: {e}")
+    return chain, meshes
+
+
+def bundle_path(urdf_path: str, cache_dir: str = None) -> str:
+    if cache_dir is None:
+        cache_dir = os.environ.get("ROBO_VIZ_CACHE") or os.path.join(os.path.dirname(os.path.abspath(urdf_path)), CACHE_DIR_NAME)
+    name = os.path.splitext(os.path.basename(urdf_path))[0]
+    return os.path.join(cache_dir, name + ".vizbundle")
+
+
+def read_mesh(filename: str):
+    """Triangle mesh as (points float32 (n, 3), VTK faces int64 (m * 4,))."""
+    if filename.lower().endswith(".stl") and _is_binary_stl(filename):
+        return _read_binary_stl(filename)
+    import pyvista as pv  # ASCII STL, DAE, OBJ...
+    mesh = pv.read(filename).triangulate()
+    return np.asarray(mesh.points, dtype=np.float32), np.asarray(mesh.faces, dtype=np.int64)
+
+
+# -------------------------
+# Mesh preprocessing
+# -------------------------
+def _is_binary_stl(filename: str) -> bool:
+    size = os.path.getsize(filename)
+    with open(filename, "rb") as f:
+        f.seek(80)
+        count = f.read(4)
+    return len(count) == 4 and 84 + 50 * struct.unpack("<I", count)[0] == size
+
+
+def _read_binary_stl(filename: str):
+    record = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+    triangles = np.fromfile(filename, dtype=record, offset=84)["vertices"].reshape(-1, 3)
+    # STL repeats shared vertices per triangle; weld them
+    points, index = np.unique(triangles, axis=0, return_inverse=True)
+    return points.astype(np.float32), _vtk_faces(index.reshape(-1, 3))
+
+
+def _vtk_faces(triangles) -> np.ndarray:
+    faces = np.empty((len(triangles), 4), dtype=np.int64)
+    faces[:, 0] = 3
+    faces[:, 1:] = triangles
+    return faces.ravel()
+
+
+def _levels(visual, lod_faces):
+    full = read_mesh(visual.filename)
+    levels = []
+    for max_faces in lod_faces:
+        level = _decimate(*full, max_faces)
+        if not levels or _face_count(level) < _face_count(levels[-1]):
+            levels.append(level)
+    if visual.coarse and os.path.exists(visual.coarse):
+        coarse = read_mesh(visual.coarse)
+        if _face_count(coarse) < _face_count(levels[-1]):
+            levels.append(coarse)
+    return levels
+
+
+def _face_count(mesh) -> int:
+    return len(mesh[1]) // 4
+
+
+def _decimator():
+    """What _decimate decimates with, for the cache key: "vtk <version>", or None without pyvista."""
+    try:
+        import pyvista as pv
+    except ImportError:
+        return None
+    return "vtk " + ".".join(str(part) for part in pv.vtk_version_info)
+
+
+def _decimate(points, faces, max_faces):
+    count = len(faces) // 4
+    if count <= max_faces:
+        return points, faces
+    try:
+        import pyvista as pv
+    except ImportError:
+        return points, faces  # keep full resolution without VTK
+    mesh = pv.PolyData(np.asarray(points, dtype=np.float64), faces).decimate(1.0 - max_faces / count)
+    return np.asarray(mesh.points, dtype=np.float32), np.asarray(mesh.faces, dtype=np.int64)
+
+
+# -------------------------
+# Bundle file
+# -------------------------
+def _sha256(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _mesh_record(filename: str) -> dict:
+    stat = os.stat(filename)
+    return {"path": filename, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _sha256(filename)}
+
+
+def _mesh_current(record: dict) -> bool:
+    try:
+        stat = os.stat(record["path"])
+    except OSError:
+        return False
+    if stat.st_size == record["size"] and stat.st_mtime_ns == record["mtime_ns"]:
+        return True
+    return _sha256(record["path"]) == record["sha256"]
+
+
+def _write_bundle(path, urdf_hash, lod_faces, decimator, chain, meshes):
+    arrays = {
+        "origins": chain.origins,
+        "axes": chain.axes,
+        "limits": chain.limits,
+        "visual_origins": np.array([v.origin for v in chain.visuals]).reshape(-1, 4, 4),
+        "visual_scales": np.array([v.scale for v in chain.visuals]).reshape(-1, 3),
+    }
+    for i, levels in enumerate(meshes):
+        for k, (points, faces) in enumerate(levels):
+            arrays[f"mesh{i}_lod{k}_points"] = np.ascontiguousarray(points, dtype=np.float32)
+            arrays[f"mesh{i}_lod{k}_faces"] = np.ascontiguousarray(faces, dtype=np.int64)
+
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+
+    meta = {
+        "urdf_sha256": urdf_hash,
+        "lod_faces": lod_faces,
+        "decimator": decimator,
+        "levels": [len(levels) for levels in meshes],
+        "meshes": [_mesh_record(f) for v in chain.visuals for f in (v.filename, v.coarse) if f and os.path.exists(f)],
+        "chain": {
+            "name": chain.name,
+            "link_names": chain.link_names,
+            "parents": chain.parents,
+            "joint_types": chain.joint_types,
+            "joint_columns": chain.joint_columns,
+            "joint_names": chain.joint_names,
+            "visual_links": [v.link for v in chain.visuals],
+            "visual_files": [v.filename for v in chain.visuals],
+            "visual_coarse": [v.coarse for v in chain.visuals],
+        },
+        "arrays": table,
+    }
+    header = json.dumps(meta).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + table[name]["offset"])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def _read_bundle(path, urdf_hash, lod_faces, decimator):
+    """(chain, meshes) from a current bundle, or None if missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<Q", f.read(8))
+            meta = json.loads(f.read(length).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    if meta["urdf_sha256"] != urdf_hash or meta["lod_faces"] != lod_faces:
+        return None
+    if meta.get("decimator") != decimator:
+        return None   # e.g. built without pyvista, so without decimated levels
+    if not all(_mesh_current(record) for record in meta["meshes"]):
+        return None
+
+    data_start = _aligned(len(MAGIC) + 8 + length)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def array(name):
+        info = meta["arrays"][name]
+        dtype = np.dtype(info["dtype"])
+        start = data_start + info["offset"]
+        count = int(np.prod(info["shape"]))
+        return buffer[start:start + count * dtype.itemsize].view(dtype).reshape(info["shape"])
+
+    c = meta["chain"]
+    visual_origins = array("visual_origins")
+    visual_scales = array("visual_scales")
+    visuals = [
+        Visual(link, filename, visual_origins[i], visual_scales[i], coarse)
+        for i, (link, filename, coarse) in enumerate(zip(c["visual_links"], c["visual_files"], c["visual_coarse"]))
+    ]
+    chain = KinematicChain(
+        c["link_names"], c["parents"], array("origins"), c["joint_types"], array("axes"),
+        c["joint_columns"], c["joint_names"], array("limits"), visuals, name=c["name"],
+    )
+    meshes = [
+        [(array(f"mesh{i}_lod{k}_points"), array(f"mesh{i}_lod{k}_faces")) for k in range(count)]
+        for i, count in enumerate(meta["levels"])
+    ]
+    return chain, meshes
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
@@ -0,0 +1,66 @@
+"""
+Render-on-change frame scheduling for the 3D robot view.
+
+FrameScheduler.request() asks for a frame; nothing is drawn right away.  At
+most one frame runs per display refresh, and every request made while a
+frame is pending is folded into it.  The frame calls draw(), which renders
+only if something visible changed and returns whether it did, so an idle
+view costs one cheap comparison per request and no renders.
+"""
+import math
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QGuiApplication
+
+DEFAULT_REFRESH_HZ = 60.0
+
+
+def display_frame_ms() -> float:
+    """Refresh interval of the primary screen (60 Hz if unknown)."""
+    screen = QGuiApplication.primaryScreen()
+    rate = screen.refreshRate() if screen is not None else 0.0
+    return 1000.0 / (rate if rate > 1.0 else DEFAULT_REFRESH_HZ)
+
+
+class FrameScheduler(QObject):
+    def __init__(self, draw, frame_ms: float = None, parent=None):
+        """draw() -> bool: render if needed, True if a render was performed."""
+        super().__init__(parent)
+        self._draw = draw
+        self.frame_ms = frame_ms if frame_ms is not None else display_frame_ms()
+        self._last_frame = -math.inf
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._frame)
+
+        # Counters
+        self.performed = 0   # frames that rendered
+        self.skipped = 0     # frames with nothing to draw
+        self.coalesced = 0   # requests merged into an already pending frame
+
+    def request(self):
+        if self._timer.isActive():
+            self.coalesced += 1
+            return
+        wait_ms = (self._last_frame - time.monotonic()) * 1000.0 + self.frame_ms
+        self._timer.start(math.ceil(max(0.0, wait_ms)))
+
+    def flush(self):
+        """Run a pending frame now."""
+        if self._timer.isActive():
+            self._timer.stop()
+            self._frame()
+
+    def stop(self):
+        self._timer.stop()
+
+    def stats(self) -> dict:
+        return {"performed": self.performed, "skipped": self.skipped, "coalesced": self.coalesced}
+
+    def _frame(self):
+        self._last_frame = time.monotonic()
+        if self._draw():
+            self.performed += 1
+        else:
+            self.skipped += 1
@@ -0,0 +1,77 @@
+"""
+Level-of-detail choice for the 3D robot view.
+
+LodSelector.choose() returns the level (0 = finest) to draw next from:
+  - how large the robot appears: its projected height in pixels, from the
+    viewport height and the camera distance, bounds how many triangles are
+    worth drawing (TRIANGLES_PER_PIXEL of the covered area);
+  - motion: while the joints move faster than FAST_SPEED the view drops
+    MOTION_DROP levels, and detail comes back once the arm is still;
+  - the frame budget: record_frame() keeps a moving average of render
+    times and, while moving, steps to coarser levels when it runs over
+    budget and back when there is headroom.
+"""
+import math
+
+FRAME_BUDGET_MS = 1000.0 / 30.0
+TRIANGLES_PER_PIXEL = 0.5
+FAST_SPEED = 0.35          # rad/s, fastest joint
+MOTION_DROP = 1
+VIEW_ANGLE = 30.0          # degrees, VTK's default camera view angle
+FRAME_AVERAGING = 0.2      # weight of the newest frame in the moving average
+BUDGET_COOLDOWN = 10       # frames between budget adjustments
+
+
+class LodSelector:
+    def __init__(self, level_faces, model_radius: float = 1.0, frame_budget_ms: float = FRAME_BUDGET_MS):
+        """
+        level_faces:  total triangles drawn at each level, finest first
+        model_radius: rough size of the robot (scene units) for the projection
+        """
+        self.level_faces = list(level_faces)
+        self.model_radius = model_radius
+        self.frame_budget_ms = frame_budget_ms
+        self.frame_ms = None        # moving average of recent render times
+        self.budget_bias = 0        # extra levels dropped to stay within budget
+        self._frames_since_change = 0
+        self.level = 0
+
+    @property
+    def levels(self) -> int:
+        return len(self.level_faces)
+
+    def size_level(self, viewport_px: float, distance: float) -> int:
+        """Finest level whose triangle count the projected robot can show."""
+        if distance <= 0:
+            return 0
+        half_view = math.tan(math.radians(VIEW_ANGLE) / 2)
+        projected_px = min(viewport_px, viewport_px * self.model_radius / (distance * half_view))
+        useful = projected_px * projected_px * TRIANGLES_PER_PIXEL
+        for level, faces in enumerate(self.level_faces):
+            if faces <= useful:
+                return level
+        return self.levels - 1
+
+    def choose(self, viewport_px: float, distance: float, speed: float) -> int:
+        """viewport_px: view height in pixels; speed: fastest joint (rad/s)."""
+        level = self.size_level(viewport_px, distance)
+        if speed > FAST_SPEED:
+            level += MOTION_DROP + self.budget_bias
+        self.level = max(0, min(self.levels - 1, level))
+        return self.level
+
+    def record_frame(self, ms: float, moving: bool):
+        """Render time of the frame just drawn at self.level."""
+        if self.frame_ms is None:
+            self.frame_ms = ms
+        else:
+            self.frame_ms += FRAME_AVERAGING * (ms - self.frame_ms)
+        self._frames_since_change += 1
+        if not moving or self._frames_since_change < BUDGET_COOLDOWN:
+            return
+        if self.frame_ms > self.frame_budget_ms and self.level < self.levels - 1:
+            self.budget_bias += 1
+            self._frames_since_change = 0
+        elif self.frame_ms < 0.5 * self.frame_budget_ms and self.budget_bias > 0:
+            self.budget_bias -= 1
+            self._frames_since_change = 0
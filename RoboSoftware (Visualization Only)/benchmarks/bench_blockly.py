@@ -0,0 +1,192 @@
+"""
+Blockly runtime: compile time and interpreter overhead per executed block.
+
+Builds synthetic programs the way the web view serialises them: a flat list
+of --blocks mixed statements (variables, compares, jogs, prints, nested
+repeats), and the same list wrapped in a repeat of --loops iterations.  Robot
+actions go to a host whose methods do nothing, so the times are pure
+interpreter overhead; the watched column also records RunEvents with a
+thread flushing them at the editor's rate, as the GUI does, and the profiled
+column adds the per-block profiler the GUI leaves on for every run.  The
+profiler's overhead over the watched run (what the GUI would cost without it)
+is checked against PROFILE_TARGET; over a quiet run, where profiling is
+opt-in (run_blockly.py --profile), it is printed for reference.  Runs with
+and without the profiler alternate and the overhead is the median over
+--repeat pairs, so drift and scheduling noise hit both alike.  A jog-heavy
+program then shows what the peephole optimizer saves in controller position
+reads.
+
+    python benchmarks/bench_blockly.py [--blocks 10000] [--loops 20] [--repeat 9]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main"))
+
+import threading
+
+from blockly_runtime import (CALL, EVENT_FLUSH_INTERVAL, JOG_KINDS, BlockProfile, Executor, RunEvents,
+                             compile_program, optimize)
+
+PROFILE_TARGET = 2.0   # percent over the GUI's watched run; the GUI profiles every run
+
+
+class NullHost:
+    """Accepts every host call and does nothing."""
+
+    def __getattr__(self, name):
+        if not name.startswith("apply_blockly_"):
+            raise AttributeError(name)
+        return lambda *args: None
+
+    def apply_blockly_condition(self, condition_type, expected):
+        return expected
+
+    def apply_blockly_get_coordinates(self, mode, store, context_label):
+        return [0.0] * 7
+
+
+def number(value):
+    return {"kind": "literal", "valueType": "number", "value": value}
+
+
+def variable(name):
+    return {"kind": "variable", "name": name}
+
+
+def synthetic_program(blocks: int):
+    """About `blocks` statements, cycling through the block types the web view emits."""
+    pattern = [
+        lambda i: {"type": "set_variable", "name": "counter", "value": number(i)},
+        lambda i: {"type": "jog_joint", "joint": str(i % 6), "delta": number(0.5)},
+        lambda i: {"type": "jog_linear", "axis": "xyz"[i % 3], "delta": variable("counter")},
+        lambda i: {"type": "if_variable_compare", "name": "counter", "operator": "GT", "value": number(i // 2),
+                   "true_branch": [{"type": "set_speed", "value": number(30)}],
+                   "false_branch": [{"type": "print", "message": variable("counter")}]},
+        lambda i: {"type": "repeat_loop", "count": number(3),
+                   "body": [{"type": "move_joint_absolute", "joint": "1", "angle": variable("counter")}]},
+        lambda i: {"type": "get_coordinates", "mode": "joint", "store": "here"},
+        lambda i: {"type": "print", "message": {"kind": "literal", "valueType": "string", "value": "tick"}},
+    ]
+    steps = []
+    count = 0
+    i = 0
+    while count < blocks:
+        step = pattern[i % len(pattern)](i)
+        steps.append(step)
+        count += 1 + len(step.get("true_branch", [])) + len(step.get("false_branch", [])) + len(step.get("body", []))
+        i += 1
+    return steps
+
+
+def jog_program(blocks: int, seed: int = 0):
+    """Runs of constant jogs (a few joints/axes each) between print blocks."""
+    rng = random.Random(seed)
+    steps = []
+    while len(steps) < blocks:
+        kind, places = rng.choice((("jog_joint", "012345"), ("jog_linear", "xyz")))
+        key = "joint" if kind == "jog_joint" else "axis"
+        for _ in range(rng.randint(1, 8)):
+            steps.append({"type": kind, key: rng.choice(places[:3]), "delta": number(rng.choice((-1, 0, 1, 2)))})
+        steps.append({"type": "print", "message": {"kind": "literal", "valueType": "string", "value": "run"}})
+    return steps
+
+
+def position_reads(program):
+    """Controller position reads one run makes: one per jog block or folded jog sequence."""
+    return sum(1 for ins in program.instructions
+               if ins.op == CALL and (ins.func in JOG_KINDS or ins.func == "apply_blockly_jog_sequence"))
+
+
+def time_run(program, trace, profile=False, watched=False):
+    executed = [0]
+
+    def log(_message):
+        executed[0] += 1
+
+    events = RunEvents(program) if watched else None
+    executor = Executor(program, NullHost(), log=log, trace=trace,
+                        profile=BlockProfile(program) if profile else None, events=events)
+    done = threading.Event()
+
+    def flusher():
+        while not done.wait(EVENT_FLUSH_INTERVAL):
+            events.flush()
+
+    if watched:
+        threading.Thread(target=flusher, daemon=True).start()
+    start = time.perf_counter()
+    executor.run()
+    elapsed = time.perf_counter() - start
+    done.set()
+    return elapsed
+
+
+def compare_profiled(program, repeat, **options):
+    """Best times without and with the profiler, and the median overhead in percent, runs alternating."""
+    plain, profiled = [], []
+    for _ in range(repeat):
+        plain.append(time_run(program, **options))
+        profiled.append(time_run(program, profile=True, **options))
+    overhead = statistics.median((with_profile / without - 1) * 100 for without, with_profile in zip(plain, profiled))
+    return min(plain), min(profiled), overhead
+
+
+def count_executed(program):
+    """Instructions executed by one run (counted with a wrapped host)."""
+    calls = [0]
+
+    class CountingHost(NullHost):
+        def __getattr__(self, name):
+            handler = super().__getattr__(name)
+
+            def counted(*args):
+                calls[0] += 1
+                return handler(*args)
+            return counted
+
+    Executor(program, CountingHost(), log=lambda _m: None, trace=False).run()
+    return calls[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=10000, help="statements in the synthetic program")
+    parser.add_argument("--loops", type=int, default=20, help="outer repeat count for the looped run")
+    parser.add_argument("--repeat", type=int, default=9, help="runs per measurement; the best one counts")
+    args = parser.parse_args()
+
+    steps = synthetic_program(args.blocks)
+    looped = [{"type": "repeat_loop", "count": number(args.loops), "body": steps}]
+
+    for name, source in (("flat", steps), (f"repeat x{args.loops}", looped)):
+        start = time.perf_counter()
+        program = compile_program(source)
+        compile_time = time.perf_counter() - start
+        actions = count_executed(program)
+        quiet, _, over_quiet = compare_profiled(program, args.repeat, trace=False)
+        traced = min(time_run(program, trace=True) for _ in range(args.repeat))
+        watched, profiled, over_watched = compare_profiled(program, args.repeat, trace=True, watched=True)
+        print(f"{name:<12} {len(program.instructions):6d} instructions, compile {compile_time * 1000:7.1f} ms | "
+              f"{actions} actions run: {quiet * 1e6 / actions:5.2f} us/block, "
+              f"{traced * 1e6 / actions:5.2f} us/block traced, {watched * 1e6 / actions:5.2f} watched, "
+              f"{profiled * 1e6 / actions:5.2f} profiled")
+        verdict = "✅" if over_watched < PROFILE_TARGET else "❌"
+        print(f"{'':<12} profiler overhead {over_watched:+5.1f}% over watched (target < {PROFILE_TARGET:.0f}%) "
+              f"{verdict}, {over_quiet:+5.1f}% over quiet (opt-in)")
+
+    compiled = compile_program(jog_program(args.blocks))
+    start = time.perf_counter()
+    optimized = optimize(compiled)
+    optimize_time = time.perf_counter() - start
+    print(f"jog-heavy    {len(compiled.instructions):6d} -> {len(optimized.instructions)} instructions, "
+          f"optimize {optimize_time * 1000:7.1f} ms | position reads "
+          f"{position_reads(compiled)} -> {position_reads(optimized)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Forward kinematics: urdfpy URDF.link_fk vs. kinematics.KinematicChain.
+
+Times one configuration at a time (the live view) and an (N, 6) batch (path
+previews, offline analysis), and checks both give the same link transforms.
+urdfpy is optional: without it only KinematicChain is timed.
+
+    python benchmarks/bench_fk.py [--poses 2000] [--batch 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main"))
+
+from kinematics import KinematicChain
+
+URDF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main", "Models", "ur5_g.urdf")
+
+
+def load_urdfpy():
+    try:
+        if not hasattr(np, "float"):
+            np.float = float  # urdfpy still uses the removed alias
+        from urdfpy import URDF
+    except ImportError:
+        return None
+    try:
+        return URDF.load(URDF_PATH, lazy_load_meshes=True)
+    except TypeError:  # older urdfpy: meshes load eagerly
+        return URDF.load(URDF_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--poses", type=int, default=2000, help="single-configuration calls to time")
+    parser.add_argument("--batch", type=int, default=100000, help="configurations in the batch call")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    chain = KinematicChain.from_urdf(URDF_PATH)
+    print(f"build chain             {(time.perf_counter() - start) * 1000:8.2f} ms "
+          f"({len(chain.link_names)} links, {len(chain.joint_names)} joints)")
+
+    rng = np.random.default_rng(0)
+    q = rng.uniform(-np.pi, np.pi, (args.poses, len(chain.joint_names)))
+
+    start = time.perf_counter()
+    for row in q:
+        chain.fk(row)
+    chain_single = (time.perf_counter() - start) / args.poses
+    print(f"KinematicChain.fk       {chain_single * 1e6:8.1f} us/pose (one at a time)")
+
+    batch = rng.uniform(-np.pi, np.pi, (args.batch, len(chain.joint_names)))
+    start = time.perf_counter()
+    chain.fk(batch)
+    chain_batch = (time.perf_counter() - start) / args.batch
+    print(f"KinematicChain.fk       {chain_batch * 1e6:8.2f} us/pose ((N, 6) batch of {args.batch})")
+
+    robot = load_urdfpy()
+    if robot is None:
+        print("urdfpy not installed: skipping the link_fk comparison")
+        return
+
+    cfgs = [dict(zip(chain.joint_names, row)) for row in q]
+    start = time.perf_counter()
+    results = [robot.link_fk(cfg=cfg) for cfg in cfgs]
+    urdfpy_single = (time.perf_counter() - start) / args.poses
+    print(f"URDF.link_fk            {urdfpy_single * 1e6:8.1f} us/pose")
+    print(f"speed-up                {urdfpy_single / chain_single:8.1f}x single, "
+          f"{urdfpy_single / chain_batch:8.1f}x batched")
+
+    # Same transforms for every link
+    transforms = chain.fk(q)
+    error = 0.0
+    for k, fk in enumerate(results):
+        for link, T in fk.items():
+            error = max(error, np.abs(transforms[k, chain.link_index(link.name)] - T).max())
+    print(f"max |difference|        {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
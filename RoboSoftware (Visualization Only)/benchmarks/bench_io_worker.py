@@ -0,0 +1,96 @@
+"""
+GUI event-loop latency while the controller is slow.
+
+A 10 ms probe timer measures how late the Qt event loop services it while a
+100 ms poll timer issues controller calls that take 50-200 ms each.  The calls
+run either directly on the GUI thread (old behaviour) or through RobotIOWorker.
+
+    python benchmarks/bench_io_worker.py [--seconds 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("NRC_BACKEND", "sim")  # robot_io imports functions; no DLL needed here
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main"))
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from robot_io import RobotIOWorker
+
+PROBE_MS = 10
+POLL_MS = 100
+
+
+def slow_controller_call(low_ms, high_ms):
+    time.sleep(random.uniform(low_ms, high_ms) / 1000.0)
+    return [0.0] * 7
+
+
+def run_scenario(app, use_worker, low_ms, high_ms, seconds):
+    worker = RobotIOWorker()
+    worker.start()
+    lateness = []
+    pending = [False]
+    last = [time.perf_counter()]
+
+    def probe():
+        now = time.perf_counter()
+        lateness.append(max(0.0, (now - last[0]) * 1000.0 - PROBE_MS))
+        last[0] = now
+
+    def done(_result, _error):
+        pending[0] = False
+
+    def poll():
+        if not use_worker:
+            slow_controller_call(low_ms, high_ms)
+        elif not pending[0]:
+            pending[0] = True
+            worker.submit(slow_controller_call, low_ms, high_ms, callback=done)
+
+    probe_timer = QTimer()
+    probe_timer.timeout.connect(probe)
+    poll_timer = QTimer()
+    poll_timer.timeout.connect(poll)
+    probe_timer.start(PROBE_MS)
+    poll_timer.start(POLL_MS)
+
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    last[0] = time.perf_counter()
+    app.exec_()
+
+    probe_timer.stop()
+    poll_timer.stop()
+    worker.stop()
+
+    lateness.sort()
+    count = len(lateness)
+    return {
+        "p50": lateness[count // 2],
+        "p99": lateness[min(count - 1, int(count * 0.99))],
+        "max": lateness[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each scenario")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    print(f"{'controller latency':>20} {'mode':>12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for low_ms, high_ms in ((50, 50), (100, 100), (200, 200), (50, 200)):
+        for use_worker in (False, True):
+            stats = run_scenario(app, use_worker, low_ms, high_ms, args.seconds)
+            label = f"{low_ms}-{high_ms} ms" if low_ms != high_ms else f"{low_ms} ms"
+            mode = "io worker" if use_worker else "gui thread"
+            print(f"{label:>20} {mode:>12} {stats['p50']:8.1f} {stats['p99']:8.1f} {stats['max']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
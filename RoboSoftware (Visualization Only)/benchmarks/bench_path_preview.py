@@ -0,0 +1,78 @@
+"""
+Program path preview: time to turn an N-step program into preview geometry.
+
+Times path_preview's joint-space interpolation, the batched tool FK over the
+interpolated path and the merged ghost-pose mesh, for a random-walk program.
+With pyvista installed it also times building the two actors and rendering
+them offscreen.
+
+    python benchmarks/bench_path_preview.py [--steps 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main")
+sys.path.insert(0, MAIN_DIR)
+
+import path_preview
+import viz_cache
+
+URDF_PATH = os.path.join(MAIN_DIR, "Models", "ur5_g.urdf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=50000, help="program length")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="viz_cache_") as cache_dir:
+        chain, meshes = viz_cache.load_robot_model(URDF_PATH, cache_dir=cache_dir)
+        coarse = [levels[-1] for levels in meshes]
+
+        rng = np.random.default_rng(0)
+        q = np.cumsum(rng.normal(0.0, 0.03, (args.steps, len(chain.joint_names))), axis=0)
+
+        start = time.perf_counter()
+        path, waypoint_index = path_preview.interpolate_moves(q)
+        interpolate = time.perf_counter() - start
+        start = time.perf_counter()
+        points = path_preview.link_positions(chain, path, "tool0")
+        fk = time.perf_counter() - start
+        start = time.perf_counter()
+        ghost_points, ghost_faces = path_preview.posed_meshes(chain, coarse, q[path_preview.ghost_indices(len(q))])
+        ghosts = time.perf_counter() - start
+
+        print(f"{args.steps} steps -> {len(path)} path samples, {len(ghost_faces) // 4} ghost triangles")
+        print(f"interpolate   {interpolate * 1000:8.1f} ms")
+        print(f"tool FK       {fk * 1000:8.1f} ms ({fk / len(path) * 1e6:.2f} us/sample)")
+        print(f"ghost mesh    {ghosts * 1000:8.1f} ms")
+        print(f"total         {(interpolate + fk + ghosts) * 1000:8.1f} ms")
+
+        try:
+            import pyvista as pv
+        except ImportError:
+            print("pyvista not installed: skipping the actor/render timing")
+            return
+        plotter = pv.Plotter(off_screen=True, window_size=(800, 600))
+        start = time.perf_counter()
+        polyline = pv.PolyData(points)
+        polyline.lines = np.concatenate(([len(points)], np.arange(len(points))))
+        polyline.verts = np.column_stack((np.ones(len(waypoint_index), dtype=np.int64), waypoint_index)).ravel()
+        plotter.add_mesh(polyline, line_width=2, point_size=6, render_points_as_spheres=True)
+        plotter.add_mesh(pv.PolyData(ghost_points, ghost_faces), opacity=0.2)
+        plotter.render()
+        print(f"actors+render {(time.perf_counter() - start) * 1000:8.1f} ms")
+        start = time.perf_counter()
+        for _ in range(20):
+            plotter.render()
+        print(f"re-render     {(time.perf_counter() - start) / 20 * 1000:8.1f} ms/frame")
+        plotter.close()
+
+
+if __name__ == "__main__":
+    main()
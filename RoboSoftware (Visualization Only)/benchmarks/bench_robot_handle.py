@@ -0,0 +1,62 @@
+"""
+Calls per second: functions.py free functions vs. RobotHandle.
+
+Needs a loadable nrc_lib (the Windows DLL, or nrc_stub on Linux). Run from
+the "RoboSoftware (Visualization Only)" folder so the library is found:
+
+    python benchmarks/bench_robot_handle.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main"))
+
+import functions
+
+ROBOT_NAME = "MyRobot"
+
+
+def measure(label, func, calls):
+    for _ in range(min(1000, calls)):
+        func()
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    elapsed = time.perf_counter() - start
+
+    # Net bytes still held after a burst of calls: ~0 means no steady-state garbage
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(1000):
+        func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    print(f"{label:<40} {calls / elapsed:>12,.0f} calls/s {elapsed / calls * 1e6:>8.2f} us/call {blocks:>6} live blocks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    functions.connect_robot("127.0.0.1", "6001", ROBOT_NAME)
+    functions.set_servo_poweron(ROBOT_NAME)
+    handle = functions.RobotHandle(ROBOT_NAME)
+    target = [0.0] * 7
+
+    measure("free get_current_position(coord=0)", lambda: functions.get_current_position(ROBOT_NAME, coord=0), args.calls)
+    measure("RobotHandle.read_joints()", handle.read_joints, args.calls)
+    measure("free get_robot_running_state()", lambda: functions.get_robot_running_state(ROBOT_NAME), args.calls)
+    measure("RobotHandle.get_robot_running_state()", handle.get_robot_running_state, args.calls)
+    measure("free robot_movej()", lambda: functions.robot_movej(target, 30, 0, 30, 30, ROBOT_NAME), args.calls)
+    measure("RobotHandle.movej()", lambda: handle.movej(target, 30, 0, 30, 30), args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Cycle time of a looped joint program on the simulated controller.
+
+Runs the functions.py API against sim_backend with a virtual clock, so hours
+of robot time take seconds.  --wait picks how step completion is detected:
+"timer" polls every 200 ms like the old Actions tab, "event" uses
+motion.wait_motion_done per step, "pipelined" runs whole loops through
+motion.run_waypoints like the current Actions tab (add --lookahead to send
+each move before the previous one ends, on a simulator that buffers one
+motion command; the default simulator, like nrc_lib, has no buffer).
+Use --max-cycle to fail (exit 1) on a cycle-time regression in CI.
+
+    python benchmarks/bench_sim_cycle.py [--hours 2] [--points 40] [--wait pipelined] [--lookahead 0.05] [--max-cycle 12.5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ["NRC_BACKEND"] = "sim"
+os.environ["NRC_SIM_RATE"] = "max"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main"))
+
+import numpy as np
+
+import functions
+import sim_backend
+from motion import run_waypoints, wait_motion_done
+from motion_profile import move_duration, move_durations
+
+ROBOT_NAME = "MyRobot"
+POLL_INTERVAL = 0.2  # the Actions tab run_timer period
+PIPELINE_CHUNK = 10  # loops per run_waypoints call
+
+
+def make_program(points, seed=1):
+    rng = random.Random(seed)
+    return [[rng.uniform(-90, 90) for _ in range(6)] + [0.0] for _ in range(points)]
+
+
+def run_loop(program, vel, acc, dec, wait):
+    clock = functions.clock
+    start = clock.now()
+    previous = list(sim_backend.robot.joints)
+    dead_time = 0.0
+    for pos in program:
+        expected = move_duration(previous, pos, vel, acc, dec)
+        step_start = clock.now()
+        functions.robot_movej(pos, vel=vel, coord=0, acc=acc, dec=dec, robot_name=ROBOT_NAME)
+        if wait == "timer":
+            clock.sleep(POLL_INTERVAL)
+            while functions.get_robot_running_state(ROBOT_NAME) != 0:
+                clock.sleep(POLL_INTERVAL)
+        else:
+            wait_motion_done(lambda: functions.get_robot_running_state(ROBOT_NAME), expected=expected)
+        dead_time += (clock.now() - step_start) - expected
+        previous = pos
+    return clock.now() - start, dead_time / len(program)
+
+
+def run_pipelined(handle, waypoints, loops, vel, acc, dec, lookahead):
+    cycles = run_waypoints(handle, waypoints, loops=loops, vel=vel, acc=acc, dec=dec, lookahead=lookahead)
+    ideal = move_durations(waypoints[-1], waypoints, vel, acc, dec).sum()
+    return [(cycle, (cycle - ideal) / len(waypoints)) for cycle in cycles]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=2.0, help="virtual run time")
+    parser.add_argument("--points", type=int, default=40, help="waypoints per loop")
+    parser.add_argument("--vel", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="virtual controller latency per call")
+    parser.add_argument("--wait", choices=("timer", "event", "pipelined"), default="pipelined",
+                        help="step completion detection")
+    parser.add_argument("--lookahead", type=float, default=0.0, help="pipelined: send this long before a move ends (s)")
+    parser.add_argument("--max-cycle", type=float, default=None, help="fail if the mean cycle exceeds this (s)")
+    args = parser.parse_args()
+
+    sim_backend.robot.call_latency = args.latency_ms / 1000.0
+    sim_backend.robot.motion_buffer = 1 if args.lookahead > 0 else 0
+    functions.connect_robot("127.0.0.1", "6001", ROBOT_NAME)
+    functions.set_servo_poweron(ROBOT_NAME)
+    program = make_program(args.points)
+
+    cycles = []
+    dead_times = []
+    wall_start = time.perf_counter()
+    virtual_start = functions.clock.now()
+    handle = functions.RobotHandle(ROBOT_NAME)
+    waypoints = np.array(program)
+    while functions.clock.now() - virtual_start < args.hours * 3600:
+        if args.wait == "pipelined":
+            results = run_pipelined(handle, waypoints, PIPELINE_CHUNK, args.vel, 30, 30, args.lookahead)
+        else:
+            results = [run_loop(program, args.vel, 30, 30, args.wait)]
+        for cycle, dead_time in results:
+            cycles.append(cycle)
+            dead_times.append(dead_time)
+    wall = time.perf_counter() - wall_start
+    virtual = functions.clock.now() - virtual_start
+
+    calls = sum(sim_backend.robot.call_counts.values())
+    state_queries = sim_backend.robot.call_counts["get_robot_running_state"]
+    mean_cycle = sum(cycles) / len(cycles)
+    print(f"wait mode        {args.wait}" + (f" (lookahead {args.lookahead} s, buffering controller)"
+                                              if args.wait == "pipelined" and args.lookahead > 0 else ""))
+    print(f"loops            {len(cycles)}")
+    print(f"cycle time       mean {mean_cycle:.3f} s  min {min(cycles):.3f} s  max {max(cycles):.3f} s")
+    print(f"dead time/step   {sum(dead_times) / len(dead_times) * 1000:.1f} ms")
+    print(f"state queries    {state_queries / len(cycles):.1f} per loop")
+    print(f"throughput       {len(cycles) / virtual * 3600:.1f} loops/h")
+    print(f"controller calls {calls} ({calls / len(cycles):.1f} per loop)")
+    print(f"virtual time     {virtual / 3600:.2f} h in {wall:.2f} s wall ({virtual / wall:,.0f}x real time)")
+
+    if args.max_cycle is not None and mean_cycle > args.max_cycle:
+        print(f"FAIL: mean cycle {mean_cycle:.3f} s > {args.max_cycle:.3f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Frame time of the 3D view: per-frame mesh copies vs. transform-only updates.
+
+Renders the UR5 offscreen while sweeping the joints, once with the old
+update (urdfpy link_fk, then copy every link mesh, transform it and
+re-upload it) and once with robo_viz.RobotScene (kinematics.py FK, then set
+each actor's user matrix).  Reports
+ms/frame for the update and the render, Python allocations per frame, and
+how many mesh points were copied per frame.
+
+Needs pyvista (and pyvistaqt, for robo_viz) and the meshes referenced by
+Main/Models/ur5_g.urdf; without pyvista it prints that it is skipping.
+urdfpy is optional: without it only the transform-only update is timed.
+Run from the "RoboSoftware (Visualization Only)" folder:
+
+    python benchmarks/bench_viz_frame.py [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main"))
+
+try:
+    import pyvista as pv
+    from robo_viz import RobotScene
+except ImportError:
+    pv = RobotScene = None
+
+from kinematics import KinematicChain
+
+URDF_PATH = "Main/Models/ur5_g.urdf"
+
+
+def load_urdfpy():
+    try:
+        if not hasattr(np, "float"):
+            np.float = float  # urdfpy still uses the removed alias
+        from urdfpy import URDF
+    except ImportError:
+        return None
+    return URDF.load(URDF_PATH)
+
+
+class CopyingRobotScene:
+    """The pre-transform-only update: a transformed mesh copy per visual per frame."""
+
+    def __init__(self, plotter, robot):
+        self.plotter = plotter
+        self.robot = robot  # urdfpy.URDF
+        self.meshes = {}
+        self.points_copied = 0
+
+    def set_pose(self, cfg):
+        fk = self.robot.link_fk(cfg=cfg)
+        for link in self.robot.links:
+            for idx, visual in enumerate(link.visuals):
+                if visual.geometry.mesh is None:
+                    continue
+                key = f"{link.name}_{idx}"
+                T_visual = visual.origin if visual.origin is not None else np.eye(4)
+                T = fk[link] @ T_visual
+                if key not in self.meshes:
+                    base_mesh = pv.read(visual.geometry.mesh.filename)
+                    actor = self.plotter.add_mesh(base_mesh.copy(), color="lightgrey", show_edges=False)
+                    self.meshes[key] = (actor, base_mesh)
+                actor, base_mesh = self.meshes[key]
+                transformed_mesh = base_mesh.copy()
+                transformed_mesh.transform(T, inplace=True)
+                actor.mapper.SetInputData(transformed_mesh)
+                self.points_copied += base_mesh.n_points
+
+
+def poses(names, frames):
+    for i in range(frames):
+        phase = 2 * np.pi * i / frames
+        yield {name: 0.5 * np.sin(phase + k) for k, name in enumerate(names)}
+
+
+def run(label, scene_class, robot, names, frames, size):
+    plotter = pv.Plotter(off_screen=True, window_size=size)
+    scene = scene_class(plotter, robot)
+    cfg_list = list(poses(names, frames))
+    scene.set_pose(cfg_list[0])
+    plotter.reset_camera()
+    plotter.render()
+
+    update = render = 0.0
+    tracemalloc.start()
+    for cfg in cfg_list:
+        start = time.perf_counter()
+        scene.set_pose(cfg)
+        middle = time.perf_counter()
+        plotter.render()
+        end = time.perf_counter()
+        update += middle - start
+        render += end - middle
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Allocated blocks per frame (tracemalloc only sees Python-side allocations)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for cfg in cfg_list[:50]:
+        scene.set_pose(cfg)
+        plotter.render()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    copied = getattr(scene, "points_copied", 0) / (frames + 51)
+    print(f"{label:<16} update {update / frames * 1000:7.2f} ms  render {render / frames * 1000:7.2f} ms  "
+          f"total {(update + render) / frames * 1000:7.2f} ms/frame  "
+          f"{blocks / 50:8.1f} blocks/frame  peak {peak / 1024:8.0f} KiB  "
+          f"{copied:10,.0f} points copied/frame")
+    plotter.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    args = parser.parse_args()
+
+    if pv is None:
+        print("pyvista (or pyvistaqt) not installed: skipping the frame timing")
+        return
+
+    chain = KinematicChain.from_urdf(URDF_PATH)
+    size = (args.width, args.height)
+    robot = load_urdfpy()
+    if robot is None:
+        print("urdfpy not installed: skipping the mesh-copy comparison")
+    else:
+        run("mesh copies", CopyingRobotScene, robot, chain.joint_names, args.frames, size)
+    run("user matrix", RobotScene, chain, chain.joint_names, args.frames, size)
+
+
+if __name__ == "__main__":
+    main()
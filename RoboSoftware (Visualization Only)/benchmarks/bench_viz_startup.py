@@ -0,0 +1,87 @@
+"""
+Startup time of the 3D view: cold (no viz cache) vs. warm (cached bundle).
+
+Each launch runs in a fresh interpreter and times what RobotVisualizer does
+before the first frame: viz_cache.load_robot_model (URDF + meshes), and,
+when pyvista is installed, adding every mesh to an offscreen plotter and
+rendering once.  The cold launch starts from an empty cache directory; warm
+launches reuse the bundle it wrote.
+
+    python benchmarks/bench_viz_startup.py [--warm-runs 5]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Main")
+URDF_PATH = os.path.join(MAIN_DIR, "Models", "ur5_g.urdf")
+
+
+def launch(cache_dir):
+    """Child process body: time one viz startup and print the phases as JSON."""
+    sys.path.insert(0, MAIN_DIR)
+    timings = {}
+    start = time.perf_counter()
+    import viz_cache  # numpy; the app has it loaded already
+    timings["import"] = time.perf_counter() - start
+    phase = time.perf_counter()
+    chain, meshes = viz_cache.load_robot_model(URDF_PATH, cache_dir=cache_dir)
+    timings["load_model"] = time.perf_counter() - phase
+
+    try:
+        import pyvista as pv
+    except ImportError:
+        pv = None
+    if pv is not None:
+        from robo_viz import RobotScene
+        phase = time.perf_counter()
+        plotter = pv.Plotter(off_screen=True, window_size=(800, 600))
+        scene = RobotScene(plotter, chain, meshes)
+        scene.set_joint_vector([0.0] * len(chain.joint_names))
+        plotter.reset_camera()
+        plotter.render()
+        timings["first_frame"] = time.perf_counter() - phase
+        plotter.close()
+    timings["total"] = time.perf_counter() - start
+    print(json.dumps(timings))
+
+
+def run_child(cache_dir):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", cache_dir],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def report(label, runs):
+    phases = runs[0].keys()
+    text = "  ".join(f"{phase} {statistics.median(r[phase] for r in runs) * 1000:8.1f} ms" for phase in phases)
+    print(f"{label:<6} {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--warm-runs", type=int, default=5)
+    parser.add_argument("--child", metavar="CACHE_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        launch(args.child)
+        return
+
+    cache_dir = tempfile.mkdtemp(prefix="viz_cache_")
+    try:
+        report("cold", [run_child(cache_dir)])
+        report("warm", [run_child(cache_dir) for _ in range(args.warm_runs)])
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+// Stand-in for libnrc_host on Linux/macOS.
+// Implements every export of Main/nrc_lib.h against a simulated single robot:
+// movej/movel/home/jogging move in real time, get_current_position reports the
+// interpolated pose and get_robot_running_state is 1 while a motion is active.
+// Joint and Cartesian poses are tracked independently (there is no kinematics).
+//
+// Per-call latency (milliseconds, applied on entry to every export) comes from
+// NRC_STUB_LATENCY_MS or nrc_stub_set_latency_ms().  NRC_STUB_LATENCY_JITTER_MS
+// adds a uniform random 0..jitter on top.
+#include <math.h>
+#include <pthread.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "nrc_lib.h"
+
+#define AXES 7
+
+static const double JOINT_MAX_SPEED = 180.0;   // deg/s at vel=100
+static const double LINEAR_MAX_SPEED = 1000.0; // mm/s at vel=100
+static const double JOG_SPEED = 10.0;          // deg/s or mm/s while jogging
+
+struct Motion {
+    int active;
+    int cartesian;              // 0: joints, 1: cart
+    double start[AXES];
+    double target[AXES];
+    double t0;
+    double duration;
+    int jog_axis;               // -1 when not jogging
+    double jog_dir;
+};
+
+static pthread_mutex_t g_lock = PTHREAD_MUTEX_INITIALIZER;
+static int g_connected = 0;
+static int g_servo_state = stop;
+static int g_speed = 30;
+static int g_coord = 0;
+static int g_mode = 0;
+static double g_joints[AXES];
+static double g_cart[AXES] = {400.0, 0.0, 500.0, 180.0, 0.0, 0.0, 0.0};
+static struct Motion g_motion;
+static int g_latency_ms = -1;
+static int g_jitter_ms = 0;
+
+static double now_s(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec * 1e-9;
+}
+
+static void simulate_latency(void)
+{
+    if (g_latency_ms < 0) {
+        const char *env = getenv("NRC_STUB_LATENCY_MS");
+        const char *jitter = getenv("NRC_STUB_LATENCY_JITTER_MS");
+        g_latency_ms = env ? atoi(env) : 0;
+        g_jitter_ms = jitter ? atoi(jitter) : 0;
+    }
+    int ms = g_latency_ms + (g_jitter_ms > 0 ? rand() % (g_jitter_ms + 1) : 0);
+    if (ms <= 0) {
+        return;
+    }
+    struct timespec ts = {ms / 1000, (long)(ms % 1000) * 1000000L};
+    nanosleep(&ts, NULL);
+}
+
+// Advance the active motion to the current time. Caller holds g_lock.
+static void update_motion(void)
+{
+    if (!g_motion.active) {
+        return;
+    }
+    double *pose = g_motion.cartesian ? g_cart : g_joints;
+    double elapsed = now_s() - g_motion.t0;
+
+    if (g_motion.jog_axis >= 0) {
+        pose[g_motion.jog_axis] = g_motion.start[g_motion.jog_axis] + g_motion.jog_dir * JOG_SPEED * elapsed;
+        return;
+    }
+
+    double s = g_motion.duration > 0.0 ? elapsed / g_motion.duration : 1.0;
+    if (s >= 1.0) {
+        memcpy(pose, g_motion.target, sizeof(g_motion.target));
+        g_motion.active = 0;
+        if (g_servo_state == running) {
+            g_servo_state = ok;
+        }
+        return;
+    }
+    for (int i = 0; i < AXES; ++i) {
+        pose[i] = g_motion.start[i] + (g_motion.target[i] - g_motion.start[i]) * s;
+    }
+}
+
+static int start_motion(const double *target, int cartesian, int vel)
+{
+    if (!g_connected) {
+        return -1;
+    }
+    if (g_servo_state == stop || g_servo_state == error) {
+        return -2;
+    }
+    update_motion();
+
+    double *pose = cartesian ? g_cart : g_joints;
+    double max_speed = cartesian ? LINEAR_MAX_SPEED : JOINT_MAX_SPEED;
+    double speed = max_speed * (vel > 0 ? vel : 1) / 100.0;
+    double distance = 0.0;
+    for (int i = 0; i < AXES; ++i) {
+        distance = fmax(distance, fabs(target[i] - pose[i]));
+    }
+
+    memcpy(g_motion.start, pose, sizeof(g_motion.start));
+    memcpy(g_motion.target, target, sizeof(g_motion.target));
+    g_motion.cartesian = cartesian;
+    g_motion.t0 = now_s();
+    g_motion.duration = distance / speed;
+    g_motion.jog_axis = -1;
+    g_motion.active = 1;
+    g_servo_state = running;
+    return 0;
+}
+
+#define ENTER() simulate_latency(); pthread_mutex_lock(&g_lock); update_motion()
+#define LEAVE(value) do { int result_ = (value); pthread_mutex_unlock(&g_lock); return result_; } while (0)
+
+extern "C" {
+
+EXPORT_API void nrc_stub_set_latency_ms(int ms, int jitter_ms)
+{
+    pthread_mutex_lock(&g_lock);
+    g_latency_ms = ms;
+    g_jitter_ms = jitter_ms;
+    pthread_mutex_unlock(&g_lock);
+}
+
+EXPORT_API int connect_robot(const char *, const char *, const char *)
+{
+    ENTER();
+    g_connected = 1;
+    LEAVE(0);
+}
+
+EXPORT_API int disconnect_robot(const char *)
+{
+    ENTER();
+    g_connected = 0;
+    g_motion.active = 0;
+    g_servo_state = stop;
+    LEAVE(0);
+}
+
+EXPORT_API int get_connection_status(const char *)
+{
+    ENTER();
+    LEAVE(g_connected);
+}
+
+EXPORT_API int clear_error(const char *)
+{
+    ENTER();
+    if (g_servo_state == error) {
+        g_servo_state = stop;
+    }
+    LEAVE(0);
+}
+
+EXPORT_API int set_servo_state(int state, const char *)
+{
+    ENTER();
+    if (!g_connected) {
+        LEAVE(-1);
+    }
+    g_servo_state = state ? ok : stop;
+    if (!state) {
+        g_motion.active = 0;
+    }
+    LEAVE(0);
+}
+
+EXPORT_API int get_servo_state(const char *)
+{
+    ENTER();
+    LEAVE(g_servo_state);
+}
+
+EXPORT_API int set_servo_poweron(const char *)
+{
+    ENTER();
+    if (!g_connected) {
+        LEAVE(-1);
+    }
+    if (g_servo_state == stop) {
+        g_servo_state = ok;
+    }
+    LEAVE(0);
+}
+
+EXPORT_API int set_servo_poweroff(const char *)
+{
+    ENTER();
+    if (!g_connected) {
+        LEAVE(-1);
+    }
+    g_motion.active = 0;
+    g_servo_state = stop;
+    LEAVE(0);
+}
+
+EXPORT_API int get_current_position(double *pos, int coord, const char *)
+{
+    ENTER();
+    if (!g_connected) {
+        LEAVE(-1);
+    }
+    memcpy(pos, coord == 0 ? g_joints : g_cart, sizeof(double) * AXES);
+    LEAVE(0);
+}
+
+EXPORT_API int get_robot_running_state(const char *)
+{
+    ENTER();
+    LEAVE(g_motion.active ? 1 : 0);
+}
+
+EXPORT_API int set_speed(int speed, const char *)
+{
+    ENTER();
+    g_speed = speed;
+    LEAVE(0);
+}
+
+EXPORT_API int get_speed(const char *)
+{
+    ENTER();
+    LEAVE(g_speed);
+}
+
+EXPORT_API int set_current_coord(int coord, const char *)
+{
+    ENTER();
+    g_coord = coord;
+    LEAVE(0);
+}
+
+EXPORT_API int get_current_coord(const char *)
+{
+    ENTER();
+    LEAVE(g_coord);
+}
+
+EXPORT_API int set_current_mode(int mode, const char *)
+{
+    ENTER();
+    g_mode = mode;
+    LEAVE(0);
+}
+
+EXPORT_API int get_current_mode(const char *)
+{
+    ENTER();
+    LEAVE(g_mode);
+}
+
+EXPORT_API int robot_start_jogging(int axis, bool dir, const char *)
+{
+    ENTER();
+    if (!g_connected || g_servo_state == stop || axis < 1 || axis > AXES) {
+        LEAVE(-1);
+    }
+    g_motion.cartesian = g_coord != 0;
+    memcpy(g_motion.start, g_motion.cartesian ? g_cart : g_joints, sizeof(g_motion.start));
+    g_motion.t0 = now_s();
+    g_motion.jog_axis = axis - 1;
+    g_motion.jog_dir = dir ? 1.0 : -1.0;
+    g_motion.active = 1;
+    g_servo_state = running;
+    LEAVE(0);
+}
+
+EXPORT_API int robot_stop_jogging(int, const char *)
+{
+    ENTER();
+    if (g_motion.jog_axis >= 0) {
+        g_motion.active = 0;
+        g_motion.jog_axis = -1;
+        g_servo_state = ok;
+    }
+    LEAVE(0);
+}
+
+EXPORT_API int robot_go_to_reset_position(const char *)
+{
+    ENTER();
+    double zero[AXES] = {0};
+    LEAVE(start_motion(zero, 0, g_speed));
+}
+
+EXPORT_API int robot_go_home(const char *)
+{
+    ENTER();
+    double zero[AXES] = {0};
+    LEAVE(start_motion(zero, 0, g_speed));
+}
+
+EXPORT_API int robot_movej(double *pos, int vel, int coord, int, int, const char *)
+{
+    ENTER();
+    LEAVE(start_motion(pos, coord != 0, vel));
+}
+
+EXPORT_API int robot_movel(double *pos, int vel, int, int, int, const char *)
+{
+    ENTER();
+    LEAVE(start_motion(pos, 1, vel));
+}
+
+EXPORT_API int job_stop(const char *)
+{
+    ENTER();
+    g_motion.active = 0;
+    if (g_servo_state == running) {
+        g_servo_state = ok;
+    }
+    LEAVE(0);
+}
+
+}